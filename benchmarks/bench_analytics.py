@@ -0,0 +1,69 @@
+"""Time the week-over-week analytics over years of weekly snapshots, read back from a snapshot store.
+
+Usage:
+    python benchmarks/bench_analytics.py --weeks 260 --tickers 5000
+"""
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from mypackage import analytics
+from mypackage.main import PipelineConfig, USAModelPipeline
+from mypackage.store import SnapshotStore
+
+
+def snapshots(weeks: int, tickers: int, columns, seed: int = 0):
+    """Weekly frames with random ranks, where about 1% of the universe is listed or delisted every week."""
+    rng = np.random.default_rng(seed)
+    universe = np.array([f"T{i:05d}" for i in range(tickers * 2)], dtype=object)
+    listed = np.zeros(len(universe), dtype=bool)
+    listed[:tickers] = True
+    for week in range(weeks):
+        churn = rng.choice(len(universe), len(universe) // 100, replace=False)
+        listed[churn] = ~listed[churn]
+        n = int(listed.sum())
+        df = pd.DataFrame(rng.integers(0, n, size=(n, len(columns))).astype(np.float32), columns=columns)
+        df.insert(0, "Ticker", universe[listed])
+        yield date(2020, 1, 1) + timedelta(weeks=week), df
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--weeks", type=int, default=260)
+    parser.add_argument("--tickers", type=int, default=5000)
+    parser.add_argument("--window", type=int, default=4)
+    args = parser.parse_args()
+
+    pipeline = USAModelPipeline(PipelineConfig(user="", password=""))
+    columns = pipeline.score_columns + pipeline.calculated_columns
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SnapshotStore(Path(tmp))
+        for snapshot_date, df in snapshots(args.weeks, args.tickers, columns):
+            store.write("USA", snapshot_date, df)
+
+        start = time.perf_counter()
+        df = store.load("USA", columns=["Ticker"] + columns)
+        loaded = time.perf_counter()
+        cube = analytics.SnapshotCube.from_frame(df, columns)
+        aligned = time.perf_counter()
+        analytics.summary(cube, args.window)
+        for col in pipeline.calculated_columns:
+            analytics.movers(cube, col)
+        done = time.perf_counter()
+
+    print(f"{args.weeks} snapshots x {len(cube.tickers)} tickers x {len(columns)} columns "
+          f"({cube.values.nbytes / 2**20:.0f} MiB)")
+    print(f"load    {loaded - start:>7.3f}s")
+    print(f"align   {aligned - loaded:>7.3f}s")
+    print(f"analyze {done - aligned:>7.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Compare re-scoring a whole export against updating a few tickers of it incrementally.
+
+Usage:
+    python benchmarks/bench_live.py --model USA --rows 100000 --tickers 5
+"""
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from synthetic import write_export
+
+from mypackage.live import LiveScores
+from mypackage.main import MODELS, PipelineConfig
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", choices=list(MODELS), default="USA")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--tickers", type=int, default=5)
+    parser.add_argument("--updates", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    pipeline = MODELS[args.model](PipelineConfig(user="", password=""))
+    with tempfile.TemporaryDirectory() as tmp:
+        export = pipeline.read_csv(write_export(args.model, args.rows, Path(tmp) / "export.csv"))
+
+    start = time.perf_counter()
+    processed = pipeline.score(pipeline.prepare(export.copy()))
+    full = time.perf_counter() - start
+    start = time.perf_counter()
+    live = LiveScores(pipeline, processed)
+    indexing = time.perf_counter() - start
+
+    # the price-driven columns, which move during the day
+    columns = [col for col in pipeline.rank_descend if col in export.columns][-3:]
+    changed, elapsed = 0, 0.0
+    for _ in range(args.updates):
+        rows = rng.choice(args.rows, args.tickers, replace=False)
+        # an intraday move of up to 2%
+        export.loc[rows, columns] *= rng.uniform(0.98, 1.02, size=(args.tickers, len(columns)))
+        start = time.perf_counter()
+        changed += len(live.update(export.iloc[rows]))
+        elapsed += time.perf_counter() - start
+
+    print(f"full run           {args.rows} rows             {full:>8.3f}s")
+    print(f"index once         {args.rows} rows             {indexing:>8.3f}s")
+    print(f"incremental update {args.tickers} tickers  {changed / args.updates:>8.0f} rows changed"
+          f"  {elapsed / args.updates:>8.3f}s")
+
+
+if __name__ == "__main__":
+    main()
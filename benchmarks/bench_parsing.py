@@ -0,0 +1,66 @@
+"""Compare the bulk number parser against the per-column regex path it replaced.
+
+Usage:
+    python benchmarks/bench_parsing.py --rows 1000000 --columns 6
+"""
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from mypackage import parsing
+
+
+def formatted_frame(n_rows: int, n_columns: int, seed: int = 0) -> pd.DataFrame:
+    """Percent, currency and thousands-grouped text columns, in turn."""
+    rng = np.random.default_rng(seed)
+    formats = ["{:.2f}%", "${:,.2f}", "{:,.0f}"]
+    return pd.DataFrame({
+        f"col {j}": [formats[j % 3].format(v) for v in rng.lognormal(5, 2, n_rows)] for j in range(n_columns)
+    })
+
+
+def regex_path(df: pd.DataFrame) -> None:
+    for col in df.columns:
+        df[col] = df[col].str.rstrip("%")
+        df[col] = df[col].str.replace(r"[^0-9.\-]", "", regex=True).astype(float)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--columns", type=int, default=6)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    source = formatted_frame(args.rows, args.columns)
+    cases = {"per-column regex": regex_path,
+             "parse_numbers": lambda df: parsing.parse_numbers(df, list(df.columns))}
+    if parsing.HAS_PYARROW:
+        def without_pyarrow(df: pd.DataFrame) -> None:
+            parsing.HAS_PYARROW = False
+            try:
+                parsing.parse_numbers(df, list(df.columns))
+            finally:
+                parsing.HAS_PYARROW = True
+        cases["parse_numbers, no pyarrow"] = without_pyarrow
+
+    results = {}
+    for name, fn in cases.items():
+        best = float("inf")
+        for _ in range(args.repeat):
+            df = source.copy()
+            start = time.perf_counter()
+            fn(df)
+            best = min(best, time.perf_counter() - start)
+        results[name] = df
+        print(f"{name:<26} {args.columns} columns x {args.rows} rows  {best:>7.3f}s")
+    for df in results.values():
+        pd.testing.assert_frame_equal(df, results["per-column regex"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""Time and measure the memory of every pipeline stage on synthetic universes, and compare against a baseline.
+
+Usage:
+    python benchmarks/bench_pipeline.py --sizes 1000 10000 --save benchmarks/baselines/baseline.json
+    python benchmarks/bench_pipeline.py --sizes 1000 10000 --compare benchmarks/baselines/baseline.json
+
+Timings are the best of ``--repeat`` runs (one run above 10k rows); memory is the peak traced by
+tracemalloc in a separate run, so tracing does not skew the timings. Tracing slows the stages
+several times over, so memory is only measured up to ``--max_traced_rows``.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+import rootutils
+from synthetic import write_export
+
+from mypackage import __version__
+from mypackage.main import MODELS, PipelineConfig
+
+root_path = rootutils.find_root(search_from=__file__, indicator=".project-root")
+
+SIZES = [1_000, 10_000, 100_000, 1_000_000]
+# StyleFrame needs minutes per 10k rows, so it is only measured up to this size
+MAX_STYLEFRAME_ROWS = 10_000
+MAX_TRACED_ROWS = 100_000
+REGRESSION_TOLERANCE = 1.3
+
+
+def measure(fn: Callable[[], Any], repeat: int, trace: bool = True) -> Dict[str, Optional[float]]:
+    """Best wall and CPU time over ``repeat`` runs, and the traced peak memory of one more run."""
+    seconds = cpu_seconds = float("inf")
+    for _ in range(repeat):
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        fn()
+        seconds = min(seconds, time.perf_counter() - wall_start)
+        cpu_seconds = min(cpu_seconds, time.process_time() - cpu_start)
+    if not trace:
+        return {"seconds": round(seconds, 4), "cpu_seconds": round(cpu_seconds, 4), "peak_mib": None}
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": round(seconds, 4), "cpu_seconds": round(cpu_seconds, 4), "peak_mib": round(peak / 2**20, 2)}
+
+
+def bench_model(model: str, csv_path: Path, n_rows: int, directory: Path, repeat: int,
+                trace: bool) -> List[Dict[str, Any]]:
+    results = []
+
+    def record(stage: str, fn: Callable[[], Any]) -> None:
+        result = {"model": model, "rows": n_rows, "stage": stage, **measure(fn, repeat, trace)}
+        memory = "" if result["peak_mib"] is None else f"{result['peak_mib']:>9.1f} MiB"
+        print(f"{model:<4} {n_rows:>9} {stage:<40} {result['seconds']:>9.3f}s {memory}", flush=True)
+        results.append(result)
+
+    pipeline = MODELS[model](PipelineConfig(user="", password=""))
+    record("read_csv_and_process", lambda: pipeline.read_csv_and_process(csv_path))
+    processed = pipeline.read_csv_and_process(csv_path)
+    for backend in ("xlsxwriter", "styleframe"):
+        if backend == "styleframe" and n_rows > MAX_STYLEFRAME_ROWS:
+            continue
+        pipeline = MODELS[model](PipelineConfig(user="", password="", excel_backend=backend))
+        output = directory / f"{model}-{backend}.xlsx"
+        record(f"style_as_excel_and_save[{backend}]",
+               lambda: pipeline.style_as_excel_and_save(processed.copy(), output))
+        record(f"end_to_end[{backend}]", lambda: pipeline.process_file(csv_path, output))
+    return results
+
+
+def metadata() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=root_path, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "version": __version__,
+        "commit": commit,
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def compare(results: List[Dict[str, Any]], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Describe every stage that got slower than ``tolerance`` times its baseline."""
+    previous = {(r["model"], r["rows"], r["stage"]): r for r in baseline["results"]}
+    regressions = []
+    for result in results:
+        before = previous.get((result["model"], result["rows"], result["stage"]))
+        if before is None:
+            continue
+        ratio = result["seconds"] / max(before["seconds"], 1e-9)
+        line = (f"{result['model']:<4} {result['rows']:>9} {result['stage']:<40} "
+                f"{before['seconds']:>9.3f}s -> {result['seconds']:>9.3f}s  x{ratio:.2f}")
+        print(line)
+        if ratio > tolerance:
+            regressions.append(line)
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--models", nargs="+", default=list(MODELS), choices=list(MODELS))
+    parser.add_argument("--sizes", nargs="+", type=int, default=SIZES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--max_traced_rows", type=int, default=MAX_TRACED_ROWS)
+    parser.add_argument("--save", type=Path, help="write the results as a JSON baseline")
+    parser.add_argument("--compare", type=Path, help="fail if a stage is slower than this JSON baseline")
+    parser.add_argument("--tolerance", type=float, default=REGRESSION_TOLERANCE)
+    args = parser.parse_args()
+    logging.getLogger("USA Model").setLevel(logging.WARNING)
+    warnings.simplefilter("ignore", FutureWarning)
+
+    results: List[Dict[str, Any]] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(tmp)
+        for model in args.models:
+            for n_rows in args.sizes:
+                csv_path = write_export(model, n_rows, directory / f"{model}-{n_rows}.csv")
+                repeat = args.repeat if n_rows <= 10_000 else 1
+                results.extend(bench_model(model, csv_path, n_rows, directory, repeat,
+                                           trace=n_rows <= args.max_traced_rows))
+                csv_path.unlink()
+
+    if args.save is not None:
+        args.save.parent.mkdir(parents=True, exist_ok=True)
+        args.save.write_text(json.dumps({"meta": metadata(), "results": results}, indent=2) + "\n")
+        print(f"Saved baseline to {args.save}")
+    baseline: Optional[Dict[str, Any]] = json.loads(args.compare.read_text()) if args.compare else None
+    if baseline is not None:
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} stages regressed by more than x{args.tolerance}:")
+            print("\n".join(regressions))
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Compare ranking the score columns one ``Series.rank`` at a time against ``ranking.rank_min``'s batched pass.
+
+Usage:
+    python benchmarks/bench_ranking.py --rows 1000000 --columns 13
+"""
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from mypackage import ranking
+
+
+def make_frame(rows: int, columns: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    data = {}
+    for j in range(columns):
+        if j % 3 == 0:
+            # ranks and grades: a few distinct values, many ties
+            values = rng.integers(1, 6, rows).astype(np.float64)
+        else:
+            values = rng.normal(0, 100, rows).round(2)
+        values[rng.random(rows) < 0.05] = np.nan
+        data[f"col {j}"] = values
+    return pd.DataFrame(data)
+
+
+def loop(df: pd.DataFrame, ascending) -> np.ndarray:
+    # what the pipelines did before ranking.rank_min
+    return np.column_stack([
+        df[col].rank(ascending=asc, method="min").to_numpy() for col, asc in zip(df.columns, ascending)
+    ])
+
+
+def batched(df: pd.DataFrame, ascending) -> np.ndarray:
+    return ranking.rank_min(ranking.to_rank_keys(df, list(df.columns)), ascending)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--columns", type=int, default=13)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    ascending = [j % 2 == 0 for j in range(args.columns)]
+    for rows in args.rows:
+        df = make_frame(rows, args.columns)
+        np.testing.assert_array_equal(loop(df, ascending), batched(df, ascending))
+        for name, fn in (("Series.rank loop", loop), ("rank_min", batched)):
+            best = float("inf")
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                fn(df, ascending)
+                best = min(best, time.perf_counter() - start)
+            print(f"{name:<17} {args.columns} columns x {rows} rows  {best:>7.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Compare the typed, column-pruned CSV reader with a bare ``pd.read_csv``.
+
+Usage:
+    python benchmarks/bench_read_csv.py --scale 1000
+"""
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+import rootutils
+
+from mypackage import readers
+from mypackage.main import ETFModelPipeline, PipelineConfig
+
+root_path = rootutils.find_root(search_from=__file__, indicator=".project-root")
+
+
+def scaled_copy(source: Path, scale: int, directory: Path) -> Path:
+    header, *rows = source.read_text().splitlines(keepends=True)
+    target = directory / f"{source.stem}-x{scale}.csv"
+    with open(target, "w") as f:
+        f.write(header)
+        for _ in range(scale):
+            f.writelines(rows)
+    return target
+
+
+def bare_read(path: Path) -> pd.DataFrame:
+    df = pd.read_csv(path)
+    df.drop(df.filter(regex="Unname"), axis=1, inplace=True)
+    return df
+
+
+def timed(fn, repeat: int):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    dtypes = ETFModelPipeline(PipelineConfig(user="", password="")).input_dtypes
+    with tempfile.TemporaryDirectory() as tmp:
+        path = scaled_copy(root_path / "tests" / "assets" / "etf" / "input.csv", args.scale, Path(tmp))
+        print(f"{path.name}: {path.stat().st_size / 2**20:.1f} MiB")
+        cases = {"bare pd.read_csv": lambda: bare_read(path),
+                 "typed, c engine": lambda: readers.read_csv(path, dtypes, engine="c")}
+        if readers.HAS_PYARROW:
+            cases["typed, pyarrow engine"] = lambda: readers.read_csv(path, dtypes, engine="pyarrow")
+        for name, fn in cases.items():
+            seconds, df = timed(fn, args.repeat)
+            memory = df.memory_usage(deep=True).sum() / 2**20
+            print(f"{name:<24} {seconds:>7.3f}s  {len(df):>9} rows  {memory:>8.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
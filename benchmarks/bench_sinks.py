@@ -0,0 +1,52 @@
+"""Compare writing the output formats one after another against writing them concurrently, and reading
+them back against reading the Excel file.
+
+Usage:
+    python benchmarks/bench_sinks.py --rows 1000000
+"""
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+from synthetic import write_export
+
+from mypackage import sinks
+from mypackage.main import PipelineConfig, USAModelPipeline
+
+FORMATS = ["parquet", "arrow", "csv"]
+
+
+def timed(label: str, fn) -> None:
+    start = time.perf_counter()
+    fn()
+    print(f"{label:<28} {time.perf_counter() - start:>8.3f}s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--excel_rows", type=int, default=10_000)
+    args = parser.parse_args()
+
+    pipeline = USAModelPipeline(PipelineConfig(user="", password="", excel_backend="xlsxwriter"))
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        processed = pipeline.read_csv_and_process(write_export("USA", args.rows, tmp / "usa.csv"))
+        print(f"{args.rows} rows")
+        timed("one by one", lambda: [sinks.write_outputs(processed, tmp / "serial.xlsx", [name]) for name in FORMATS])
+        timed("concurrently", lambda: sinks.write_outputs(processed, tmp / "out.xlsx", FORMATS))
+        timed("read parquet", lambda: pd.read_parquet(tmp / "out.parquet"))
+        timed("memory-map arrow", lambda: pa.ipc.open_file(pa.memory_map(str(tmp / "out.arrow"))).read_all())
+
+        # reading an Excel file back is far slower, so it is timed on fewer rows
+        pipeline.write_xlsx(processed.head(args.excel_rows), tmp / "out.xlsx")
+        timed(f"read xlsx ({args.excel_rows} rows)", lambda: pd.read_excel(tmp / "out.xlsx"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Track the import cost of the entry point and the time until the main window is drawn.
+
+Usage:
+    python benchmarks/bench_startup.py --repeat 5
+
+Exits with 1 if importing the entry point pulls in any of ``HEAVY_MODULES``.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+import rootutils
+
+root_path = rootutils.find_root(search_from=__file__, indicator=".project-root")
+
+ENTRY_POINT = "mypackage.main"
+HEAVY_MODULES = ("pandas", "numpy", "styleframe", "openpyxl", "jsonargparse", "selenium")
+
+FIRST_WINDOW = """
+import tkinter as tk
+from mypackage.main import MainApplication, PipelineConfig
+root = tk.Tk()
+MainApplication(root, PipelineConfig("", ""), width=300).pack(side="top", fill="both", expand=True)
+root.update()
+root.destroy()
+"""
+
+
+def run_python(*args: str) -> subprocess.CompletedProcess:
+    env = dict(os.environ, PYTHONPATH=str(root_path))
+    return subprocess.run([sys.executable, *args], cwd=root_path, env=env, capture_output=True, text=True,
+                          check=True)
+
+
+def import_times(module: str) -> Dict[str, int]:
+    """The cumulative import time in microseconds of every module loaded by ``import module``."""
+    times = {}
+    for line in run_python("-X", "importtime", "-c", f"import {module}").stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def wall_time(args: List[str], repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run_python(*args)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    runs = [import_times(ENTRY_POINT) for _ in range(args.repeat)]
+    entry_ms = statistics.median(run[ENTRY_POINT] for run in runs) / 1000
+    top = sorted((item for item in runs[-1].items() if item[0] != ENTRY_POINT), key=lambda item: item[1],
+                 reverse=True)[:5]
+    print(f"import {ENTRY_POINT}: {entry_ms:.1f} ms (median of {args.repeat}, -X importtime)")
+    for name, us in top:
+        print(f"  {name:<40} {us / 1000:>7.1f} ms")
+
+    interpreter = wall_time(["-c", "pass"], args.repeat)
+    print(f"interpreter start:        {interpreter * 1000:>7.1f} ms")
+    process = wall_time(["-c", f"import {ENTRY_POINT}"], args.repeat)
+    print(f"process importing entry:  {process * 1000:>7.1f} ms")
+    if os.environ.get("DISPLAY") or sys.platform in ("win32", "darwin"):
+        print(f"time to first window:     {wall_time(['-c', FIRST_WINDOW], args.repeat) * 1000:>7.1f} ms")
+    else:
+        print("time to first window:     skipped, no display")
+
+    heavy = sorted(name for name in runs[-1] if name.split(".")[0] in HEAVY_MODULES and "." not in name)
+    if heavy:
+        print(f"{ENTRY_POINT} eagerly imports {', '.join(heavy)}")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""Compare saving the whole scored universe against saving only its top-K sheet.
+
+Usage:
+    python benchmarks/bench_top_k.py --rows 100000 --top_k 100
+"""
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from synthetic import write_export
+
+from mypackage.main import MODELS, PipelineConfig
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", choices=list(MODELS), default="USA")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--top_k", type=int, default=100)
+    parser.add_argument("--backend", choices=["styleframe", "xlsxwriter"], default="xlsxwriter")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_export(args.model, args.rows, Path(tmp) / "export.csv")
+        processed = MODELS[args.model](PipelineConfig(user="", password="")).read_csv_and_process(path)
+        for top_k in (None, args.top_k):
+            cfg = PipelineConfig(user="", password="", excel_backend=args.backend, top_k=top_k)
+            pipeline = MODELS[args.model](cfg)
+            start = time.perf_counter()
+            pipeline.style_as_excel_and_save(processed.copy(), Path(tmp) / "output.xlsx")
+            label = "full universe" if top_k is None else f"top {top_k}"
+            print(f"{label:<14} {args.backend:<10} {args.rows} rows  {time.perf_counter() - start:>8.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Compare scoring several variants of the USA model one after another against one shared pass, and one model alone.
+
+Usage:
+    python benchmarks/bench_variants.py --rows 100000 --variants 5
+"""
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from synthetic import write_export
+
+from mypackage.main import PipelineConfig, USAModelPipeline, score_models
+
+
+def variants(n: int):
+    usa = USAModelPipeline(PipelineConfig(user="", password=""))
+    models = [usa]
+    for i in range(1, n):
+        # each variant drops a different pair of columns
+        dropped = usa.data_columns[2 * i - 2:2 * i]
+        models.append(usa.variant(f"USA {i}", data_columns=[col for col in usa.data_columns if col not in dropped]))
+    return models
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--variants", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    models = variants(args.variants)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_export("USA", args.rows, Path(tmp) / "usa.csv")
+        cases = {"one by one": lambda: {model.name: model.read_csv_and_process(path) for model in models},
+                 "score_models": lambda: score_models(models, path),
+                 "one model": lambda: score_models(models[:1], path)}
+        for name, fn in cases.items():
+            best = float("inf")
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                fn()
+                best = min(best, time.perf_counter() - start)
+            n_models = 1 if name == "one model" else len(models)
+            print(f"{name:<14} {n_models} models x {args.rows} rows  {best:>7.3f}s")
+
+
+if __name__ == "__main__":
+    main()
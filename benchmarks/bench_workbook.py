@@ -0,0 +1,53 @@
+"""Compare saving USA, ETF and USA variant sheets into one workbook sheet by sheet against in parallel processes.
+
+Usage:
+    python benchmarks/bench_workbook.py --rows 100000 --variants 2 --workers 4
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from synthetic import write_export
+
+from mypackage.main import ETFModelPipeline, PipelineConfig, USAModelPipeline, save_workbook
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--variants", type=int, default=2)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    cfg = PipelineConfig(user="", password="", excel_backend="xlsxwriter")
+    usa, etf = USAModelPipeline(cfg), ETFModelPipeline(cfg)
+    with tempfile.TemporaryDirectory() as tmp:
+        usa_processed = usa.read_csv_and_process(write_export("USA", args.rows, Path(tmp) / "usa.csv"))
+        sheets = {
+            "USA": (usa, usa_processed),
+            "ETF": (etf, etf.read_csv_and_process(write_export("ETF", args.rows, Path(tmp) / "etf.csv"))),
+        }
+        for i in range(args.variants):
+            # every variant drops one more score, so their sheets differ
+            variant = usa.variant(f"USA {i + 1}", data_columns=usa.data_columns[:-(i + 1)])
+            sheets[variant.name] = (variant, variant.read_csv_and_process(Path(tmp) / "usa.csv"))
+
+        largest = 0.0
+        for name, sheet in sheets.items():
+            start = time.perf_counter()
+            save_workbook({name: sheet}, Path(tmp) / "sheet.xlsx")
+            largest = max(largest, time.perf_counter() - start)
+        print(f"{'largest sheet':<22} {args.rows} rows  {largest:>8.3f}s")
+        for label, workers in (("sheet by sheet", 1), ("parallel", args.workers)):
+            start = time.perf_counter()
+            save_workbook(sheets, Path(tmp) / "workbook.xlsx", workers=workers)
+            print(f"{label:<22} {len(sheets)} sheets  {time.perf_counter() - start:>8.3f}s")
+        print(f"on {os.cpu_count()} CPUs")
+
+
+if __name__ == "__main__":
+    main()
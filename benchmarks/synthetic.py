@@ -0,0 +1,144 @@
+"""Generate realistic synthetic Zacks screen exports with the same schemas as the real USA and ETF screens.
+
+Usage:
+    python benchmarks/synthetic.py --model USA --rows 100000 --output usa-100k.csv
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+from pathlib import Path
+from typing import Callable, Dict
+
+import numpy as np
+import pandas as pd
+
+GRADES = np.array(["A", "B", "C", "D", "F"])
+GRADE_WEIGHTS = [0.15, 0.25, 0.3, 0.2, 0.1]
+MISSING_FRACTION = 0.02
+
+Column = Callable[[np.random.Generator, int], np.ndarray]
+
+
+def tickers(n: int) -> np.ndarray:
+    """``n`` unique upper-case tickers: A, B, ..., Z, AA, AB, ..."""
+    out = []
+    for i in range(n):
+        name = ""
+        i += 1
+        while i:
+            i, r = divmod(i - 1, 26)
+            name = chr(ord("A") + r) + name
+        out.append(name)
+    return np.array(out, dtype=object)
+
+
+def grades(rng: np.random.Generator, n: int) -> np.ndarray:
+    return rng.choice(GRADES, size=n, p=GRADE_WEIGHTS).astype(object)
+
+
+def integers(low: int, high: int) -> Column:
+    return lambda rng, n: rng.integers(low, high + 1, size=n)
+
+
+def uniform(low: float, high: float, decimals: int = 2) -> Column:
+    return lambda rng, n: rng.uniform(low, high, size=n).round(decimals)
+
+
+def lognormal(mean: float, sigma: float, decimals: int = 2) -> Column:
+    return lambda rng, n: rng.lognormal(mean, sigma, size=n).round(decimals)
+
+
+def normal(scale: float, decimals: int = 2) -> Column:
+    return lambda rng, n: rng.normal(0, scale, size=n).round(decimals)
+
+
+# columns in the order of the real exports; the first three are never missing
+SCHEMAS: Dict[str, Dict[str, Column]] = {
+    "USA": {
+        "Company Name": lambda rng, n: np.array([f"Company {i}" for i in range(n)], dtype=object),
+        "Ticker": lambda rng, n: tickers(n),
+        "Last Close": lognormal(3.5, 1.2),
+        "Market Cap (mil)": lognormal(7, 2),
+        "Avg Volume": lambda rng, n: rng.lognormal(12, 2, size=n).astype(np.int64),
+        "Current Avg Broker Rec": uniform(1, 5),
+        "VGM Score": grades,
+        "Momentum Score": grades,
+        "Zacks Rank": integers(1, 5),
+        "% Price Change (1 Week)": normal(4),
+        "% Price Change (4 Weeks)": normal(9),
+        "% Price Change (12 Weeks)": normal(18),
+        "% Price Change (YTD)": normal(25),
+        "Zacks Industry Rank": integers(1, 250),
+        "Value Score": grades,
+        "Growth Score": grades,
+    },
+    "ETF": {
+        "Company Name": lambda rng, n: np.array([f"Synthetic ETF {i}" for i in range(n)], dtype=object),
+        "Ticker": lambda rng, n: tickers(n),
+        "ETF Rank": integers(1, 5),
+        "Active/Passive": lambda rng, n: rng.choice(np.array(["A", "P"]), size=n, p=[0.2, 0.8]).astype(object),
+        "Forward Yield": uniform(0, 8),
+        "Expense Ratio": uniform(0.03, 1.5),
+        "Performance 1D (%)": normal(1, decimals=4),
+        "Performance 1M (%)": normal(5, decimals=4),
+        "Performance 1Y (%)": normal(20, decimals=4),
+        "Performance YTD (%)": normal(15, decimals=4),
+        "Performance 6M (%)": normal(12, decimals=4),
+        "Performance 3M (%)": normal(8, decimals=4),
+    },
+}
+
+
+def synthetic_export(model: str, n_rows: int, seed: int = 0) -> pd.DataFrame:
+    """A synthetic export of ``n_rows`` rows, with a few missing values in every column but the first three.
+
+    Args:
+        model (str): "USA" or "ETF".
+        n_rows (int): the number of rows.
+        seed (int): the random seed, so runs are comparable.
+
+    Returns:
+        pd.DataFrame: the export as strings and numbers, in the column order of the real export
+    """
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for i, (name, column) in enumerate(SCHEMAS[model].items()):
+        values = pd.Series(column(rng, n_rows))
+        if values.dtype.kind == "i":
+            values = values.astype("Int64")
+        if i >= 3:
+            values[rng.random(n_rows) < MISSING_FRACTION] = None
+        columns[name] = values
+    return pd.DataFrame(columns)
+
+
+def write_export(model: str, n_rows: int, path: Path, seed: int = 0) -> Path:
+    """Write a synthetic export formatted like the real one.
+
+    USA exports are plain; ETF exports quote every field and drop the leading zero of decimals (".18").
+    """
+    df = synthetic_export(model, n_rows, seed)
+    if model == "ETF":
+        for col in df.columns[2:]:
+            if df[col].dtype.kind == "f":
+                text = df[col].map(repr, na_action="ignore")
+                df[col] = text.str.replace(r"^(-?)0\.", r"\1.", regex=True).fillna("")
+        df.to_csv(path, index=False, quoting=csv.QUOTE_ALL)
+    else:
+        df.to_csv(path, index=False)
+    return Path(path)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", choices=list(SCHEMAS), default="USA")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, required=True)
+    args = parser.parse_args()
+    write_export(args.model, args.rows, args.output, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""Week-over-week analytics over the stored snapshots of a model: rank deltas, rolling averages, streaks and movers.
+
+Usage:
+    python -m mypackage.analytics --store_dir store --model USA --window 4 --output analytics.csv
+
+The snapshots are aligned on Ticker into one (snapshots x tickers x columns) array, missing where a
+ticker was not listed yet or anymore, so every statistic is a single vectorized operation over the
+whole history.
+"""
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from jsonargparse import CLI
+
+from mypackage import ranking
+
+_logger = logging.getLogger("USA Model")
+
+
+@dataclass
+class SnapshotCube:
+    """The values of some columns for every (snapshot, ticker), NaN where a ticker is not listed.
+
+    Attributes:
+        dates (np.ndarray): the snapshot dates, in order.
+        tickers (np.ndarray): the tickers, in order.
+        columns (List[str]): the columns.
+        values (np.ndarray): a (dates, tickers, columns) float32 array.
+    """
+
+    dates: np.ndarray
+    tickers: np.ndarray
+    columns: List[str]
+    values: np.ndarray
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, columns: Sequence[str]) -> SnapshotCube:
+        """Align long snapshots, e.g. from ``SnapshotStore.load``, on their "date" and "Ticker" columns.
+
+        Args:
+            df (pd.DataFrame): one row per (date, Ticker). The last row wins if a pair repeats.
+            columns (Sequence[str]): the numeric columns to keep.
+
+        Returns:
+            SnapshotCube: the aligned snapshots
+        """
+        date_codes, dates = pd.factorize(df["date"], sort=True)
+        ticker_codes, tickers = pd.factorize(df["Ticker"], sort=True)
+        values = np.full((len(dates), len(tickers), len(columns)), np.nan, dtype=np.float32)
+        values[date_codes, ticker_codes] = df[list(columns)].to_numpy(dtype=np.float32, na_value=np.nan)
+        return cls(np.asarray(dates), np.asarray(tickers, dtype=object), list(columns), values)
+
+
+def deltas(values: np.ndarray, periods: int = 1) -> np.ndarray:
+    """The change of every value since ``periods`` snapshots earlier, NaN if either is missing."""
+    out = np.full_like(values, np.nan)
+    out[periods:] = values[periods:] - values[:-periods]
+    return out
+
+
+def rolling_mean(values: np.ndarray, window: int, min_periods: int = 1) -> np.ndarray:
+    """The mean of the last ``window`` snapshots of every value, skipping missing ones.
+
+    Computed from running sums along the snapshot axis, so the cost does not grow with ``window``.
+    """
+    present = ~np.isnan(values)
+    sums = np.cumsum(np.where(present, values, 0), axis=0, dtype=np.float64)
+    counts = np.cumsum(present, axis=0, dtype=np.int32)
+    sums[window:] -= sums[:-window].copy()
+    counts[window:] -= counts[:-window].copy()
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = (sums / counts).astype(values.dtype)
+    means[counts < min_periods] = np.nan
+    return means
+
+
+def streaks(values: np.ndarray) -> np.ndarray:
+    """How many snapshots in a row every value has been rising (positive) or falling (negative).
+
+    A missing value, or one that did not change, ends the streak at 0. Ranks fall as they improve.
+    """
+    changes = deltas(values)
+    # comparisons with NaN are False, so missing changes have no direction
+    direction = (changes > 0).view(np.int8) - (changes < 0).view(np.int8)
+    n = len(direction)
+    # a run starts wherever the direction changes
+    starts = np.ones(direction.shape, dtype=bool)
+    starts[1:] = direction[1:] != direction[:-1]
+    positions = np.arange(n, dtype=np.int32).reshape((n,) + (1,) * (direction.ndim - 1))
+    run_start = np.maximum.accumulate(np.where(starts, positions, 0), axis=0)
+    return ((positions - run_start + 1) * direction).astype(np.int32)
+
+
+def movers(cube: SnapshotCube, column: str, n: int = 10, periods: int = 1) -> pd.DataFrame:
+    """The tickers whose ``column`` moved the most over the last ``periods`` snapshots, biggest first.
+
+    Args:
+        cube (SnapshotCube): the aligned snapshots.
+        column (str): the column, e.g. "Potential ranking".
+        n (int): the number of risers and of fallers.
+        periods (int): the number of snapshots to look back.
+
+    Returns:
+        pd.DataFrame: the fallers then the risers, with their previous and latest values and the change
+    """
+    j = cube.columns.index(column)
+    previous, latest = cube.values[-1 - periods, :, j], cube.values[-1, :, j]
+    change = (latest - previous).astype(np.float64)
+    fallers, risers = ranking.top_k(change, n), ranking.top_k(-change, n)
+    selected = np.concatenate([fallers[~np.isnan(change[fallers]) & (change[fallers] < 0)],
+                               risers[~np.isnan(change[risers]) & (change[risers] > 0)]])
+    return pd.DataFrame({
+        "Ticker": cube.tickers[selected],
+        "previous": previous[selected],
+        "latest": latest[selected],
+        "change": change[selected],
+    })
+
+
+def summary(cube: SnapshotCube, window: int = 4) -> pd.DataFrame:
+    """Every statistic of the latest snapshot, for the tickers listed in it.
+
+    Args:
+        cube (SnapshotCube): the aligned snapshots.
+        window (int): the number of snapshots averaged.
+
+    Returns:
+        pd.DataFrame: per ticker, each column's latest value, change, rolling mean and streak
+    """
+    stats = {
+        "{}": cube.values,
+        "{} change": deltas(cube.values),
+        f"{{}} {window} snapshots mean": rolling_mean(cube.values, window),
+        "{} streak": streaks(cube.values),
+    }
+    listed = ~np.isnan(cube.values[-1]).all(axis=1)
+    return pd.DataFrame({
+        name.format(col): values[-1, listed, j] for j, col in enumerate(cube.columns) for name, values in stats.items()
+    }, index=pd.Index(cube.tickers[listed], name="Ticker"))
+
+
+def analyze(
+    store_dir: Path,
+    model: str,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    window: int = 4,
+    movers_count: int = 10,
+    output: Optional[Path] = None,
+) -> pd.DataFrame:
+    """Summarize the stored snapshots of a model and log the biggest movers of its rankings.
+
+    Args:
+        store_dir (Path): the snapshot store.
+        model (str): the model name, one of the keys of ``MODELS`` (USA/ETF).
+        start (Optional[date]): the first snapshot date. Defaults to the earliest.
+        end (Optional[date]): the last snapshot date. Defaults to the latest.
+        window (int): the number of snapshots averaged.
+        movers_count (int): the number of risers and fallers logged per ranking.
+        output (Optional[Path]): save the summary to this CSV file.
+
+    Returns:
+        pd.DataFrame: the summary of the latest snapshot
+    """
+    from mypackage.main import MODELS, PipelineConfig
+    from mypackage.store import SnapshotStore
+
+    pipeline = MODELS[model](PipelineConfig(user="", password=""))
+    columns = pipeline.score_columns + pipeline.calculated_columns
+    df = SnapshotStore(Path(store_dir)).load(model, start, end, columns=["Ticker"] + columns)
+    cube = SnapshotCube.from_frame(df, columns)
+    _logger.info(f"Aligned {len(cube.dates)} snapshots of {len(cube.tickers)} tickers over {len(columns)} columns.")
+
+    out = summary(cube, window)
+    if len(cube.dates) > 1:
+        for col in pipeline.calculated_columns:
+            moved = movers(cube, col, movers_count)
+            _logger.info(f"Biggest movers of {col}:\n{moved.to_string(index=False)}")
+    if output is not None:
+        out.to_csv(output)
+        _logger.info(f"Saved the summary to: {output}")
+    return out
+
+
+if __name__ == "__main__":
+    CLI(analyze, as_positional=False)
@@ -0,0 +1,172 @@
+"""Headless batch scoring of many Zacks CSV exports.
+
+Usage:
+    python -m mypackage.batch --inputs "exports/*.csv" --model USA --output_dir scored --workers 4
+"""
+from __future__ import annotations
+
+import glob
+import logging
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+from jsonargparse import CLI
+
+from mypackage.main import MODELS, PipelineConfig
+
+_logger = logging.getLogger("USA Model")
+
+
+@dataclass
+class BatchResult:
+    input_path: Path
+    output_path: Optional[Path] = None
+    n_rows: int = 0
+    seconds: float = 0.0
+    error: Optional[str] = None
+
+
+def collect_inputs(inputs: str) -> List[Path]:
+    """Expand a directory or a glob pattern into a sorted list of CSV files.
+
+    Args:
+        inputs (str): a directory holding CSV exports, or a glob pattern.
+
+    Returns:
+        List[Path]: the matching CSV files
+    """
+    if os.path.isdir(inputs):
+        inputs = os.path.join(inputs, "*.csv")
+    return sorted(Path(p) for p in glob.glob(inputs) if os.path.isfile(p))
+
+
+def unique_stems(paths: Sequence[Path]) -> Dict[Path, str]:
+    """Name every path by its stem, prefixed with the folders that tell it apart where stems repeat.
+
+    For example ``a/data.csv`` and ``b/data.csv`` are named "a-data" and "b-data".
+
+    Args:
+        paths (Sequence[Path]): distinct paths.
+
+    Raises:
+        ValueError: if two paths still get the same name, e.g. ``a-b/data.csv`` and ``a/b/data.csv``.
+
+    Returns:
+        Dict[Path, str]: the name of each path
+    """
+    by_stem: Dict[str, List[Path]] = defaultdict(list)
+    for path in paths:
+        by_stem[Path(path).stem].append(Path(path))
+    names = {}
+    for stem, group in by_stem.items():
+        if len(group) == 1:
+            names[group[0]] = stem
+            continue
+        common = Path(os.path.commonpath([os.path.abspath(path.parent) for path in group]))
+        for path in group:
+            names[path] = "-".join(Path(os.path.abspath(path)).relative_to(common).with_suffix("").parts)
+    taken: Dict[str, List[Path]] = defaultdict(list)
+    for path, name in names.items():
+        taken[name].append(path)
+    clashes = {name: group for name, group in taken.items() if len(group) > 1}
+    if clashes:
+        raise ValueError(f"Cannot name the outputs of {clashes} apart, rename some of them")
+    return names
+
+
+def process_one(model: str, input_path: Path, output_filename: Path, cfg: PipelineConfig) -> BatchResult:
+    """Score a single CSV file. Runs inside a worker process."""
+    result = BatchResult(input_path)
+    start = time.perf_counter()
+    try:
+        pipeline = MODELS[model](cfg)
+        processed, result.output_path = pipeline.process_and_save(input_path, output_filename)
+        result.n_rows = len(processed)
+    except Exception as e:
+        result.error = f"{type(e).__name__}: {e}"
+    result.seconds = time.perf_counter() - start
+    return result
+
+
+def batch(
+    inputs: str,
+    model: str,
+    output_dir: Path = Path("."),
+    workers: Optional[int] = None,
+    excel_backend: str = "styleframe",
+    store_dir: Optional[str] = None,
+    cache_dir: Optional[str] = None,
+    top_k: Optional[int] = None,
+    keep_full_sheet: bool = False,
+    output_formats: Optional[List[str]] = None,
+) -> List[BatchResult]:
+    """Score every CSV export matched by ``inputs`` with a process pool.
+
+    Args:
+        inputs (str): a directory holding CSV exports, or a glob pattern.
+        model (str): the model name, one of the keys of ``MODELS`` (USA/ETF).
+        output_dir (Path): where to save the Excel files.
+        workers (Optional[int]): the number of worker processes. Defaults to the number of CPUs.
+        excel_backend (str): "styleframe" or "xlsxwriter".
+        store_dir (Optional[str]): also persist every snapshot to this snapshot store.
+        cache_dir (Optional[str]): reuse results cached in this directory for identical inputs.
+        top_k (Optional[int]): save only the best ``top_k`` rows of each file.
+        keep_full_sheet (bool): with ``top_k``, also save every row on a second sheet.
+        output_formats (Optional[List[str]]): also save every result as "parquet", "arrow" and/or "csv".
+
+    Returns:
+        List[BatchResult]: a summary per input file, in input order
+    """
+    if model not in MODELS:
+        raise ValueError(f"Unknown model {model!r}, expected one of {list(MODELS)}")
+    input_paths = collect_inputs(inputs)
+    if not input_paths:
+        raise FileNotFoundError(f"No CSV files found in {inputs}")
+    # files with the same name in different folders must not overwrite each other's results
+    names = unique_stems(input_paths)
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    cfg = PipelineConfig(user="", password="", excel_backend=excel_backend, store_dir=store_dir,
+                         cache_dir=cache_dir, top_k=top_k, keep_full_sheet=keep_full_sheet,
+                         output_formats=output_formats)
+    _logger.info(f"Scoring {len(input_paths)} files with the {model} model.")
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(process_one, model, path, output_dir / f"{names[path]}-{model}-Model.xlsx", cfg)
+                   for path in input_paths]
+        for future in as_completed(futures):
+            result = future.result()
+            results[result.input_path] = result
+            if result.error is None:
+                _logger.info(f"{result.input_path.name}: {result.n_rows} rows -> {result.output_path} "
+                             f"({result.seconds:.2f}s)")
+            else:
+                _logger.error(f"{result.input_path.name}: {result.error}")
+
+    summary = [results[path] for path in input_paths]
+    print_summary(summary)
+    return summary
+
+
+def print_summary(results: List[BatchResult]) -> None:
+    width = max(len(r.input_path.name) for r in results)
+    for r in results:
+        if r.error is None:
+            status = f"{r.n_rows:>8} rows  {r.seconds:>7.2f}s  {r.output_path}"
+        else:
+            status = f"FAILED  {r.error}"
+        print(f"{r.input_path.name:<{width}}  {status}")
+    n_failed = sum(r.error is not None for r in results)
+    print(f"{len(results) - n_failed} succeeded, {n_failed} failed.")
+
+
+if __name__ == "__main__":
+    summary = CLI(batch, as_positional=False)
+    if any(r.error is not None for r in summary):
+        raise SystemExit(1)
@@ -0,0 +1,328 @@
+"""A long-lived Chrome session that keeps its driver, profile and login between screen downloads."""
+from __future__ import annotations
+
+import atexit
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from mypackage import downloads, metrics
+
+_logger = logging.getLogger("USA Model")
+
+CHROMEDRIVER_VERSION = "114.0.5735.16"
+DEFAULT_CACHE_DIR = "~/.cache/scrapezacks"
+LOGIN_URL = "https://www.zacks.com/my_account/welcomeback.php"
+HOME_URL = "https://www.zacks.com/"
+USER_INPUT_XPATH = "/html/body/div[2]/div[3]/div/div/div/div/div[2]/table/tbody/tr/td/table/tbody/tr/td[2]/table/tbody/tr[3]/td[2]/input"  # noqa: E501
+PASSWORD_INPUT_XPATH = "/html/body/div[2]/div[3]/div/div/div/div/div[2]/table/tbody/tr/td/table/tbody/tr/td[2]/table/tbody/tr[4]/td[2]/input"  # noqa: E501
+CSV_BUTTON_XPATH = '//*[@id="screener_table_wrapper"]/div[1]/a[1]'
+ELEMENT_TIMEOUT_IN_SEC = 30
+
+_driver_lock = threading.Lock()
+
+
+def resolve_chromedriver(cache_dir: Path, version: str = CHROMEDRIVER_VERSION) -> str:
+    """The path to a chromedriver binary, installing it only the first time a version is asked for.
+
+    Resolved paths are recorded in ``chromedriver.json`` under ``cache_dir``, so later runs find the
+    binary without any network access.
+
+    Args:
+        cache_dir (Path): where drivers and their index are kept.
+        version (str): the chromedriver version.
+
+    Returns:
+        str: path to the chromedriver binary
+    """
+    cache_dir = Path(cache_dir)
+    index_path = cache_dir / "chromedriver.json"
+    with _driver_lock:
+        index: Dict[str, str] = json.loads(index_path.read_text()) if index_path.exists() else {}
+        path = index.get(version)
+        if path is not None and os.access(path, os.X_OK):
+            return path
+        _logger.info(f"Installing chrome driver {version}.")
+        path = _install_chromedriver(version, cache_dir)
+        index[version] = path
+        _write_private(index_path, json.dumps(index, indent=2))
+        return path
+
+
+def _install_chromedriver(version: str, cache_dir: Path) -> str:
+    from webdriver_manager.chrome import ChromeDriverManager
+
+    return ChromeDriverManager(version=version, path=str(cache_dir)).install()
+
+
+def load_cookies(path: Path, now: Optional[float] = None) -> Optional[List[Dict[str, Any]]]:
+    """Saved session cookies, or None if there are none or any of them has expired."""
+    path = Path(path)
+    if not path.exists():
+        return None
+    cookies = json.loads(path.read_text())
+    now = time.time() if now is None else now
+    if not cookies or any(cookie.get("expiry", float("inf")) <= now for cookie in cookies):
+        return None
+    return cookies
+
+
+def save_cookies(path: Path, cookies: List[Dict[str, Any]]) -> None:
+    """Save session cookies where only the current user can read them."""
+    _write_private(Path(path), json.dumps(cookies, indent=2))
+
+
+def _write_private(path: Path, text: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp = path.with_name(f"_{path.name}.{os.getpid()}.{threading.get_ident()}")
+    fd = os.open(temp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w") as f:
+        f.write(text)
+    os.replace(temp, path)
+
+
+class ZacksBrowser:
+    """A warm Chrome session that runs saved screens and downloads their CSV exports.
+
+    The driver binary is resolved from a local cache, Chrome keeps a persistent profile directory,
+    and the session cookies are saved after every run, so a new process only logs in again once
+    they have expired.
+
+    Args:
+        user (str): the account user name.
+        password (str): the account password.
+        headless (bool): run Chrome without a window.
+        cache_dir (Optional[Path]): where the driver, profile and cookies are kept.
+            Defaults to ``~/.cache/scrapezacks``.
+        chromedriver_version (str): the chromedriver version.
+        debugger_address (Optional[str]): attach to an already running Chrome started with
+            ``--remote-debugging-port`` (e.g. ``"127.0.0.1:9222"``) instead of launching one.
+        profile (str): the name of the Chrome profile directory. Browsers running at the same time
+            need different profiles, while the account's session cookies are shared.
+        recorder (Optional[metrics.Recorder]): records the login, screener load, run and CSV wait steps.
+    """
+
+    def __init__(self, user: str, password: str, headless: bool = True, cache_dir: Optional[Path] = None,
+                 chromedriver_version: str = CHROMEDRIVER_VERSION, debugger_address: Optional[str] = None,
+                 profile: str = "default", recorder: Optional[metrics.Recorder] = None) -> None:
+        self.user = user
+        self.password = password
+        self.headless = headless
+        self.cache_dir = Path(cache_dir or DEFAULT_CACHE_DIR).expanduser()
+        self.chromedriver_version = chromedriver_version
+        self.debugger_address = debugger_address
+        user_key = hashlib.sha256(user.encode()).hexdigest()[:12]
+        self.profile_dir = self.cache_dir / "profiles" / user_key / profile
+        self.cookies_path = self.cache_dir / "cookies" / f"{user_key}.json"
+        self.recorder = recorder or metrics.get_recorder()
+        self.driver = None
+        self.logged_in = False
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """Launch Chrome, or attach to a running one, unless it is already up."""
+        if self.driver is not None:
+            return
+        from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options
+        from selenium.webdriver.chrome.service import Service as ChromeService
+        from seleniumrequests.request import RequestsSessionMixin
+
+        class RequestsChromeWebDriver(RequestsSessionMixin, webdriver.Chrome):
+            """A Chrome webdriver with requests functionality."""
+
+            pass
+
+        options = Options()
+        if self.debugger_address is not None:
+            options.debugger_address = self.debugger_address
+        else:
+            options.headless = self.headless
+            options.add_argument(f"--user-data-dir={self.profile_dir}")
+            options.add_experimental_option(
+                "prefs",
+                {
+                    "download.prompt_for_download": False,
+                    "download.directory_upgrade": True,
+                    "safebrowsing.enabled": True,
+                },
+            )
+        service = ChromeService(resolve_chromedriver(self.cache_dir / "drivers", self.chromedriver_version))
+        _logger.info("Starting chrome.")
+        self.driver = RequestsChromeWebDriver(options=options, service=service)
+        self.driver.set_window_size(1150, 1000)
+
+    def close(self) -> None:
+        """Save the session cookies and quit Chrome."""
+        if self.driver is None:
+            return
+        try:
+            if self.logged_in:
+                save_cookies(self.cookies_path, self.driver.get_cookies())
+            if self.debugger_address is None:
+                self.driver.quit()
+        finally:
+            self.driver = None
+            self.logged_in = False
+
+    def login(self) -> None:
+        """Log in with the account's credentials and save the new session cookies.
+
+        Raises:
+            RuntimeError: if the account is locked or signing in fails
+        """
+        from selenium.webdriver.common.by import By
+
+        self.start()
+        driver = self.driver
+        with self.recorder.span("login"):
+            _logger.info("Getting homepage.")
+            driver.get(LOGIN_URL)
+
+            _logger.info("Logging in.")
+            username_input = driver.find_element(By.XPATH, USER_INPUT_XPATH)
+            assert username_input.is_displayed()
+            username_input.send_keys(self.user)  # type: ignore
+            password_input = driver.find_element(By.XPATH, PASSWORD_INPUT_XPATH)
+            assert password_input.is_displayed()
+            password_input.send_keys(self.password)  # type: ignore
+            login_button = driver.find_element(By.ID, "button")
+            assert login_button.is_displayed()
+            login_button.click()
+
+            body = driver.find_element(By.XPATH, "/html/body").text.lower()
+            if "account locked" in body:
+                raise RuntimeError("Account Locked. Please try again in 30 minutes.")
+            if "failed" in body:
+                raise RuntimeError("Sign in failed.")
+        self.logged_in = True
+        save_cookies(self.cookies_path, driver.get_cookies())
+
+    def ensure_logged_in(self) -> bool:
+        """Restore the saved session cookies, logging in only if there are none or they have expired.
+
+        Returns:
+            bool: True if the session was restored from saved cookies, False if it logged in
+        """
+        if self.logged_in:
+            return True
+        self.start()
+        cookies = load_cookies(self.cookies_path)
+        if cookies is None:
+            self.login()
+            return False
+        _logger.info("Reusing saved session cookies.")
+        # cookies can only be added for the domain of the current page
+        self.driver.get(HOME_URL)
+        for cookie in cookies:
+            self.driver.add_cookie(cookie)
+        self.logged_in = True
+        return True
+
+    def run_screen(self, screener_url: str, screen_id: str, download_dir: Path, timeout_in_sec: float) -> Path:
+        """Run a saved screen and download its CSV export.
+
+        Args:
+            screener_url (str): the screener page holding the saved screen.
+            screen_id (str): the saved screen's id.
+            download_dir (Path): an empty directory dedicated to this download.
+            timeout_in_sec (float): how long to wait for the download.
+
+        Raises:
+            RuntimeError: if logging in or downloading fails
+
+        Returns:
+            Path: path to the downloaded csv file
+        """
+        from selenium.common.exceptions import TimeoutException
+
+        with self._lock:
+            restored = self.ensure_logged_in()
+            self.driver.execute_cdp_cmd(
+                "Page.setDownloadBehavior", {"behavior": "allow", "downloadPath": str(download_dir)}
+            )
+            try:
+                self._click_run_and_csv(screener_url, screen_id)
+            except TimeoutException:
+                if not restored:
+                    raise
+                # the server no longer accepts the saved session
+                _logger.info("Saved session was rejected.")
+                self.login()
+                self._click_run_and_csv(screener_url, screen_id)
+            with self.recorder.span("csv_wait"):
+                path = downloads.wait_for_download(download_dir, timeout_in_sec)
+            save_cookies(self.cookies_path, self.driver.get_cookies())
+            return path
+
+    def _click_run_and_csv(self, screener_url: str, screen_id: str) -> None:
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.webdriver.support.wait import WebDriverWait
+
+        driver = self.driver
+        with self.recorder.span("screener_load", screener_url=screener_url):
+            _logger.info(f"Switching to {screener_url}.")
+            driver.get(screener_url)
+
+            _logger.info("Switching to screenerContent iframe.")
+            iframe = driver.find_element(By.ID, "screenerContent")
+            driver.switch_to.frame(iframe)
+
+            _logger.info("Getting my-screen-tab")
+            my_screen_button = driver.find_element(By.ID, "my-screen-tab")
+            my_screen_button.send_keys(" ")
+
+            run_button = WebDriverWait(driver, ELEMENT_TIMEOUT_IN_SEC).until(
+                EC.presence_of_element_located((By.ID, f"btn_run_{screen_id}"))
+            )
+
+        with self.recorder.span("run_screen", screen_id=screen_id):
+            run_button.click()
+
+            _logger.info("Getting CSV.")
+            csv_button = WebDriverWait(driver, ELEMENT_TIMEOUT_IN_SEC).until(
+                EC.presence_of_element_located((By.XPATH, CSV_BUTTON_XPATH))
+            )
+            csv_button.click()
+        driver.switch_to.default_content()
+
+
+_browsers: Dict[Tuple[str, Path, bool, str, Optional[str]], ZacksBrowser] = {}
+_browsers_lock = threading.Lock()
+
+
+def get_browser(user: str, password: str, headless: bool = True, cache_dir: Optional[Path] = None,
+                chromedriver_version: str = CHROMEDRIVER_VERSION, debugger_address: Optional[str] = None,
+                recorder: Optional[metrics.Recorder] = None) -> ZacksBrowser:
+    """Reuse one warm browser per account, cache directory and browser settings for the lifetime of the process.
+
+    A browser started with other settings for the same account and cache directory is closed first,
+    since both would use the same Chrome profile.
+    """
+    cache_dir = Path(cache_dir or DEFAULT_CACHE_DIR).expanduser()
+    key = (user, cache_dir, headless, chromedriver_version, debugger_address)
+    with _browsers_lock:
+        browser: Optional[ZacksBrowser] = _browsers.get(key)
+        if browser is None or browser.password != password:
+            for other in [other for other in _browsers if other[:2] == key[:2]]:
+                _browsers.pop(other).close()
+            browser = _browsers[key] = ZacksBrowser(user, password, headless, cache_dir, chromedriver_version,
+                                                    debugger_address)
+        if recorder is not None:
+            browser.recorder = recorder
+        return browser
+
+
+@atexit.register
+def close_browsers() -> None:
+    """Quit every warm browser, saving their session cookies."""
+    with _browsers_lock:
+        for browser in _browsers.values():
+            browser.close()
+        _browsers.clear()
@@ -0,0 +1,108 @@
+"""A content-addressed on-disk cache of processed frames and their workbooks.
+
+Layout:
+    <root>/<key>/frame.pkl
+    <root>/<key>/workbook.xlsx
+
+An entry's directory modification time is its last use, and the least recently used entries are
+evicted once the cache grows beyond its size bound.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import pandas as pd
+
+from mypackage import __version__
+
+_logger = logging.getLogger("USA Model")
+
+FRAME = "frame.pkl"
+WORKBOOK = "workbook.xlsx"
+
+
+@dataclass
+class CachedResult:
+    frame: pd.DataFrame
+    workbook: Path
+
+
+class ResultCache:
+    def __init__(self, root: Path, max_bytes: int) -> None:
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def key(input_bytes: bytes, model_definition: Dict[str, Any]) -> str:
+        """Hash the input bytes together with the model definition and the package and pandas versions."""
+        digest = hashlib.sha256(input_bytes)
+        digest.update(json.dumps(model_definition, sort_keys=True, default=str).encode("utf-8"))
+        digest.update(f"{__version__}|{pd.__version__}".encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, key: str, workbook: Path) -> Optional[CachedResult]:
+        """Load a cached frame and copy its workbook to ``workbook``.
+
+        Args:
+            key (str): the entry's key.
+            workbook (Path): where to copy the cached workbook.
+
+        Returns:
+            Optional[CachedResult]: the cached result, or None on a miss
+        """
+        entry = self.root / key
+        try:
+            os.utime(entry)  # mark as recently used
+            frame = pd.read_pickle(entry / FRAME)
+            shutil.copyfile(entry / WORKBOOK, workbook)
+        except FileNotFoundError:
+            # never cached, or another process evicted it meanwhile
+            return None
+        return CachedResult(frame=frame, workbook=Path(workbook))
+
+    def put(self, key: str, frame: pd.DataFrame, workbook: Path) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        entry = self.root / key
+        tmp = Path(tempfile.mkdtemp(prefix=".tmp-", dir=self.root))
+        try:
+            frame.to_pickle(tmp / FRAME)
+            shutil.copyfile(workbook, tmp / WORKBOOK)
+            try:
+                # one atomic rename, so readers and concurrent writers never see a partial entry
+                os.rename(tmp, entry)
+            except OSError:
+                if not entry.exists():
+                    raise
+                # another process cached the same key first, and equal keys hold equal results
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+        self.evict()
+
+    def evict(self) -> None:
+        """Remove the least recently used entries until the cache fits in ``max_bytes``."""
+        sizes: Dict[Path, int] = {}
+        last_used: Dict[Path, float] = {}
+        for p in self.root.iterdir():
+            if not p.is_dir() or p.name.startswith("."):
+                continue
+            try:
+                sizes[p] = sum(f.stat().st_size for f in p.iterdir())
+                last_used[p] = p.stat().st_mtime
+            except FileNotFoundError:
+                # another process evicted it meanwhile
+                sizes.pop(p, None)
+        total = sum(sizes.values())
+        for entry in sorted(sizes, key=last_used.__getitem__):
+            if total <= self.max_bytes:
+                break
+            _logger.info(f"Evicting cached result {entry.name}")
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= sizes[entry]
@@ -0,0 +1,45 @@
+"""Score the exports of several models and save them as the sheets of one workbook.
+
+Usage:
+    python -m mypackage.combine --exports "{USA: usa.csv, ETF: etf.csv}" --output Models.xlsx --workers 2
+"""
+from __future__ import annotations
+
+import logging
+from pathlib import Path
+from typing import Dict, Optional
+
+from jsonargparse import CLI
+
+from mypackage.main import MODELS, PipelineConfig, save_workbook
+
+_logger = logging.getLogger("USA Model")
+
+
+def combine(exports: Dict[str, Path], output: Path, workers: Optional[int] = None,
+            store_dir: Optional[str] = None) -> Path:
+    """Score each export with its model and save every result as a sheet named after the model.
+
+    Args:
+        exports (Dict[str, Path]): the CSV export of each model, by model name (USA/ETF), in sheet order.
+        output (Path): where to save the workbook.
+        workers (Optional[int]): the number of processes styling the sheets. Defaults to one per sheet,
+            up to the number of CPUs.
+        store_dir (Optional[str]): also persist every snapshot to this snapshot store.
+
+    Returns:
+        Path: path to the saved workbook
+    """
+    unknown = [model for model in exports if model not in MODELS]
+    if unknown:
+        raise ValueError(f"Unknown models {unknown}, expected some of {list(MODELS)}")
+    cfg = PipelineConfig(user="", password="", excel_backend="xlsxwriter", store_dir=store_dir)
+    sheets = {}
+    for model, export in exports.items():
+        pipeline = MODELS[model](cfg)
+        sheets[model] = (pipeline, pipeline.process(Path(export)))
+    return save_workbook(sheets, Path(output), workers=workers)
+
+
+if __name__ == "__main__":
+    CLI(combine, as_positional=False)
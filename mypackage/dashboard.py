@@ -0,0 +1,75 @@
+"""Weekly dashboard updates: add the new snapshot as a sheet of the previous dashboard.
+
+Usage:
+    python -m mypackage.dashboard --csv "Data 08-01-2025.csv" --model USA --previous "Dashboard 01-01-2025.xlsx"
+"""
+from __future__ import annotations
+
+import io
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from jsonargparse import CLI
+
+from mypackage import workbook
+from mypackage.main import MODELS, PipelineConfig
+
+_logger = logging.getLogger("USA Model")
+
+DATE_FORMAT = "%d-%m-%Y"
+
+
+def update_dashboard(
+    csv: Path,
+    model: str,
+    previous: Optional[Path] = None,
+    output_dir: Optional[Path] = None,
+    snapshot_date: Optional[str] = None,
+    store_dir: Optional[str] = None,
+) -> Path:
+    """Score a new snapshot and save it as a new sheet of the previous dashboard.
+
+    Only the new snapshot is scored and rendered. The previous dashboard's sheets are copied into
+    the new file unchanged, so the update time does not grow with the number of past weeks.
+
+    Args:
+        csv (Path): the new CSV export.
+        model (str): the model name, one of the keys of ``MODELS`` (USA/ETF).
+        previous (Optional[Path]): the previous dashboard. Starts a new dashboard when omitted.
+        output_dir (Optional[Path]): where to save the new dashboard. Defaults to the previous
+            dashboard's directory, or the working directory.
+        snapshot_date (Optional[str]): the snapshot date as DD-MM-YYYY, used as the sheet name
+            and in the file name. Defaults to today.
+        store_dir (Optional[str]): also persist the snapshot to this snapshot store.
+
+    Returns:
+        Path: path to the new dashboard
+    """
+    snapshot_date = snapshot_date or datetime.now().strftime(DATE_FORMAT)
+    snapshot_day = datetime.strptime(snapshot_date, DATE_FORMAT).date()  # validate
+    if output_dir is None:
+        output_dir = Path(previous).parent if previous is not None else Path(".")
+    output_path = Path(output_dir) / f"Dashboard {snapshot_date}.xlsx"
+    if previous is not None and Path(previous).resolve() == output_path.resolve():
+        raise ValueError(f"The dashboard for {snapshot_date} is the previous dashboard {previous}")
+    if previous is not None and snapshot_date in workbook.sheet_names(previous):
+        raise ValueError(f"{previous} already holds the {snapshot_date} snapshot")
+
+    pipeline = MODELS[model](PipelineConfig(user="", password="", store_dir=store_dir))
+    processed = pipeline.process(csv, snapshot_day)
+
+    _logger.info(f"Saving dashboard to: {output_path}")
+    if previous is None:
+        pipeline.write_xlsx(processed, output_path, sheet_name=snapshot_date)
+    else:
+        sheet = io.BytesIO()
+        pipeline.write_xlsx(processed, sheet, sheet_name=snapshot_date)
+        workbook.append_sheets(previous, [(snapshot_date, workbook.read_sheet_part(sheet))], output_path)
+    _logger.info(f'Dashboard "{output_path}" Saved.')
+    return output_path
+
+
+if __name__ == "__main__":
+    CLI(update_dashboard, as_positional=False)
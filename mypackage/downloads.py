@@ -0,0 +1,132 @@
+"""Wait for browser downloads with filesystem events instead of polling the working directory."""
+from __future__ import annotations
+
+import importlib.util
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+_logger = logging.getLogger("USA Model")
+
+HAS_WATCHDOG = importlib.util.find_spec("watchdog") is not None
+
+# suffixes of files a browser is still writing
+PARTIAL_SUFFIXES = (".crdownload", ".part", ".tmp")
+POLL_INTERVAL_IN_SEC = 0.05
+
+
+@contextmanager
+def new_download_dir(base_dir: Optional[Path] = None) -> Iterator[Path]:
+    """An empty directory dedicated to a single download run, removed with its contents on exit.
+
+    Keep the downloaded file with ``keep_download`` before leaving the block.
+
+    Args:
+        base_dir (Optional[Path]): where to create the directory. Defaults to the working directory.
+    """
+    base_dir = Path(base_dir or ".")
+    base_dir.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory(prefix="zacks-download-", dir=base_dir) as directory:
+        yield Path(directory)
+
+
+def keep_download(path: Path, name: Optional[str] = None) -> Path:
+    """Move a downloaded file out of its run's directory into the base directory, replacing any file of that name.
+
+    Args:
+        path (Path): the file in a directory made by ``new_download_dir``.
+        name (Optional[str]): the file's new name. Defaults to the name the browser gave it.
+
+    Returns:
+        Path: the file's new path
+    """
+    kept = path.parent.parent / (name or path.name)
+    os.replace(path, kept)
+    return kept
+
+
+def completed_download(directory: Path, suffix: str = ".csv") -> Optional[Path]:
+    """The newest finished download in ``directory``, or None while any download is still being written."""
+    finished = []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.name.endswith(PARTIAL_SUFFIXES):
+                return None
+            if entry.name.endswith(suffix) and entry.is_file():
+                finished.append(entry)
+    if not finished:
+        return None
+    return Path(max(finished, key=lambda e: e.stat().st_mtime_ns).path)
+
+
+def wait_for_download(directory: Path, timeout_in_sec: float, suffix: str = ".csv",
+                      use_events: Optional[bool] = None) -> Path:
+    """Block until a browser finishes saving a file into ``directory``.
+
+    The browser first writes ``<name>.crdownload`` and renames it once complete, so a file only
+    counts once it has its final name and no partial files are left.
+
+    Args:
+        directory (Path): the run's dedicated download directory.
+        timeout_in_sec (float): how long to wait.
+        suffix (str): the suffix of the expected file.
+        use_events (Optional[bool]): watch filesystem events with watchdog (inotify, FSEvents or
+            ReadDirectoryChangesW). Defaults to True when watchdog is installed, else polls.
+
+    Raises:
+        RuntimeError: if no download completes within ``timeout_in_sec``
+
+    Returns:
+        Path: path to the downloaded file
+    """
+    if use_events is None:
+        use_events = HAS_WATCHDOG
+    deadline = time.monotonic() + timeout_in_sec
+    if use_events:
+        path = _wait_with_events(Path(directory), deadline, suffix)
+    else:
+        path = _wait_with_polling(Path(directory), deadline, suffix)
+    if path is None:
+        raise RuntimeError(f"Timed out after {timeout_in_sec}s waiting for a download in {directory}.")
+    _logger.info(f"Got file {path}.")
+    return path
+
+
+def _wait_with_polling(directory: Path, deadline: float, suffix: str) -> Optional[Path]:
+    while True:
+        path = completed_download(directory, suffix)
+        if path is not None or time.monotonic() >= deadline:
+            return path
+        time.sleep(POLL_INTERVAL_IN_SEC)
+
+
+def _wait_with_events(directory: Path, deadline: float, suffix: str) -> Optional[Path]:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+
+    changed = threading.Event()
+
+    class Handler(FileSystemEventHandler):
+        def on_any_event(self, event):
+            changed.set()
+
+    observer = Observer()
+    observer.schedule(Handler(), str(directory), recursive=False)
+    observer.start()
+    try:
+        while True:
+            # check after subscribing, so a file finished before the observer started is not missed
+            changed.clear()
+            path = completed_download(directory, suffix)
+            remaining = deadline - time.monotonic()
+            if path is not None or remaining <= 0:
+                return path
+            changed.wait(remaining)
+    finally:
+        observer.stop()
+        observer.join()
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+INT_DTYPES = (np.int8, np.int16, np.int32, np.int64)
+
+# Zacks style scores, best first; declare a column as GRADE to read it as GRADE_DTYPE
+GRADES = ["A", "B", "C", "D", "F"]
+GRADE = "grade"
+GRADE_DTYPE = pd.CategoricalDtype(GRADES, ordered=True)
+
+
+def narrowest_int(values: np.ndarray):
+    """The narrowest signed integer dtype that holds every value, or None for an empty array."""
+    if values.size == 0:
+        return None
+    lo, hi = values.min(), values.max()
+    for dtype in INT_DTYPES:
+        info = np.iinfo(dtype)
+        if info.min <= lo and hi <= info.max:
+            return dtype
+    return None
+
+
+def compact_series(series: pd.Series) -> pd.Series:
+    """Cast a numeric series to the narrowest dtype that represents every value exactly.
+
+    Whole numbers without missing values become the narrowest signed integer dtype, other floats
+    become float32 when that round-trips without loss. Anything else is returned unchanged.
+    """
+    if pd.api.types.is_integer_dtype(series) and not pd.api.types.is_extension_array_dtype(series):
+        dtype = narrowest_int(series.to_numpy())
+        return series.astype(dtype) if dtype is not None else series
+    if not pd.api.types.is_float_dtype(series) or pd.api.types.is_extension_array_dtype(series):
+        return series
+    values = series.to_numpy()
+    finite = np.isfinite(values)
+    if finite.all() and np.array_equal(values, np.round(values)):
+        dtype = narrowest_int(values)
+        if dtype is not None:
+            return series.astype(dtype)
+    as_float32 = values.astype(np.float32)
+    if np.array_equal(as_float32.astype(values.dtype), values, equal_nan=True):
+        return series.astype(np.float32)
+    return series
+
+
+def to_grades(series: pd.Series) -> pd.Series:
+    """Map A-F letter grades to ``GRADE_DTYPE``, an ordered categorical holding one int8 code per row.
+
+    Raises:
+        ValueError: if the series holds anything but the grades and missing values.
+    """
+    grades = series.astype(GRADE_DTYPE)
+    unknown = grades.isna() & series.notna()
+    if unknown.any():
+        # the pyarrow parser reads empty fields as "" rather than missing
+        values = set(series[unknown].astype(object)) - {""}
+        if values:
+            raise ValueError(f"{series.name!r} holds values that are not grades: {sorted(values)}")
+    return grades
+
+
+def compact(df: pd.DataFrame) -> pd.DataFrame:
+    """Apply ``compact_series`` to every column of a frame."""
+    compacted = df.copy(deep=False)
+    for col in compacted.columns:
+        compacted[col] = compact_series(compacted[col])
+    return compacted
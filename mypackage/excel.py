@@ -0,0 +1,87 @@
+"""A fast xlsx writer that reproduces the StyleFrame look with per-column formats."""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import IO, Dict, Union
+
+import pandas as pd
+
+# StyleFrame's best_fit width: (len(longest_value_in_column) + A_FACTOR) * P_FACTOR
+A_FACTOR = 13
+P_FACTOR = 1.3
+
+# Calibri 11's max digit width, which Excel uses to convert character widths to pixels
+MAX_DIGIT_WIDTH_IN_PIXELS = 7
+ROWS_PER_CHUNK = 10_000
+
+
+def best_fit_widths(df: pd.DataFrame) -> Dict[str, float]:
+    """Compute the StyleFrame ``best_fit`` column widths with vectorized string lengths."""
+    return {col: (df[col].astype(str).str.len().max() + A_FACTOR) * P_FACTOR for col in df.columns}
+
+
+def write_styled_xlsx(
+    df: pd.DataFrame,
+    output: Union[Path, IO[bytes]],
+    column_fills: Dict[str, str],
+    header_fills: Dict[str, str],
+    freeze_panes: str,
+    font: str = "Calibri",
+    font_size: int = 12,
+    sheet_name: str = "Sheet1",
+    constant_memory: bool = True,
+) -> None:
+    """Write a frame as a styled sheet, one format per column instead of per cell.
+
+    Args:
+        df (pd.DataFrame): the frame to write. The index is not written.
+        output (Union[Path, IO[bytes]]): a path or a binary file-like object.
+        column_fills (Dict[str, str]): the background color of each column, header included.
+        header_fills (Dict[str, str]): header background colors that override ``column_fills``.
+        freeze_panes (str): the top-left unfrozen cell, e.g. "E2".
+        font (str): the font name.
+        font_size (int): the font size.
+        sheet_name (str): the sheet name.
+        constant_memory (bool): flush every row to disk as it is written.
+    """
+    import xlsxwriter
+
+    options = {"constant_memory": constant_memory, "in_memory": not constant_memory}
+    with xlsxwriter.Workbook(output, options) as workbook:
+        worksheet = workbook.add_worksheet(sheet_name)
+        formats: Dict[str, xlsxwriter.format.Format] = {}
+
+        def get_format(bg_color: str) -> xlsxwriter.format.Format:
+            if bg_color not in formats:
+                formats[bg_color] = workbook.add_format({
+                    "font_name": font,
+                    "font_size": font_size,
+                    "bg_color": bg_color,
+                    "pattern": 1,
+                    "border": 1,
+                    "align": "center",
+                    "valign": "vcenter",
+                    "shrink": True,
+                })
+            return formats[bg_color]
+
+        widths = best_fit_widths(df)
+        for j, col in enumerate(df.columns):
+            fill = column_fills.get(col)
+            # openpyxl stores the width as-is, so set the same width in pixels rather than characters
+            pixels = round(widths[col] * MAX_DIGIT_WIDTH_IN_PIXELS)
+            worksheet.set_column_pixels(j, j, pixels, get_format(fill) if fill else None)
+            header_fill = header_fills.get(col, fill)
+            worksheet.write_string(0, j, str(col), get_format(header_fill) if header_fill else None)
+
+        row = 1
+        for start in range(0, len(df), ROWS_PER_CHUNK):
+            chunk = df.iloc[start:start + ROWS_PER_CHUNK]
+            # missing values are left blank, like pandas' to_excel
+            values = chunk.astype(object).where(chunk.notna(), None).to_numpy()
+            for record in values:
+                worksheet.write_row(row, 0, record)
+                row += 1
+
+        worksheet.freeze_panes(freeze_panes)
+        worksheet.autofilter(0, 0, 0, len(df.columns) - 1)
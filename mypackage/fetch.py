@@ -0,0 +1,116 @@
+"""Fetch screen exports over HTTP with a pooled, authenticated requests session, without a browser."""
+from __future__ import annotations
+
+import logging
+import threading
+from typing import Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+_logger = logging.getLogger("USA Model")
+
+POOL_SIZE = 8
+REQUEST_TIMEOUT_IN_SEC = 30
+
+
+class ZacksSession:
+    """A logged-in HTTP session that downloads saved screens' CSV exports into memory.
+
+    Args:
+        user (str): the account user name.
+        password (str): the account password.
+        login_url (str): the URL the login form posts to.
+        export_url (str): the URL behind a screen's CSV button, with a ``{screen_id}`` placeholder.
+        user_field (str): the login form's user name field.
+        password_field (str): the login form's password field.
+    """
+
+    def __init__(self, user: str, password: str, login_url: str, export_url: str,
+                 user_field: str = "username", password_field: str = "password") -> None:
+        self.user = user
+        self.password = password
+        self.login_url = login_url
+        self.export_url = export_url
+        self.user_field = user_field
+        self.password_field = password_field
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE,
+                              max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=(502, 503, 504)))
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.logged_in = False
+        self._lock = threading.Lock()
+
+    def login(self) -> None:
+        """Log in and keep the authentication cookies in the session.
+
+        Raises:
+            RuntimeError: if the account is locked or signing in fails
+        """
+        _logger.info("Logging in.")
+        response = self.session.post(
+            self.login_url,
+            data={self.user_field: self.user, self.password_field: self.password},
+            timeout=REQUEST_TIMEOUT_IN_SEC,
+        )
+        response.raise_for_status()
+        body = response.text.lower()
+        if "account locked" in body:
+            raise RuntimeError("Account Locked. Please try again in 30 minutes.")
+        if "failed" in body:
+            raise RuntimeError("Sign in failed.")
+        self.logged_in = True
+
+    def fetch_csv(self, screen_id: str) -> bytes:
+        """Download a saved screen's CSV export, logging in first if needed.
+
+        Args:
+            screen_id (str): the saved screen's id.
+
+        Raises:
+            RuntimeError: if the export is still not a CSV after logging in again
+
+        Returns:
+            bytes: the CSV export
+        """
+        with self._lock:
+            if not self.logged_in:
+                self.login()
+        response = self._get_export(screen_id)
+        if not _is_csv(response):
+            # the session expired and we were served the login page
+            with self._lock:
+                self.login()
+            response = self._get_export(screen_id)
+            if not _is_csv(response):
+                content_type = response.headers.get("Content-Type")
+                raise RuntimeError(f"Expected a CSV export for screen {screen_id}, got {content_type}")
+        _logger.info(f"Got {len(response.content)} bytes for screen {screen_id}.")
+        return response.content
+
+    def _get_export(self, screen_id: str) -> requests.Response:
+        response = self.session.get(self.export_url.format(screen_id=screen_id), timeout=REQUEST_TIMEOUT_IN_SEC)
+        response.raise_for_status()
+        return response
+
+
+def _is_csv(response: requests.Response) -> bool:
+    content_type = response.headers.get("Content-Type", "").lower()
+    return "html" not in content_type and not response.content.lstrip().startswith(b"<")
+
+
+_sessions: Dict[Tuple[str, str, str], ZacksSession] = {}
+_sessions_lock = threading.Lock()
+
+
+def get_session(user: str, password: str, login_url: str, export_url: str, user_field: str = "username",
+                password_field: str = "password") -> ZacksSession:
+    """Reuse one logged-in session per account and site for the lifetime of the process."""
+    key = (user, login_url, export_url)
+    with _sessions_lock:
+        session: Optional[ZacksSession] = _sessions.get(key)
+        if session is None or session.password != password:
+            session = _sessions[key] = ZacksSession(user, password, login_url, export_url, user_field, password_field)
+        return session
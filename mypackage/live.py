@@ -0,0 +1,209 @@
+"""Keep a processed frame up to date as a few tickers change, without re-ranking every row.
+
+Every ranked column keeps its (value, row) pairs in a sorted list. When one value moves from
+``a`` to ``b`` only the rows valued between ``a`` and ``b`` change rank, each by one, so an update
+costs O(log n) plus the number of ranks that really change::
+
+    live = LiveScores(pipeline, pipeline.read_csv_and_process("morning.csv"))
+    live.update(pipeline.read_csv("refresh.csv"))  # new export rows for a handful of tickers
+    live.frame  # identical to scoring the whole updated export again
+"""
+from __future__ import annotations
+
+import math
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Set
+
+import numpy as np
+import pandas as pd
+from sortedcontainers import SortedList
+
+from mypackage import dtypes
+from mypackage.ranking import rank_min
+
+if TYPE_CHECKING:
+    from mypackage.main import AbstractModelPipeline
+
+# above this many changed values a column is re-ranked at once rather than value by value
+RERANK_BATCH = 64
+
+
+class RankIndex:
+    """The ``Series.rank(method="min")`` ranks of one column, updated as some of its values change.
+
+    Args:
+        keys (np.ndarray): the column as floats, NaN where missing (see ``ranking.to_rank_keys``).
+        ascending (bool): the rank direction.
+    """
+
+    def __init__(self, keys: np.ndarray, ascending: bool = True) -> None:
+        self.sign = 1.0 if ascending else -1.0
+        self.keys = np.asarray(keys, dtype=np.float64) * self.sign
+        rows = np.flatnonzero(~np.isnan(self.keys))
+        self._sorted = SortedList(zip(self.keys[rows].tolist(), rows.tolist()))
+        self.ranks = self._rank_all()
+
+    def _rank_all(self) -> np.ndarray:
+        return rank_min(self.keys[:, None], [True])[:, 0]
+
+    def _move(self, row: int, old: float, new: float) -> None:
+        if not np.isnan(old):
+            self._sorted.remove((old, row))
+        if not np.isnan(new):
+            self._sorted.add((new, row))
+        self.keys[row] = new
+
+    def _update_one(self, row: int, old: float, new: float) -> List[int]:
+        self._move(row, old, new)
+        # the others keyed above the old value lose one, those above the new value gain one
+        low, high, shift = (old, new, -1.0) if np.isnan(new) or (not np.isnan(old) and old < new) else (new, old, 1.0)
+        start = self._sorted.bisect_left((low, math.inf))
+        stop = len(self._sorted) if np.isnan(high) else self._sorted.bisect_left((high, math.inf))
+        affected = [other for _, other in self._sorted.islice(start, stop) if other != row]
+        self.ranks[affected] += shift
+        self.ranks[row] = np.nan if np.isnan(new) else self._sorted.bisect_left((new, -1)) + 1.0
+        affected.append(row)
+        return affected
+
+    def update(self, rows: np.ndarray, keys: np.ndarray) -> Set[int]:
+        """Change the values of ``rows`` and return every row whose rank changed.
+
+        A few changes shift the ranks in between their old and new values one at a time. Past
+        ``RERANK_BATCH`` changes the whole column is re-ranked at once, which is cheaper by then.
+
+        Args:
+            rows (np.ndarray): the distinct row positions.
+            keys (np.ndarray): their new values, NaN when missing.
+
+        Returns:
+            Set[int]: the rows whose rank changed
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        new = np.asarray(keys, dtype=np.float64) * self.sign
+        old = self.keys[rows]
+        moved = ~((old == new) | (np.isnan(old) & np.isnan(new)))
+        rows, old, new = rows[moved].tolist(), old[moved].tolist(), new[moved].tolist()
+        if len(rows) <= RERANK_BATCH:
+            affected: Set[int] = set()
+            for row, old_key, new_key in zip(rows, old, new):
+                affected.update(self._update_one(row, old_key, new_key))
+            return affected
+        for row, old_key, new_key in zip(rows, old, new):
+            self._move(row, old_key, new_key)
+        before, self.ranks = self.ranks, self._rank_all()
+        return set(np.flatnonzero(~((before == self.ranks) | (np.isnan(before) & np.isnan(self.ranks)))).tolist())
+
+
+class LiveScores:
+    """A processed frame whose scores and totals follow ticker updates incrementally.
+
+    Args:
+        pipeline (AbstractModelPipeline): the model that processed the frame.
+        processed (pd.DataFrame): the output of ``pipeline.read_csv_and_process``.
+    """
+
+    def __init__(self, pipeline: AbstractModelPipeline, processed: pd.DataFrame) -> None:
+        self.pipeline = pipeline
+        frame = processed.reset_index(drop=True)
+        # updates can push values, ranks and totals past the compact dtypes of the full run, so they are
+        # kept as float64 and narrowed again by ``frame``
+        self._narrowed = [
+            col for col in pipeline.data_columns + pipeline.score_columns + pipeline.calculated_columns
+            if pd.api.types.is_numeric_dtype(frame[col])
+        ]
+        self._frame = frame.astype({col: np.float64 for col in self._narrowed})
+        self._typed: Optional[pd.DataFrame] = None
+        self.positions: Dict[str, int] = {ticker: i for i, ticker in enumerate(self._frame["Ticker"])}
+        ascending = dict.fromkeys(pipeline.rank_ascend, True) | dict.fromkeys(pipeline.rank_descend, False)
+        self._indexes: Dict[str, RankIndex] = {
+            col: RankIndex(self._keys(self._frame[col]), ascending[col]) for col in pipeline.data_columns
+        }
+        # an empty update indexes the ranked totals while they still match the frame
+        pipeline.update_totals(self, set())
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        """The processed frame, with the dtypes a full run of the updated export gives it."""
+        if self._typed is None:
+            narrowed = {col: dtypes.compact_series(self._frame[col]) for col in self._narrowed}
+            self._typed = self._frame.assign(**narrowed)
+        return self._typed
+
+    @staticmethod
+    def _keys(values: pd.Series) -> np.ndarray:
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            if not values.cat.ordered:
+                raise TypeError(f"{values.name!r} is not ordered, so it cannot be ranked incrementally")
+            codes = values.cat.codes.to_numpy()
+            return np.where(codes < 0, np.nan, codes).astype(np.float64)
+        return values.to_numpy(dtype=np.float64, na_value=np.nan)
+
+    def update(self, changes: pd.DataFrame) -> np.ndarray:
+        """Apply new export rows for tickers already in the frame.
+
+        Args:
+            changes (pd.DataFrame): rows of an export, typed like ``pipeline.read_csv`` returns them.
+
+        Raises:
+            KeyError: if a ticker is not in the frame; new or removed tickers need a full run.
+
+        Returns:
+            np.ndarray: the sorted positions of the rows whose scores or totals changed
+        """
+        pipeline = self.pipeline
+        self._typed = None
+        # the latest row of a ticker wins
+        changes = changes.drop_duplicates("Ticker", keep="last").reset_index(drop=True)
+        changes = pipeline.prepare(changes.copy())
+        missing = [ticker for ticker in changes["Ticker"] if ticker not in self.positions]
+        if missing:
+            raise KeyError(f"Tickers {missing} are not in the frame, score the whole export instead")
+        rows = np.array([self.positions[ticker] for ticker in changes["Ticker"]], dtype=np.int64)
+        for col in pipeline.header_cols + pipeline.data_columns:
+            if col != "Index":
+                self._frame.loc[rows, col] = changes[col].to_numpy()
+
+        rescored: Set[int] = set()
+        for col, score_col in zip(pipeline.data_columns, pipeline.score_columns):
+            index = self._indexes[col]
+            affected = index.update(rows, self._keys(changes[col]))
+            if affected:
+                affected_rows = np.fromiter(affected, dtype=np.int64)
+                self._frame.loc[affected_rows, score_col] = index.ranks[affected_rows] - 1
+                rescored |= affected
+        changed = pipeline.update_totals(self, rescored)
+        return np.array(sorted(rescored | changed), dtype=np.int64)
+
+    def set_sum(self, target: str, columns: List[str], rows: Iterable[int]) -> Set[int]:
+        """Recompute ``target`` as the sum of ``columns`` for ``rows``, returning the rows whose value changed."""
+        return self._set(target, rows, lambda positions: self._frame.loc[positions, columns].sum(axis=1))
+
+    def set_difference(self, target: str, left: str, right: str, rows: Iterable[int]) -> Set[int]:
+        """Recompute ``target`` as ``left - right`` for ``rows``, returning the rows whose value changed."""
+        frame = self._frame
+        return self._set(target, rows, lambda positions: frame.loc[positions, left] - frame.loc[positions, right])
+
+    def set_rank(self, target: str, source: str, rows: Iterable[int], ascending: bool = True,
+                 offset: float = 0.0) -> Set[int]:
+        """Re-rank ``source`` after its ``rows`` changed and store ``rank + offset`` as ``target``.
+
+        Returns:
+            Set[int]: every row whose rank changed
+        """
+        index = self._indexes.get(source)
+        if index is None:
+            index = self._indexes[source] = RankIndex(self._keys(self._frame[source]), ascending)
+        positions = np.fromiter(rows, dtype=np.int64)
+        affected = index.update(positions, self._keys(self._frame[source].iloc[positions]))
+        if affected:
+            positions = np.fromiter(affected, dtype=np.int64)
+            self._frame.loc[positions, target] = index.ranks[positions] + offset
+        return affected
+
+    def _set(self, target: str, rows: Iterable[int], compute) -> Set[int]:
+        positions = np.fromiter(rows, dtype=np.int64)
+        if not len(positions):
+            return set()
+        values = compute(positions).to_numpy(dtype=np.float64)
+        old = self._frame.loc[positions, target].to_numpy(dtype=np.float64)
+        self._frame.loc[positions, target] = values
+        return set(positions[(values != old) & ~(np.isnan(values) & np.isnan(old))].tolist())
@@ -1,24 +1,29 @@
 from __future__ import annotations
 
-import glob
+import copy
+import functools
+import io
 import logging
 import os
-import time
+import sys
 import tkinter as tk
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import date, datetime
 from pathlib import Path
-from tkinter import filedialog, messagebox
-from typing import List
+from tkinter import filedialog, messagebox, scrolledtext, ttk
+from typing import IO, TYPE_CHECKING, Any, Callable, ContextManager, Dict, List, Optional, Set, Tuple, Union
 
-import pandas as pd
-import rootutils
-import styleframe
-from jsonargparse import CLI, ArgumentParser
-from styleframe import StyleFrame, Styler
+from mypackage import __version__, downloads, utils
 
-from mypackage import __version__, utils
+if TYPE_CHECKING:
+    # pandas, styleframe and the scoring modules are imported by the stages that need them,
+    # so the CLI and the GUI shell start without them
+    import pandas as pd
+
+    from mypackage.live import LiveScores
+    from mypackage.metrics import Span
+    from mypackage.ranking import RankCache
 
 _logger = logging.getLogger("USA Model")
 logging.basicConfig(
@@ -29,65 +34,650 @@ logging.basicConfig(
 )
 
 
+# the built-in formats of ``sinks.SINKS``, named here so that configs are checked without importing pyarrow
+OUTPUT_FORMATS = ("parquet", "arrow", "csv")
+
+WHITE = "#ffffff"
+ODD_PAIR_FILL = "#ffe28a"
+EVEN_PAIR_FILL = "#d6ffba"
+
+
+def _group_by_value(mapping: Dict[str, str]) -> Dict[str, List[str]]:
+    groups: Dict[str, List[str]] = {}
+    for key, value in mapping.items():
+        groups.setdefault(value, []).append(key)
+    return groups
+
+
 @dataclass
 class PipelineConfig:
     user: str
     password: str
     headless: bool = True
     download_timeout_in_sec: int = 60
+    download_dir: Optional[str] = None
+    fetch_mode: str = "browser"  # or "http"
+    login_url: str = "https://www.zacks.com/my_account/welcomeback.php"
+    # the URL behind a screen's CSV button, with a {screen_id} placeholder
+    export_url: Optional[str] = None
+    login_user_field: str = "username"
+    login_password_field: str = "password"
+    excel_backend: str = "styleframe"  # or "xlsxwriter"
+    store_dir: Optional[str] = None
+    cache_dir: Optional[str] = None
+    cache_max_bytes: int = 2**30
+    # where the chromedriver binary, Chrome profile and session cookies are kept
+    browser_cache_dir: Optional[str] = None
+    chromedriver_version: str = "114.0.5735.16"
+    # attach to a running Chrome started with --remote-debugging-port, e.g. "127.0.0.1:9222"
+    browser_debugger_address: Optional[str] = None
+    # append a JSON line per stage span, and keep a Prometheus textfile with the latest runs
+    metrics_path: Optional[str] = None
+    prometheus_path: Optional[str] = None
+    # save only the top_k best rows by the model's top_column, and the whole universe too with keep_full_sheet
+    top_k: Optional[int] = None
+    keep_full_sheet: bool = False
+    # also save the processed frame next to the Excel file in these formats, see mypackage.sinks
+    output_formats: Optional[List[str]] = None
+
+    def __post_init__(self) -> None:
+        if self.output_formats:
+            # fail before a run rather than after its read, score and save, without importing pyarrow;
+            # formats added with ``sinks.register_sink`` are known once the sinks module is loaded
+            known = set(OUTPUT_FORMATS)
+            sinks = sys.modules.get("mypackage.sinks")
+            if sinks is not None:
+                known.update(sinks.SINKS)
+            unknown = [name for name in self.output_formats if name not in known]
+            if unknown:
+                raise ValueError(f"Unknown output formats {unknown}, expected some of {sorted(known)}")
 
 
 class AbstractModelPipeline(ABC):
+    name: str
+
     @abstractmethod
     def __init__(self, cfg: PipelineConfig) -> None:
         pass
 
     @abstractmethod
-    def download(self):
+    def add_totals(self, df: pd.DataFrame) -> pd.DataFrame:
         pass
 
     @abstractmethod
-    def style_as_excel_and_save(self, df: pd.DataFrame) -> None:
-        pass
+    def update_totals(self, live: LiveScores, rows: Set[int]) -> Set[int]:
+        """Bring the totals of ``live`` up to date after the scores of ``rows`` changed, like ``add_totals``.
 
-    @abstractmethod
-    def read_csv_and_process(self, filepath: Path) -> pd.DataFrame:
-        pass
+        Returns:
+            Set[int]: the rows whose totals changed
+        """
 
-    def download_and_process(self) -> None:
-        """The main function of "Fetch New Data".
+    def _derive_columns(self) -> None:
+        """Derive the score columns and the colored column pairs from ``data_columns``."""
+        unranked = [col for col in self.data_columns if col not in self.rank_ascend + self.rank_descend]
+        if unranked:
+            raise ValueError(f"Add {unranked} to rank_ascend or rank_descend")
+        self.rank_ascend = [col for col in self.rank_ascend if col in self.data_columns]
+        self.rank_descend = [col for col in self.rank_descend if col in self.data_columns]
+        self.score_columns = ["score to {}".format(col) for col in self.data_columns]
+
+        self.pair_columns = list(zip(iter(self.data_columns), iter(self.score_columns)))
+
+        self.odd_pair_columns = utils.flatten(self.pair_columns[1::2])
+        self.even_pair_columns = utils.flatten(self.pair_columns[0::2])
+
+    def variant(self, name: str, **overrides: Any) -> AbstractModelPipeline:
+        """A copy of this model under another name, with some of its definitions replaced.
+
+        For example ``usa.variant("USA Momentum", data_columns=[...])`` scores a subset of the columns.
+
+        Args:
+            name (str): the variant's name.
+            **overrides: the definitions to replace, e.g. data_columns or fundamentals_scores_columns.
+
+        Returns:
+            AbstractModelPipeline: the variant
         """
-        filepath = self.download()
-        processed = self.read_csv_and_process(filepath)
-        self.style_as_excel_and_save(processed)
-        quit(0)
+        model = copy.copy(self)
+        model.name = name
+        model.output_filename = f"{name}-Model-{self.timestamp}.xlsx"
+        for key, value in overrides.items():
+            if not hasattr(self, key) or callable(getattr(self, key)):
+                raise AttributeError(f"{type(self).__name__} has no definition {key!r}")
+            setattr(model, key, copy.deepcopy(value))
+        model._derive_columns()
+        return model
+
+    def model_definition(self) -> Dict[str, Any]:
+        """Everything that determines the processed frame and its workbook, e.g. for cache keys."""
+        definition = {key: value for key, value in vars(self).items()
+                      if key not in ("cfg", "timestamp", "output_filename") and not callable(value)}
+        definition.update(name=self.name, excel_backend=self.cfg.excel_backend, top_k=self.cfg.top_k,
+                          keep_full_sheet=self.cfg.keep_full_sheet)
+        return definition
+
+    def span(self, stage: str, **attributes: Any) -> ContextManager[Span]:
+        """Measure a stage of a run, see ``mypackage.metrics``."""
+        from mypackage import metrics
+
+        recorder = metrics.get_recorder(self.cfg.metrics_path, self.cfg.prometheus_path)
+        return recorder.span(stage, model=self.name, **attributes)
+
+    def read_csv(self, filepath: Union[Path, IO[bytes]]) -> pd.DataFrame:
+        """Read the columns declared in ``input_dtypes`` from a CSV export.
 
-    def select_and_process(self):
-        """The main function of "Use Existing Data".
+        Args:
+            filepath (Union[Path, IO[bytes]]): a path to the CSV data, or the CSV data in memory.
+
+        Returns:
+            df (pd.DataFrame): the typed frame
+        """
+        from mypackage import readers
+
+        with self.span("read") as span:
+            df = readers.read_csv(filepath, self.input_dtypes)
+            span.set_frame(df)
+        return df
+
+    def add_score_columns(self, df: pd.DataFrame, ranks: Optional[RankCache] = None) -> pd.DataFrame:
+        """Add a "score to ..." column for every ranked column, ranked in one batched pass and added as one block.
+
+        Args:
+            df (pd.DataFrame): the frame to add the scores to.
+            ranks (Optional[RankCache]): ranks of the frame holding the ``rank_ascend`` and
+                ``rank_descend`` columns, shared with other models scoring it. Defaults to ranking ``df``.
+
+        Returns:
+            df (pd.DataFrame): the frame with the score block added
+        """
+        import pandas as pd
+
+        from mypackage import ranking
+
+        if ranks is None:
+            ranks = ranking.RankCache(df)
+        ranked_cols = self.rank_ascend + self.rank_descend
+        ascending = [True] * len(self.rank_ascend) + [False] * len(self.rank_descend)
+        with self.span("score") as span:
+            df = pd.concat([df, ranks.scores(ranked_cols, ascending)], axis=1, copy=False)
+            span.set_frame(df)
+        return df
+
+    def add_concepts(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Add the columns derived from the export's own columns."""
+        return df
+
+    def prepare(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Add the index and derived columns, and parse the date and number columns exported as text.
+
+        Args:
+            df (pd.DataFrame): the frame read from the export.
+
+        Returns:
+            df (pd.DataFrame): the frame ready to be scored
+        """
+        from mypackage import parsing
+
+        # add index column
+        df["Index"] = range(1, len(df) + 1)
+
+        # add concepts
+        df = self.add_concepts(df)
+
+        # parse dates and numbers, unparsable cells are logged and left missing
+        parsing.parse_dates(df, self.date_cols)
+        parsing.parse_numbers(df, self.numerical_cols)
+        return df
+
+    def score(self, df: pd.DataFrame, ranks: Optional[RankCache] = None) -> pd.DataFrame:
+        """Score a prepared frame and assemble this model's output columns.
+
+        Args:
+            df (pd.DataFrame): a prepared frame. It is left as it is.
+            ranks (Optional[RankCache]): ranks shared with other models scoring the same frame.
+
+        Returns:
+            processed (pd.DataFrame): a processed dataframe
         """
-        file_path = Path(
-            filedialog.askopenfilename(
-                initialdir="/",
-                title="Select file",
-                filetypes=(("csv files", "*.csv"), ("all files", "*.*")),
+        import pandas as pd
+
+        from mypackage import dtypes, ranking
+
+        if ranks is None:
+            ranks = ranking.RankCache(df)
+
+        # rank all score columns at once; the totals only read the scores, so they are added to a
+        # frame of the score block alone instead of to the whole export
+        scores = self.add_totals(self.add_score_columns(pd.DataFrame(index=df.index), ranks))
+
+        # reorder columns, narrowing the ranked and calculated ones to the smallest exact dtype; the
+        # score columns are narrowed already, and the data columns once for every model sharing ``ranks``
+        output = {col: df[col] for col in self.header_cols}
+        for col, score_col in zip(self.data_columns, self.score_columns):
+            output[col] = ranks.compacted(col)
+            output[score_col] = scores[score_col]
+        output.update({col: dtypes.compact_series(scores[col]) for col in self.calculated_columns})
+        return pd.DataFrame(output)
+
+    def read_csv_and_process(self, filepath: Union[Path, IO[bytes]]) -> pd.DataFrame:
+        """Read a CSV from a file path and perform main operations on it.
+
+        The result is not persisted to the snapshot store; use ``process`` for that.
+
+        Args:
+            filepath (Union[Path, IO[bytes]]): a path to the CSV data, or the CSV data in memory.
+
+        Returns:
+            processed (pd.DataFrame): a processed dataframe
+        """
+        _logger.info("Reading CSV")
+        return self.score(self.prepare(self.read_csv(filepath)))
+
+    def column_fills(self) -> Dict[str, str]:
+        """The background color of each output column, header included."""
+        fills = {col: WHITE for col in self.header_cols + self.calculated_columns}
+        fills.update({col: ODD_PAIR_FILL for col in self.odd_pair_columns})
+        fills.update({col: EVEN_PAIR_FILL for col in self.even_pair_columns})
+        return fills
+
+    def top(self, df: pd.DataFrame, k: int) -> pd.DataFrame:
+        """The ``k`` best rows of a processed frame by ``top_column``, best first.
+
+        The rows are picked with a partial selection, so only the selected rows are sorted.
+
+        Args:
+            df (pd.DataFrame): a processed dataframe.
+            k (int): the number of rows.
+
+        Returns:
+            pd.DataFrame: the best rows, in order
+        """
+        from mypackage import ranking
+
+        with self.span("top_k", k=k) as span:
+            values = df[self.top_column].to_numpy(dtype="float64", na_value=float("nan"))
+            top = df.iloc[ranking.top_k(values, k)]
+            span.set_frame(top)
+        return top
+
+    def output_sheets(self, df: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+        """The sheets of the Excel file by name: the whole frame, or its ``top_k`` best rows when configured."""
+        if self.cfg.top_k is None:
+            return {"Sheet1": df}
+        sheets = {f"Top {self.cfg.top_k}": self.top(df, self.cfg.top_k)}
+        if self.cfg.keep_full_sheet:
+            sheets["Sheet1"] = df
+        return sheets
+
+    def style_as_excel_and_save(self, df: pd.DataFrame, output_filename: Optional[Path] = None) -> Path:
+        """Style a processed frame and save it as an Excel file, see ``output_sheets``.
+
+        Args:
+            df (pd.DataFrame): a processed dataframe.
+            output_filename (Optional[Path]): where to save the Excel file. Defaults to ``self.output_filename``.
+
+        Returns:
+            Path: path to the saved Excel file
+        """
+        output_filename = Path(output_filename or self.output_filename)
+        df.index = df.index + 1
+        _logger.info(f"Saving Excel to: {output_filename}")
+        try:
+            with self.span("save_excel", backend=self.cfg.excel_backend) as span:
+                span.set_frame(df)
+                if self.cfg.excel_backend == "xlsxwriter":
+                    self._save_with_xlsxwriter(self.output_sheets(df), output_filename)
+                elif self.cfg.excel_backend == "styleframe":
+                    self._save_with_styleframe(self.output_sheets(df), output_filename)
+                else:
+                    raise ValueError(f"Unknown excel backend {self.cfg.excel_backend!r}")
+            _logger.info('Excel "{}" Saved.'.format(output_filename))
+        except PermissionError as PE:
+            _logger.info(
+                f'Could not save file. Please make sure the file: "{PE.filename}" is closed'
             )
+            _logger.info(PE)
+            raise
+        return output_filename
+
+    def write_outputs(self, df: pd.DataFrame, output_filename: Path) -> Dict[str, Path]:
+        """Save a processed frame in the configured ``output_formats``, named after the Excel file.
+
+        Args:
+            df (pd.DataFrame): a processed dataframe.
+            output_filename (Path): the Excel file's path, whose suffix is replaced by each format's.
+
+        Returns:
+            Dict[str, Path]: the written file of each format
+        """
+        from mypackage import sinks
+
+        with self.span("save_outputs", formats=",".join(self.cfg.output_formats or [])) as span:
+            span.set_frame(df)
+            paths = sinks.write_outputs(df, output_filename, self.cfg.output_formats or [])
+        for name, path in paths.items():
+            _logger.info(f"Saved {name} to: {path}")
+        return paths
+
+    def save(self, df: pd.DataFrame, output_filename: Optional[Path] = None) -> Path:
+        """Save a processed frame as the styled Excel file, and in the configured ``output_formats``.
+
+        The other formats are written in the background while the workbook is styled.
+
+        Args:
+            df (pd.DataFrame): a processed dataframe.
+            output_filename (Optional[Path]): where to save the Excel file. Defaults to ``self.output_filename``.
+
+        Returns:
+            Path: path to the saved Excel file
+        """
+        output_filename = Path(output_filename or self.output_filename)
+        if not self.cfg.output_formats:
+            return self.style_as_excel_and_save(df, output_filename)
+
+        from concurrent.futures import ThreadPoolExecutor
+
+        from mypackage import metrics
+
+        recorder = metrics.get_recorder(self.cfg.metrics_path, self.cfg.prometheus_path)
+        with self.span("save"), ThreadPoolExecutor(max_workers=1, thread_name_prefix="outputs") as pool:
+            # a shallow copy, because saving the Excel file renumbers the frame's index
+            outputs = pool.submit(recorder.bind(self.write_outputs), df.copy(deep=False), output_filename)
+            output_filename = self.style_as_excel_and_save(df, output_filename)
+            outputs.result()
+        return output_filename
+
+    def write_xlsx(self, df: pd.DataFrame, output: Union[Path, IO[bytes]], sheet_name: str = "Sheet1") -> None:
+        """Write a processed frame with the fast xlsxwriter backend.
+
+        Args:
+            df (pd.DataFrame): a processed dataframe.
+            output (Union[Path, IO[bytes]]): a path or a binary file-like object.
+            sheet_name (str): the sheet name.
+        """
+        from mypackage import excel
+
+        with self.span("excel_write") as span:
+            span.set_frame(df)
+            excel.write_styled_xlsx(
+                df,
+                output,
+                column_fills=self.column_fills(),
+                header_fills=self.header_fills,
+                freeze_panes=self.freeze_panes,
+                sheet_name=sheet_name,
+            )
+
+    def _save_with_xlsxwriter(self, sheets: Dict[str, pd.DataFrame], output_filename: Path) -> None:
+        if len(sheets) == 1:
+            [(sheet_name, df)] = sheets.items()
+            return self.write_xlsx(df, output_filename, sheet_name=sheet_name)
+
+        from mypackage import workbook
+
+        renderers = [(sheet_name, functools.partial(_render_sheet, self, df)) for sheet_name, df in sheets.items()]
+        workbook.build_workbook(renderers, output_filename, workers=1)
+
+    def _save_with_styleframe(self, sheets: Dict[str, pd.DataFrame], output_filename: Path) -> None:
+        import styleframe
+
+        if len(sheets) > 1:
+            # StyleFrame's best_fit changes its cached styles, so a second sheet clashes with the first one's
+            raise ValueError("The styleframe backend writes a single sheet, use the xlsxwriter backend to keep "
+                             "the full sheet")
+        excel_writer = styleframe.ExcelWriter(output_filename)
+        for sheet_name, df in sheets.items():
+            self._style_sheet_with_styleframe(df, excel_writer, sheet_name)
+        excel_writer.save()
+
+    def _style_sheet_with_styleframe(self, df: pd.DataFrame, excel_writer: Any, sheet_name: str) -> None:
+        import styleframe
+        from styleframe import StyleFrame, Styler
+
+        _logger.info("Styling Excel")
+        font = styleframe.utils.fonts.calibri
+        # font = 'Courier New'
+        with self.span("style"):
+            sf = StyleFrame(df)
+            for bg_color, cols in _group_by_value(self.column_fills()).items():
+                sf.apply_column_style(
+                    cols_to_style=cols,
+                    styler_obj=Styler(
+                        bg_color=bg_color, wrap_text=False, font=font, font_size=12
+                    ),
+                    style_header=True,
+                )
+            for bg_color, cols in _group_by_value(self.header_fills).items():
+                sf.apply_headers_style(
+                    cols_to_style=cols,
+                    styler_obj=Styler(
+                        bg_color=bg_color, wrap_text=False, font=font, font_size=12
+                    ),
+                )
+        with self.span("excel_write") as span:
+            span.set_frame(df)
+            sf.to_excel(
+                excel_writer=excel_writer,
+                sheet_name=sheet_name,
+                best_fit=list(df.columns),
+                # best_fit=header_cols[:-1],
+                columns_and_rows_to_freeze=self.freeze_panes,
+                row_to_add_filters=0,
+                index=False,  # Index Column Added Seperately
+            )
+
+    def process(self, filepath: Union[Path, IO[bytes]], snapshot_date: Optional[date] = None) -> pd.DataFrame:
+        """Read and score a CSV export, and persist the result to the snapshot store when one is configured.
+
+        Args:
+            filepath (Union[Path, IO[bytes]]): a path to the CSV data, or the CSV data in memory.
+            snapshot_date (Optional[date]): the snapshot date. Defaults to the file's modification date,
+                or today for data in memory.
+
+        Returns:
+            processed (pd.DataFrame): a processed dataframe
+        """
+        with self.span("process") as span:
+            processed = self.read_csv_and_process(filepath)
+            span.set_frame(processed)
+        self.store(processed, filepath, snapshot_date)
+        return processed
+
+    def store(self, processed: pd.DataFrame, filepath: Union[Path, IO[bytes]],
+              snapshot_date: Optional[date] = None) -> None:
+        """Persist a processed frame to the snapshot store, when one is configured.
+
+        Args:
+            processed (pd.DataFrame): a processed dataframe.
+            filepath (Union[Path, IO[bytes]]): the CSV data it was read from.
+            snapshot_date (Optional[date]): the snapshot date. Defaults to the file's modification date,
+                or today for data in memory.
+        """
+        if self.cfg.store_dir is None:
+            return
+        from mypackage.store import SnapshotStore
+
+        if snapshot_date is None:
+            in_memory = hasattr(filepath, "read")
+            snapshot_date = date.today() if in_memory else date.fromtimestamp(os.path.getmtime(filepath))
+        with self.span("store"):
+            path = SnapshotStore(Path(self.cfg.store_dir)).write(self.name, snapshot_date, processed)
+        _logger.info(f"Stored snapshot to: {path}")
+
+    def process_and_save(self, filepath: Path, output_filename: Optional[Path] = None) -> Tuple[pd.DataFrame, Path]:
+        """Read, score and save a single CSV export, reusing a cached result for identical inputs.
+
+        Args:
+            filepath (Path): a path to the CSV data.
+            output_filename (Optional[Path]): where to save the Excel file. Defaults to ``self.output_filename``.
+
+        Returns:
+            Tuple[pd.DataFrame, Path]: the processed dataframe and the path to the saved Excel file
+        """
+        output_filename = Path(output_filename or self.output_filename)
+        if self.cfg.cache_dir is None:
+            processed = self.process(filepath)
+            return processed, self.save(processed, output_filename)
+
+        from mypackage.cache import ResultCache
+
+        cache = ResultCache(Path(self.cfg.cache_dir), self.cfg.cache_max_bytes)
+        key = cache.key(Path(filepath).read_bytes(), self.model_definition())
+        cached = cache.get(key, output_filename)
+        if cached is not None:
+            _logger.info(f"Reusing cached result {key[:12]} for {filepath}")
+            # the same export can be another week's snapshot, so the history keeps every week
+            self.store(cached.frame, filepath)
+            if self.cfg.output_formats:
+                self.write_outputs(cached.frame, output_filename)
+            return cached.frame, output_filename
+        processed = self.process(filepath)
+        self.save(processed, output_filename)
+        cache.put(key, processed, output_filename)
+        return processed, output_filename
+
+    def process_file(self, filepath: Path, output_filename: Optional[Path] = None) -> Path:
+        """Read, score and save a single CSV export.
+
+        Args:
+            filepath (Path): a path to the CSV data.
+            output_filename (Optional[Path]): where to save the Excel file. Defaults to ``self.output_filename``.
+
+        Returns:
+            Path: path to the saved Excel file
+        """
+        _, output_filename = self.process_and_save(filepath, output_filename)
+        return output_filename
+
+    @staticmethod
+    def notify_completed(output_filename: Path) -> None:
+        messagebox.showinfo(
+            title="Scraper and Scorer",
+            message=f"Scoring Completed!\nFile saved to {output_filename}",
         )
+
+    def download(self) -> Path:
+        """Download the screen's CSV export with a warm browser, logging in only if the saved session expired.
+
+        Raises:
+            RuntimeError: if downloading fails
+
+        Returns:
+            Path: path to downloaded csv file
+        """
+        from mypackage import browser, metrics
+
+        session = browser.get_browser(self.cfg.user, self.cfg.password, self.cfg.headless, self.cfg.browser_cache_dir,
+                                      self.cfg.chromedriver_version, self.cfg.browser_debugger_address,
+                                      metrics.get_recorder(self.cfg.metrics_path, self.cfg.prometheus_path))
+        _logger.info(f"Running {self.screen_name}.")
+        with self.span("download", screen_id=self.screen_id), \
+                downloads.new_download_dir(self.cfg.download_dir) as download_dir:
+            path = session.run_screen(self.screener_url, self.screen_id, download_dir,
+                                      self.cfg.download_timeout_in_sec)
+            return downloads.keep_download(path)
+
+    def fetch(self) -> bytes:
+        """Download the screen's CSV export over HTTP, reusing a logged-in session.
+
+        Returns:
+            bytes: the CSV export
+        """
+        from mypackage import fetch
+
+        if self.cfg.export_url is None:
+            raise ValueError("Set export_url to fetch screens over HTTP.")
+        session = fetch.get_session(self.cfg.user, self.cfg.password, self.cfg.login_url, self.cfg.export_url,
+                                    self.cfg.login_user_field, self.cfg.login_password_field)
+        with self.span("fetch", screen_id=self.screen_id):
+            return session.fetch_csv(self.screen_id)
+
+    def fetch_and_save(self, output_filename: Optional[Path] = None) -> Path:
+        """Fetch the screen's CSV export over HTTP, then score and save it without writing the CSV to disk.
+
+        Args:
+            output_filename (Optional[Path]): where to save the Excel file. Defaults to ``self.output_filename``.
+
+        Returns:
+            Path: path to the saved Excel file
+        """
+        processed = self.process(io.BytesIO(self.fetch()))
+        return self.save(processed, output_filename)
+
+    @property
+    def stages(self) -> List[str]:
+        """The top-level stages of a run, in order, as reported by ``span`` directly inside the run's span.
+
+        A run reusing a cached result skips processing and saving, so it reports fewer of them.
+        """
+        stages = ["fetch" if self.cfg.fetch_mode == "http" else "download", "process"]
+        if self.cfg.store_dir is not None:
+            stages.append("store")
+        stages.append("save" if self.cfg.output_formats else "save_excel")
+        return stages
+
+    def download_and_process(self) -> Path:
+        """The main function of "Fetch New Data".
+
+        Returns:
+            Path: path to the saved Excel file
+        """
+        with self.span("run", fetch_mode=self.cfg.fetch_mode):
+            if self.cfg.fetch_mode == "http":
+                return self.fetch_and_save()
+            return self.process_file(self.download())
+
+    def select_and_process(self, file_path: Optional[Path] = None) -> Path:
+        """The main function of "Use Existing Data".
+
+        Args:
+            file_path (Optional[Path]): the CSV export. Defaults to asking for it with a file dialog.
+
+        Returns:
+            Path: path to the saved Excel file
+        """
+        if file_path is None:
+            file_path = ask_csv_path()
         assert (
             file_path.exists()
         ), f"Error: expected {file_path} to exist but it does not."
-        processed = self.read_csv_and_process(file_path)
-        self.style_as_excel_and_save(processed)
-        quit(0)
+        with self.span("run", fetch_mode="file"):
+            return self.process_file(file_path)
 
 
 class USAModelPipeline(AbstractModelPipeline):
+    name = "USA"
+
     def __init__(self, cfg: PipelineConfig) -> None:
         self.cfg = cfg
         self.timestamp = datetime.now().strftime("%d-%m-%Y %H-%M")
         # FUTURE: replace with this
         # self.output_filename = filedialog.askopenfile(filetypes=filetypes, initialdir="#Specify the file path")
         self.output_filename = f"USA-Model-{self.timestamp}.xlsx"
+        # AVI MODEL USA STOCK
+        self.screen_id = "99931"
+        self.screen_name = "AVI MODEL USA STOCK"
+        self.screener_url = "https://www.zacks.com/screening/stock-screener"
         self.header_cols = ["Index", "Ticker", "Company Name", "Last Close"]
+        # Defines the columns read from the CSV export and their dtypes
+        self.input_dtypes = {
+            "Company Name": "object",
+            "Ticker": "object",
+            "Last Close": "float64",
+            "Market Cap (mil)": "float64",
+            "Avg Volume": "float64",
+            "Current Avg Broker Rec": "float64",
+            "VGM Score": "grade",
+            "Momentum Score": "grade",
+            "Zacks Rank": "float64",
+            "% Price Change (1 Week)": "float64",
+            "% Price Change (4 Weeks)": "float64",
+            "% Price Change (12 Weeks)": "float64",
+            "% Price Change (YTD)": "float64",
+            "Zacks Industry Rank": "float64",
+            "Value Score": "grade",
+            "Growth Score": "grade",
+        }
         self.numerical_cols: List[str] = []
         self.date_cols: List[str] = []
         self.rank_ascend = [
@@ -140,7 +730,6 @@ class USAModelPipeline(AbstractModelPipeline):
             )
         ]
 
-        self.score_columns = ["score to {}".format(col) for col in self.data_columns]
         self.calculated_columns = [
             "Total score",
             "USA rankings",
@@ -149,278 +738,90 @@ class USAModelPipeline(AbstractModelPipeline):
             "Difference",
             "Potential ranking",
         ]
+        self.header_fills = {
+            "Total score": "#ffc1f5",
+            "USA rankings": "#ffc1f5",
+            "Fundamentals Ranks Sum": "#ffc000",
+            "Results rankings": "#ffc000",
+            "Difference": "#00ff69",
+            "Potential ranking": "#00ff69",
+        }
+        # the best names have the lowest potential ranking
+        self.top_column = "Potential ranking"
+        self.freeze_panes = "E2"
+
+        self._derive_columns()
+
+    def _derive_columns(self) -> None:
+        super()._derive_columns()
+        self.fundamentals_scores_columns = [
+            col for col in self.fundamentals_scores_columns if col in self.score_columns
+        ]
 
-        self.pair_columns = list(zip(iter(self.data_columns), iter(self.score_columns)))
-
-        self.odd_pair_columns = utils.flatten(self.pair_columns[1::2])
-        self.even_pair_columns = utils.flatten(self.pair_columns[0::2])
-
-    def download(self) -> Path:
-        """Download data.
-
-        Raises:
-            RuntimeError: if downloading fails
-
-        Returns:
-            Path: path to downloaded csv file
-        """
-        from selenium import webdriver
-        from selenium.webdriver.chrome.options import Options
-        from selenium.webdriver.chrome.service import Service as ChromeService
-        from selenium.webdriver.common.by import By
-        from selenium.webdriver.support import expected_conditions as EC
-        from selenium.webdriver.support.wait import WebDriverWait
-        from seleniumrequests.request import RequestsSessionMixin
-        from webdriver_manager.chrome import ChromeDriverManager
-
-        class RequestsChromeWebDriver(RequestsSessionMixin, webdriver.Chrome):
-            """A Chrome webdriver with requests functionality."""
-
-            pass
-
-        options = Options()
-        options.headless = self.cfg.headless
-        options.add_experimental_option(
-            "prefs",
-            {
-                "download.default_directory": os.getcwd(),
-                "download.prompt_for_download": False,
-                "download.directory_upgrade": True,
-                "safebrowsing.enabled": True,
-            },
-        )
-        _logger.info("Installing chrome driver")
-        with RequestsChromeWebDriver(
-            options=options, service=ChromeService(ChromeDriverManager(version="114.0.5735.16").install())
-        ) as driver:  # noqa: E501
-            # current_dimension = driver.execute_script(
-            #     "return [window.innerHeight, window.innerWidth];")
-            _logger.info("Set window size.")
-            new_dimension = {"width": 1150, "height": 1000}
-            driver.set_window_size(new_dimension["width"], new_dimension["height"])
-
-            _logger.info("Getting homepage.")
-            driver.get("https://www.zacks.com/my_account/welcomeback.php")
-
-            _logger.info("Logging in.")
-            username_input = driver.find_element(
-                By.XPATH,
-                "/html/body/div[2]/div[3]/div/div/div/div/div[2]/table/tbody/tr/td/table/tbody/tr/td[2]/table/tbody/tr[3]/td[2]/input",  # noqa: E501
-            )  # noqa: E501
-            assert username_input.is_displayed()
-            username_input.send_keys(self.cfg.user)  # type: ignore
-            password_input = driver.find_element(
-                By.XPATH,
-                "/html/body/div[2]/div[3]/div/div/div/div/div[2]/table/tbody/tr/td/table/tbody/tr/td[2]/table/tbody/tr[4]/td[2]/input",  # noqa: E501
-            )  # noqa: E501
-            assert password_input.is_displayed()
-            password_input.send_keys(self.cfg.password)  # type: ignore
-            login_button = driver.find_element(By.ID, "button")
-            assert login_button.is_displayed()
-            login_button.click()
-
-            if (
-                "account locked"
-                in driver.find_element(By.XPATH, "/html/body").text.lower()
-            ):
-                raise RuntimeError("Account Locked. Please try again in 30 minutes.")
-
-            if (
-                "failed"
-                in driver.find_element(By.XPATH, "/html/body").text.lower()
-            ):
-                raise RuntimeError("Sign in failed.")
-
-            _logger.info("Switching to stock-screener tab.")
-            driver.get("https://www.zacks.com/screening/stock-screener")
-
-            # switch to frame
-            _logger.info("Switching to screenerContent iframe.")
-            iframe = driver.find_element(By.ID, "screenerContent")
-            driver.switch_to.frame(iframe)
-
-            _logger.info("Getting my-screen-tab")
-            # get my-screen tab
-            my_screen_button = driver.find_element(By.ID, "my-screen-tab")
-            my_screen_button.send_keys(" ")
-
-            _logger.info("Running AVI MODEL USA STOCK.")
-            run_button = WebDriverWait(driver, 30).until(
-                EC.presence_of_element_located((By.ID, "btn_run_99931"))
-            )
-
-            run_button.click()
-            _logger.info("Getting CSV.")
-            csv_button = WebDriverWait(driver, 30).until(
-                EC.presence_of_element_located(
-                    (By.XPATH, '//*[@id="screener_table_wrapper"]/div[1]/a[1]')
-                )
-            )
-
-            # driver.find_element(
-            #     By.XPATH, '//*[@id="screener_table_wrapper"]/div[1]/a[1]')
-            pre_existing_csvs = glob.glob(f"{os.getcwd()}/*.csv")
-            csv_button.click()
-
-            # wait for the file to finish downloading and get its path
-            while True:
-                current_csvs = glob.glob(f"{os.getcwd()}/*.csv")
-                if len(current_csvs) > len(pre_existing_csvs):
-                    break
-                print("Waiting for file to download..")
-                time.sleep(1)
-            latest_file = max(current_csvs, key=os.path.getctime)
-            _logger.info(f"Got file {latest_file}.")
-            # filepath = os.path.join(os.getcwd(),
-            #                         os.listdir('/path/to/download/directory')[0])
-            return Path(latest_file)
-
-    def read_csv_and_process(self, filepath: Path) -> pd.DataFrame:
-        """Read a CSV from a file path, perform main operations on it, and save it.
-
-        Args:
-            filepath (Path): a path to the CSV data.
-
-        Returns:
-            processed (pd.DataFrame): a processed dataframe
-        """
-        _logger.info("Reading CSV")
-        df = pd.read_csv(filepath)
-        # add index column
-        df["Index"] = range(1, len(df) + 1)
-
-        # get rid of unnamed index
-        df.drop(df.filter(regex="Unname"), axis=1, inplace=True)
-
-        # add concepts
+    def add_concepts(self, df: pd.DataFrame) -> pd.DataFrame:
         df["Avg Volume $"] = df["Last Close"] * df["Avg Volume"]
-        # parse dates
-        for col in self.date_cols:
-            df[col] = pd.to_datetime(df[col], format="%b %d,%Y")
-
-        # parse numbers
-        for col in self.numerical_cols:
-            df[col] = df[col].str.rstrip("%")
-            df[col] = df[col].str.replace(r"[^0-9.\-]", "").astype(float)
-
-        # rank ascending
-        for col in self.rank_ascend:
-            df["score to {}".format(col)] = (
-                df[col].rank(ascending=True, method="min") - 1
-            )
+        return df
 
-        # rank descending
-        for col in self.rank_descend:
-            df["score to {}".format(col)] = (
-                df[col].rank(ascending=False, method="min") - 1
-            )
+    def add_totals(self, df: pd.DataFrame) -> pd.DataFrame:
+        from mypackage.ranking import rank_series
 
         # add total column
         df["Total score"] = df[self.score_columns].sum(axis=1)
-        df["USA rankings"] = df["Total score"].rank(ascending=True, method="min")
+        df["USA rankings"] = rank_series(df["Total score"], ascending=True)
 
         # add results
         df["Fundamentals Ranks Sum"] = df[self.fundamentals_scores_columns].sum(axis=1)
         df["Results rankings"] = (
-            df["Fundamentals Ranks Sum"].rank(ascending=True, method="min")
+            rank_series(df["Fundamentals Ranks Sum"], ascending=True)
         )
 
         # add potential
         df["Difference"] = df["Results rankings"] - df["USA rankings"]
         df["Potential ranking"] = (
-            df["Difference"].rank(ascending=False, method="min") - 1
+            rank_series(df["Difference"], ascending=False) - 1
         )
-
-        # reorder columns
-        df = df[
-            self.header_cols
-            + list(sum(list(zip(self.data_columns, self.score_columns)), ()))
-            + self.calculated_columns
-        ]
         return df
 
-    def style_as_excel_and_save(self, df: pd.DataFrame) -> None:
-        df.index = df.index + 1
-        _logger.info("Styling Excel")
-        excel_writer = styleframe.ExcelWriter(self.output_filename)
-        font = styleframe.utils.fonts.calibri
-        # font = 'Courier New'
-        sf = StyleFrame(df)
-        sf.apply_column_style(
-            cols_to_style=(self.header_cols + self.calculated_columns),
-            styler_obj=Styler(
-                bg_color=styleframe.utils.colors.white,
-                wrap_text=False,
-                font=font,
-                font_size=12,
-            ),
-            style_header=True,
-        )
-        sf.apply_column_style(
-            cols_to_style=self.odd_pair_columns,
-            styler_obj=Styler(
-                bg_color="#ffe28a", wrap_text=False, font=font, font_size=12
-            ),
-            style_header=True,
-        )
-        sf.apply_column_style(
-            cols_to_style=self.even_pair_columns,
-            styler_obj=Styler(
-                bg_color="#d6ffba", wrap_text=False, font=font, font_size=12
-            ),
-            style_header=True,
-        )
-        sf.apply_headers_style(
-            cols_to_style=["Total score", "USA rankings"],
-            styler_obj=Styler(
-                bg_color="#ffc1f5", wrap_text=False, font=font, font_size=12
-            ),
-        )
-        sf.apply_headers_style(
-            cols_to_style=["Fundamentals Ranks Sum", "Results rankings"],
-            styler_obj=Styler(
-                bg_color="#ffc000", wrap_text=False, font=font, font_size=12
-            ),
-        )
-        sf.apply_headers_style(
-            cols_to_style=["Difference", "Potential ranking"],
-            styler_obj=Styler(
-                bg_color="#00ff69", wrap_text=False, font=font, font_size=12
-            ),
-        )
+    def update_totals(self, live: LiveScores, rows: Set[int]) -> Set[int]:
+        totals = live.set_sum("Total score", self.score_columns, rows)
+        usa = live.set_rank("USA rankings", "Total score", totals, ascending=True)
 
-        _logger.info(f"Saving Excel to: {self.output_filename}")
-        try:
-            sf.to_excel(
-                excel_writer=excel_writer,
-                best_fit=list(df.columns),
-                # best_fit=header_cols[:-1],
-                columns_and_rows_to_freeze="E2",
-                row_to_add_filters=0,
-                index=False,  # Index Column Added Seperately
-            )
-            excel_writer.save()
-            _logger.info('Excel "{}" Saved.'.format(self.output_filename))
-        except PermissionError as PE:
-            _logger.info(
-                f'Could not save file. Please make sure the file: "{PE.filename}" is closed'
-            )
-            _logger.info(PE)
-            raise
-        messagebox.showinfo(
-            title="Scraper and Scorer",
-            message=f"Scoring Completed!\nFile saved to {self.output_filename}",
-        )
+        fundamentals = live.set_sum("Fundamentals Ranks Sum", self.fundamentals_scores_columns, rows)
+        results = live.set_rank("Results rankings", "Fundamentals Ranks Sum", fundamentals, ascending=True)
+
+        differences = live.set_difference("Difference", "Results rankings", "USA rankings", usa | results)
+        potential = live.set_rank("Potential ranking", "Difference", differences, ascending=False, offset=-1)
+        return totals | usa | fundamentals | results | differences | potential
 
 
 class ETFModelPipeline(AbstractModelPipeline):
+    name = "ETF"
+
     def __init__(self, cfg: PipelineConfig) -> None:
         self.cfg = cfg
         self.timestamp = datetime.now().strftime("%d-%m-%Y %H-%M")
         # FUTURE: replace with this
         # self.output_filename = filedialog.askopenfile(filetypes=filetypes, initialdir="#Specify the file path")
         self.output_filename = f"ETF-Model-{self.timestamp}.xlsx"
+        # MODEL ZACKS ETF
+        self.screen_id = "99985"
+        self.screen_name = "MODEL ZACKS ETF"
+        self.screener_url = "https://www.zacks.com/screening/etf-screener"
         self.header_cols = ["Index", "Company Name", "Ticker"]
+        # Defines the columns read from the CSV export and their dtypes
+        self.input_dtypes = {
+            "Company Name": "object",
+            "Ticker": "object",
+            "ETF Rank": "float64",
+            "Forward Yield": "float64",
+            "Expense Ratio": "float64",
+            "Performance 1D (%)": "float64",
+            "Performance 1M (%)": "float64",
+            "Performance 1Y (%)": "float64",
+            "Performance YTD (%)": "float64",
+            "Performance 6M (%)": "float64",
+            "Performance 3M (%)": "float64",
+        }
         self.numerical_cols: List[str] = []
         self.date_cols: List[str] = []
         self.rank_ascend = [
@@ -451,251 +852,127 @@ class ETFModelPipeline(AbstractModelPipeline):
             "Performance 3M (%)",
         ]
 
-        self.score_columns = ["score to {}".format(col) for col in self.data_columns]
         self.calculated_columns = [
             "Total",
         ]
+        self.header_fills = {
+            "Total": "#ffc1f5",
+        }
+        # the best ETFs have the lowest total score
+        self.top_column = "Total"
+        self.freeze_panes = "D2"
 
-        self.pair_columns = list(zip(iter(self.data_columns), iter(self.score_columns)))
-
-        self.odd_pair_columns = utils.flatten(self.pair_columns[1::2])
-        self.even_pair_columns = utils.flatten(self.pair_columns[0::2])
-
-    def download(self) -> Path:
-        """Download data.
-
-        Raises:
-            RuntimeError: if downloading fails
-
-        Returns:
-            Path: path to downloaded csv file
-        """
-        from selenium import webdriver
-        from selenium.webdriver.chrome.options import Options
-        from selenium.webdriver.chrome.service import Service as ChromeService
-        from selenium.webdriver.common.by import By
-        from selenium.webdriver.support import expected_conditions as EC
-        from selenium.webdriver.support.wait import WebDriverWait
-        from seleniumrequests.request import RequestsSessionMixin
-        from webdriver_manager.chrome import ChromeDriverManager
-
-        class RequestsChromeWebDriver(RequestsSessionMixin, webdriver.Chrome):
-            """A Chrome webdriver with requests functionality."""
-
-            pass
-
-        options = Options()
-        options.headless = self.cfg.headless
-        options.add_experimental_option(
-            "prefs",
-            {
-                "download.default_directory": os.getcwd(),
-                "download.prompt_for_download": False,
-                "download.directory_upgrade": True,
-                "safebrowsing.enabled": True,
-            },
-        )
-        _logger.info("Installing chrome driver")
-        with RequestsChromeWebDriver(
-            options=options, service=ChromeService(ChromeDriverManager(version="114.0.5735.16").install())
-        ) as driver:  # noqa: E501
-            # current_dimension = driver.execute_script(
-            #     "return [window.innerHeight, window.innerWidth];")
-            _logger.info("Set window size.")
-            new_dimension = {"width": 1150, "height": 1000}
-            driver.set_window_size(new_dimension["width"], new_dimension["height"])
-
-            _logger.info("Getting homepage.")
-            driver.get("https://www.zacks.com/my_account/welcomeback.php")
-
-            _logger.info("Logging in.")
-            username_input = driver.find_element(
-                By.XPATH,
-                "/html/body/div[2]/div[3]/div/div/div/div/div[2]/table/tbody/tr/td/table/tbody/tr/td[2]/table/tbody/tr[3]/td[2]/input",  # noqa: E501
-            )  # noqa: E501
-            assert username_input.is_displayed()
-            username_input.send_keys(self.cfg.user)  # type: ignore
-            password_input = driver.find_element(
-                By.XPATH,
-                "/html/body/div[2]/div[3]/div/div/div/div/div[2]/table/tbody/tr/td/table/tbody/tr/td[2]/table/tbody/tr[4]/td[2]/input",  # noqa: E501
-            )  # noqa: E501
-            assert password_input.is_displayed()
-            password_input.send_keys(self.cfg.password)  # type: ignore
-            login_button = driver.find_element(By.ID, "button")
-            assert login_button.is_displayed()
-            login_button.click()
-
-            if (
-                "account locked"
-                in driver.find_element(By.XPATH, "/html/body").text.lower()
-            ):
-                raise RuntimeError("Account Locked. Please try again in 30 minutes.")
-
-            if (
-                "failed"
-                in driver.find_element(By.XPATH, "/html/body").text.lower()
-            ):
-                raise RuntimeError("Sign in failed.")
-
-            _logger.info("Switching to My-Screen tab.")
-            driver.get("https://www.zacks.com/screening/etf-screener")
-
-            # switch to frame
-            _logger.info("Switching to screenerContent iframe.")
-            iframe = driver.find_element(By.ID, "screenerContent")
-            driver.switch_to.frame(iframe)
-
-            _logger.info("Getting my-screen-tab")
-            # get my-screen tab
-            my_screen_button = driver.find_element(By.ID, "my-screen-tab")
-            my_screen_button.send_keys(" ")
-
-            _logger.info("Running MODEL ZACKS ETF.")
-            run_button = WebDriverWait(driver, 30).until(
-                EC.presence_of_element_located((By.ID, "btn_run_99985"))
-            )
-
-            run_button.click()
-            _logger.info("Getting CSV.")
-            csv_button = WebDriverWait(driver, 30).until(
-                EC.presence_of_element_located(
-                    (By.XPATH, '//*[@id="screener_table_wrapper"]/div[1]/a[1]')
-                )
-            )
-
-            # driver.find_element(
-            #     By.XPATH, '//*[@id="screener_table_wrapper"]/div[1]/a[1]')
-            pre_existing_csvs = glob.glob(f"{os.getcwd()}/*.csv")
-            csv_button.click()
-
-            # wait for the file to finish downloading and get its path
-            start_time = time.time()
-            while True:
-                current_csvs = glob.glob(f"{os.getcwd()}/*.csv")
-                if len(current_csvs) > len(pre_existing_csvs):
-                    break
-                if time.time() - start_time > self.cfg.download_timeout_in_sec:
-                    raise RuntimeError("Timed Out.")
-                print("Waiting for file to download..")
-                time.sleep(1)
-            latest_file = max(current_csvs, key=os.path.getctime)
-            _logger.info(f"Got file {latest_file}.")
-            # filepath = os.path.join(os.getcwd(),
-            #                         os.listdir('/path/to/download/directory')[0])
-            return Path(latest_file)
-
-    def read_csv_and_process(self, filepath: Path) -> pd.DataFrame:
-        """Read a CSV from a file path, perform main operations on it, and save it.
-
-        Args:
-            filepath (Path): a path to the CSV data.
-
-        Returns:
-            processed (pd.DataFrame): a processed dataframe
-        """
-        _logger.info("Reading CSV")
-        df = pd.read_csv(filepath)
-        # add index column
-        df["Index"] = range(1, len(df) + 1)
-
-        # get rid of unnamed index
-        df.drop(df.filter(regex="Unname"), axis=1, inplace=True)
-
-        # parse dates
-        for col in self.date_cols:
-            df[col] = pd.to_datetime(df[col], format="%b %d,%Y")
-
-        # parse numbers
-        for col in self.numerical_cols:
-            df[col] = df[col].str.rstrip("%")
-            df[col] = df[col].str.replace(r"[^0-9.\-]", "").astype(float)
-
-        # rank ascending
-        for col in self.rank_ascend:
-            df["score to {}".format(col)] = (
-                df[col].rank(ascending=True, method="min") - 1
-            )
-
-        # rank descending
-        for col in self.rank_descend:
-            df["score to {}".format(col)] = (
-                df[col].rank(ascending=False, method="min") - 1
-            )
+        self._derive_columns()
 
+    def add_totals(self, df: pd.DataFrame) -> pd.DataFrame:
         # add total column
         df["Total"] = df[self.score_columns].sum(axis=1)
-
-        # reorder columns
-        df = df[
-            self.header_cols
-            + list(sum(list(zip(self.data_columns, self.score_columns)), ()))
-            + self.calculated_columns
-        ]
         return df
 
-    def style_as_excel_and_save(self, df: pd.DataFrame) -> None:
+    def update_totals(self, live: LiveScores, rows: Set[int]) -> Set[int]:
+        return live.set_sum("Total", self.score_columns, rows)
+
+
+MODELS: Dict[str, type[AbstractModelPipeline]] = {
+    pipeline_class.name: pipeline_class for pipeline_class in (USAModelPipeline, ETFModelPipeline)
+}
+
+
+def score_models(models: List[AbstractModelPipeline], filepath: Union[Path, IO[bytes]]) -> Dict[str, pd.DataFrame]:
+    """Score several model definitions, e.g. variants of one model, over one export in a single pass.
+
+    The export is read once with the columns every model needs, and each distinct ranking, score
+    column and narrowed data column is computed once, so every extra model only adds its own
+    totals and output frame. Every result is persisted to the snapshot store of its model, when
+    one is configured.
+
+    Args:
+        models (List[AbstractModelPipeline]): the models, with unique names.
+        filepath (Union[Path, IO[bytes]]): a path to the CSV data, or the CSV data in memory.
+
+    Returns:
+        Dict[str, pd.DataFrame]: the processed dataframe of each model, by name
+    """
+    from mypackage import ranking, readers
+
+    names = [model.name for model in models]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Model names must be unique, got {names}")
+    dtypes: Dict[str, str] = {}
+    for model in models:
+        for col, dtype in model.input_dtypes.items():
+            if dtypes.setdefault(col, dtype) != dtype:
+                raise ValueError(f"Models read {col!r} as both {dtypes[col]} and {dtype}")
+
+    first = models[0]
+    with first.span("read") as span:
+        df = readers.read_csv(filepath, dtypes)
+        span.set_frame(df)
+    for pipeline_class in dict.fromkeys(type(model) for model in models):
+        df = next(model for model in models if type(model) is pipeline_class).prepare(df)
+    ranks = ranking.RankCache(df)
+    processed = {model.name: model.score(df, ranks) for model in models}
+    for model in models:
+        model.store(processed[model.name], filepath)
+    return processed
+
+
+def _render_sheet(pipeline: AbstractModelPipeline, df: pd.DataFrame, sheet_name: str) -> bytes:
+    """Write a processed frame as a single-sheet workbook. Runs inside a worker process."""
+    sheet = io.BytesIO()
+    pipeline.write_xlsx(df, sheet, sheet_name=sheet_name)
+    return sheet.getvalue()
+
+
+def save_workbook(sheets: Dict[str, Tuple[AbstractModelPipeline, pd.DataFrame]], output_filename: Path,
+                  workers: Optional[int] = None) -> Path:
+    """Save the processed frames of several models, e.g. USA, ETF and their variants, as the sheets of one workbook.
+
+    Every sheet is styled with the xlsxwriter backend in its own worker process, so the save takes
+    about as long as the largest sheet rather than all of them.
+
+    Args:
+        sheets (Dict[str, Tuple[AbstractModelPipeline, pd.DataFrame]]): the model and processed frame of
+            each sheet, by sheet name, in order.
+        output_filename (Path): where to save the workbook.
+        workers (Optional[int]): the number of worker processes. Defaults to one per sheet, up to the
+            number of CPUs.
+
+    Returns:
+        Path: path to the saved workbook
+    """
+    from mypackage import workbook
+
+    renderers = []
+    for sheet_name, (pipeline, df) in sheets.items():
+        # numbered from 1 like ``style_as_excel_and_save``, without renumbering the caller's frame
+        df = df.copy(deep=False)
         df.index = df.index + 1
-        _logger.info("Styling Excel")
-        excel_writer = styleframe.ExcelWriter(self.output_filename)
-        font = styleframe.utils.fonts.calibri
-        # font = 'Courier New'
-        sf = StyleFrame(df)
-        sf.apply_column_style(
-            cols_to_style=(self.header_cols + self.calculated_columns),
-            styler_obj=Styler(
-                bg_color=styleframe.utils.colors.white,
-                wrap_text=False,
-                font=font,
-                font_size=12,
-            ),
-            style_header=True,
-        )
-        sf.apply_column_style(
-            cols_to_style=self.odd_pair_columns,
-            styler_obj=Styler(
-                bg_color="#ffe28a", wrap_text=False, font=font, font_size=12
-            ),
-            style_header=True,
-        )
-        sf.apply_column_style(
-            cols_to_style=self.even_pair_columns,
-            styler_obj=Styler(
-                bg_color="#d6ffba", wrap_text=False, font=font, font_size=12
-            ),
-            style_header=True,
-        )
-        sf.apply_headers_style(
-            cols_to_style=["Total"],
-            styler_obj=Styler(
-                bg_color="#ffc1f5", wrap_text=False, font=font, font_size=12
-            ),
-        )
-        _logger.info(f"Saving Excel to: {self.output_filename}")
-        try:
-            sf.to_excel(
-                excel_writer=excel_writer,
-                best_fit=list(df.columns),
-                # best_fit=header_cols[:-1],
-                columns_and_rows_to_freeze="D2",
-                row_to_add_filters=0,
-                index=False,  # Index Column Added Seperately
-            )
-            excel_writer.save()
-            _logger.info('Excel "{}" Saved.'.format(self.output_filename))
-        except PermissionError as PE:
-            _logger.info(
-                f'Could not save file. Please make sure the file: "{PE.filename}" is closed'
-            )
-            _logger.info(PE)
-            raise
-        messagebox.showinfo(
-            title="Scraper and Scorer",
-            message=f"Scoring Completed!\nFile saved to {self.output_filename}",
+        renderers.append((sheet_name, functools.partial(_render_sheet, pipeline, df)))
+    output_filename = Path(output_filename)
+    _logger.info(f"Saving {len(renderers)} sheets to: {output_filename}")
+    workbook.build_workbook(renderers, output_filename, workers=workers)
+    _logger.info('Excel "{}" Saved.'.format(output_filename))
+    return output_filename
+
+
+def ask_csv_path() -> Path:
+    return Path(
+        filedialog.askopenfilename(
+            initialdir="/",
+            title="Select file",
+            filetypes=(("csv files", "*.csv"), ("all files", "*.*")),
         )
+    )
 
 
 class MainApplication(tk.Frame):
+    POLL_INTERVAL_MS = 100
+
     def __init__(self, master: tk.Tk, cfg: PipelineConfig, *args, **kwargs):
+        from mypackage import metrics
+        from mypackage.worker import PipelineWorker
+
         tk.Frame.__init__(self, master, *args, **kwargs)
         self.master = master
         self.cfg: PipelineConfig = cfg
@@ -704,7 +981,7 @@ class MainApplication(tk.Frame):
         self.label = tk.Label(master, text="Welcome! Please select a model:")
         self.label.pack()
 
-        models = ("USA", "ETF")
+        models = tuple(MODELS)
         var = tk.Variable(value=models)
         self.listbox = tk.Listbox(
             master,
@@ -722,24 +999,80 @@ class MainApplication(tk.Frame):
             master, text="Use Existing Data", command=self.on_use_existing_data_press)
         self.select_and_process_button.pack(fill=tk.Y)
 
+        self.progress = ttk.Progressbar(master, mode="determinate", length=300)
+        self.progress.pack(fill=tk.X, padx=5, pady=5)
+        self.status = tk.Label(master, text="Idle.")
+        self.status.pack()
+        self.cancel_button = tk.Button(master, text="Cancel", command=self.on_cancel_press, state=tk.DISABLED)
+        self.cancel_button.pack(fill=tk.Y)
+        self.log = scrolledtext.ScrolledText(master, height=10, width=80, state=tk.DISABLED)
+        self.log.pack(expand=True, fill=tk.BOTH, padx=5, pady=5)
+
+        self.stages: List[str] = []
+        self.worker = PipelineWorker(metrics.get_recorder(cfg.metrics_path, cfg.prometheus_path))
+        self.after(self.POLL_INTERVAL_MS, self.poll_worker)
+
     def on_fetch_new_data_press(self) -> None:
         pipeline_class = self.on_listbox_select()
         pipeline = pipeline_class(self.cfg)
-        pipeline.download_and_process()
+        self.start(pipeline.download_and_process, pipeline.stages)
 
     def on_use_existing_data_press(self) -> None:
         pipeline_class = self.on_listbox_select()
         pipeline = pipeline_class(self.cfg)
-        pipeline.select_and_process()
+        file_path = ask_csv_path()
+        if not file_path.is_file():
+            return
+        self.start(lambda: pipeline.select_and_process(file_path), pipeline.stages[1:])
+
+    def on_cancel_press(self) -> None:
+        self.worker.cancel()
+        self.cancel_button.config(state=tk.DISABLED)
+
+    def start(self, job: Callable[[], Path], stages: List[str]) -> None:
+        """Run a pipeline on the worker thread, keeping the window responsive."""
+        self.stages = stages
+        self.progress.config(maximum=len(stages), value=0)
+        self.status.config(text="Running...")
+        self.select_and_process_button.config(state=tk.DISABLED)
+        self.cancel_button.config(state=tk.NORMAL)
+        self.worker.submit(job)
+
+    def finish(self, text: str) -> None:
+        self.status.config(text=text)
+        self.select_and_process_button.config(state=tk.NORMAL)
+        self.cancel_button.config(state=tk.DISABLED)
+
+    def poll_worker(self) -> None:
+        for event in self.worker.poll():
+            if event.kind == "log":
+                self.log.config(state=tk.NORMAL)
+                self.log.insert(tk.END, event.value + "\n")
+                self.log.see(tk.END)
+                self.log.config(state=tk.DISABLED)
+            elif event.kind == "stage":
+                # count the top-level stages that actually ran, e.g. a cached result skips some
+                if event.value.depth == 1:
+                    self.progress.config(value=min(self.progress["value"] + 1, len(self.stages)))
+                    self.status.config(text=f"Finished {event.value.name} in {event.value.wall_seconds:.1f}s.")
+            elif event.kind == "done":
+                self.progress.config(value=len(self.stages))
+                self.finish("Done.")
+                AbstractModelPipeline.notify_completed(event.value)
+            elif event.kind == "cancelled":
+                self.progress.config(value=0)
+                self.finish("Cancelled.")
+            elif event.kind == "failed":
+                self.finish("Failed.")
+                show_error(type(event.value), event.value, event.value.__traceback__)
+        self.after(self.POLL_INTERVAL_MS, self.poll_worker)
 
     def on_listbox_select(self) -> type[AbstractModelPipeline]:
         selected_indices = self.listbox.curselection()
         if selected_indices:
             selected_item = self.listbox.get(self.listbox.curselection())
-            if selected_item == "USA":
-                return USAModelPipeline
-            elif selected_item == "ETF":
-                return ETFModelPipeline
+            if selected_item in MODELS:
+                return MODELS[selected_item]
             else:
                 raise ValueError
         else:
@@ -747,14 +1080,19 @@ class MainApplication(tk.Frame):
 
     @staticmethod
     def get_config_parser():
+        from jsonargparse import ArgumentParser
+
         parser = ArgumentParser()
         parser.add_dataclass_arguments(PipelineConfig, "pipeline")
         return parser
 
-    @staticmethod
-    def on_closing():
-        if messagebox.askokcancel("Quit", "Do you want to quit?"):
-            root.destroy()
+    def on_closing(self):
+        message = "Do you want to quit?"
+        if self.worker.busy:
+            message = "A run is still in progress and its Excel file may be left incomplete.\n" + message
+        if messagebox.askokcancel("Quit", message):
+            self.worker.close()
+            self.master.destroy()
 
 
 def show_error(exc, val, tb) -> None:
@@ -764,12 +1102,16 @@ def show_error(exc, val, tb) -> None:
 
 
 if __name__ == "__main__":
+    import rootutils
+    from jsonargparse import CLI
+
     root_path = rootutils.find_root(search_from=__file__, indicator='.project-root')
     cfg: PipelineConfig = CLI(PipelineConfig,
                               as_positional=False,
                               default_config_files=[root_path / "config.yaml"])
     root = tk.Tk()
     root.report_callback_exception = show_error
-    MainApplication(root, cfg, width=300).pack(side="top", fill="both", expand=True)
-    root.protocol("WM_DELETE_WINDOW", MainApplication.on_closing)
+    app = MainApplication(root, cfg, width=300)
+    app.pack(side="top", fill="both", expand=True)
+    root.protocol("WM_DELETE_WINDOW", app.on_closing)
     root.mainloop()
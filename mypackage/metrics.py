@@ -0,0 +1,238 @@
+"""Per-stage spans recording wall time, CPU time, the process' peak RSS and frame sizes, exported as JSON lines
+and Prometheus.
+
+A span wraps one stage of a run::
+
+    recorder = get_recorder("metrics.jsonl", "zacks.prom")
+    with recorder.span("read", model="USA") as span:
+        df = read(...)
+        span.set_frame(df)
+
+Spans opened inside another span on the same thread are its children and share its run id, so
+every line of a run can be grouped and the time of each stage compared. Work handed to another
+thread is wrapped with ``Recorder.bind`` to stay in the run.
+"""
+from __future__ import annotations
+
+import functools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None  # type: ignore
+
+_logger = logging.getLogger("USA Model")
+
+PROMETHEUS_PREFIX = "zacks_stage"
+
+T = TypeVar("T")
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """The process' peak resident set size so far, or None where it is not available."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+@dataclass
+class Span:
+    name: str
+    run_id: str
+    parent: Optional[str] = None
+    # how many spans enclose it: 0 for a run's outermost span, 1 for the stages directly inside it
+    depth: int = 0
+    model: Optional[str] = None
+    started_at: float = 0.0
+    wall_seconds: float = 0.0
+    # CPU time of the thread running the span; work on other threads is in their own spans
+    cpu_seconds: float = 0.0
+    # the whole process' peak RSS (a high-water mark) when the span ended, and how much it rose during the span
+    process_peak_rss_bytes: Optional[int] = None
+    process_peak_rss_growth_bytes: Optional[int] = None
+    rows: Optional[int] = None
+    columns: Optional[int] = None
+    error: Optional[str] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+    def set_frame(self, df) -> None:
+        """Record the shape of the frame the stage produced."""
+        self.rows, self.columns = df.shape
+
+
+class Recorder:
+    """Records spans, appends them to a JSON lines file and keeps a Prometheus textfile up to date.
+
+    Args:
+        jsonl_path (Optional[Path]): append one JSON object per finished span to this file.
+        prometheus_path (Optional[Path]): rewrite this textfile, for node_exporter's textfile
+            collector, whenever a run's outermost span finishes.
+    """
+
+    def __init__(self, jsonl_path: Optional[Path] = None, prometheus_path: Optional[Path] = None) -> None:
+        self.jsonl_path = None if jsonl_path is None else Path(jsonl_path)
+        self.prometheus_path = None if prometheus_path is None else Path(prometheus_path)
+        self.listeners: List[Callable[[Span], None]] = []
+        self._stacks = threading.local()
+        self._lock = threading.Lock()
+        # the latest span and the run and failure counts per (model, stage)
+        self._latest: Dict[Tuple[str, str], Span] = {}
+        self._runs: Dict[Tuple[str, str], int] = {}
+        self._failures: Dict[Tuple[str, str], int] = {}
+
+    def add_listener(self, listener: Callable[[Span], None]) -> None:
+        """Call ``listener`` with every finished span, on the thread that ran it.
+
+        An exception raised by the listener propagates out of the span, which lets a listener stop a run.
+        """
+        self.listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[Span], None]) -> None:
+        """Stop calling a listener added with ``add_listener``."""
+        self.listeners.remove(listener)
+
+    def _stack(self) -> List[Span]:
+        if not hasattr(self._stacks, "spans"):
+            self._stacks.spans = []
+        return self._stacks.spans
+
+    def bind(self, fn: Callable[..., T], parent: Optional[Span] = None) -> Callable[..., T]:
+        """Wrap ``fn`` so that the spans it opens, on whichever thread calls it, are children of ``parent``.
+
+        Args:
+            fn (Callable[..., T]): e.g. a task handed to a thread pool.
+            parent (Optional[Span]): the parent span. Defaults to this thread's innermost open span.
+
+        Returns:
+            Callable[..., T]: the wrapped function
+        """
+        stack = self._stack()
+        parent = parent or (stack[-1] if stack else None)
+        if parent is None:
+            return fn
+
+        @functools.wraps(fn)
+        def bound(*args: Any, **kwargs: Any) -> T:
+            stack = self._stack()
+            stack.append(parent)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                stack.pop()
+
+        return bound
+
+    @contextmanager
+    def span(self, name: str, model: Optional[str] = None, **attributes: Any) -> Iterator[Span]:
+        """Measure the enclosed block as the stage ``name``.
+
+        Args:
+            name (str): the stage name.
+            model (Optional[str]): the model name. Defaults to the enclosing span's.
+            **attributes: anything else worth recording, e.g. a screen id.
+
+        Yields:
+            Span: the span, to record the frame shape or more attributes on
+        """
+        stack = self._stack()
+        parent = stack[-1] if stack else None
+        span = Span(
+            name,
+            run_id=parent.run_id if parent else uuid.uuid4().hex[:12],
+            parent=parent.name if parent else None,
+            depth=parent.depth + 1 if parent else 0,
+            model=model or (parent.model if parent else None),
+            started_at=time.time(),
+            attributes=attributes,
+        )
+        rss_before = peak_rss_bytes()
+        wall_start, cpu_start = time.perf_counter(), time.thread_time()
+        stack.append(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            stack.pop()
+            span.wall_seconds = time.perf_counter() - wall_start
+            span.cpu_seconds = time.thread_time() - cpu_start
+            span.process_peak_rss_bytes = peak_rss_bytes()
+            if rss_before is not None and span.process_peak_rss_bytes is not None:
+                span.process_peak_rss_growth_bytes = span.process_peak_rss_bytes - rss_before
+            self._finish(span, outermost=not stack)
+
+    def _finish(self, span: Span, outermost: bool) -> None:
+        _logger.debug(f"{span.name}: {span.wall_seconds:.3f}s wall, {span.cpu_seconds:.3f}s cpu")
+        key = (span.model or "", span.name)
+        with self._lock:
+            self._latest[key] = span
+            self._runs[key] = self._runs.get(key, 0) + 1
+            if span.error is not None:
+                self._failures[key] = self._failures.get(key, 0) + 1
+            if self.jsonl_path is not None:
+                with open(self.jsonl_path, "a") as f:
+                    f.write(json.dumps(asdict(span), default=str) + "\n")
+            if outermost and self.prometheus_path is not None:
+                self._write_prometheus()
+        for listener in self.listeners:
+            listener(span)
+
+    def _write_prometheus(self) -> None:
+        gauges = {
+            "wall_seconds": ("Wall time of the latest run of the stage.", lambda s: s.wall_seconds),
+            "cpu_seconds": ("CPU time of the thread running the latest run of the stage.", lambda s: s.cpu_seconds),
+            "process_peak_rss_bytes": ("Peak resident set size of the whole process so far, at the end of the stage.",
+                                       lambda s: s.process_peak_rss_bytes),
+            "rows": ("Rows of the frame the latest run of the stage produced.", lambda s: s.rows),
+            "columns": ("Columns of the frame the latest run of the stage produced.", lambda s: s.columns),
+        }
+        lines = []
+        for metric, (help_text, value) in gauges.items():
+            name = f"{PROMETHEUS_PREFIX}_{metric}"
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+            for key, span in sorted(self._latest.items()):
+                if value(span) is not None:
+                    lines.append(f"{name}{_labels(key)} {value(span)}")
+        for metric, counts, help_text in (("runs_total", self._runs, "Runs of the stage."),
+                                          ("failures_total", self._failures, "Failed runs of the stage.")):
+            name = f"{PROMETHEUS_PREFIX}_{metric}"
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+            lines += [f"{name}{_labels(key)} {counts.get(key, 0)}" for key in sorted(self._latest)]
+        # the textfile collector may read at any time, so replace the file atomically
+        temp = self.prometheus_path.with_name(f".{self.prometheus_path.name}.{os.getpid()}")
+        temp.write_text("\n".join(lines) + "\n")
+        os.replace(temp, self.prometheus_path)
+
+
+def _labels(key: Tuple[str, str]) -> str:
+    model, stage = (value.replace("\\", "\\\\").replace('"', '\\"') for value in key)
+    return f'{{model="{model}",stage="{stage}"}}'
+
+
+_recorders: Dict[Tuple[Optional[str], Optional[str]], Recorder] = {}
+_recorders_lock = threading.Lock()
+
+
+def get_recorder(jsonl_path: Optional[str] = None, prometheus_path: Optional[str] = None) -> Recorder:
+    """Reuse one recorder per pair of output files for the lifetime of the process."""
+    key = (None if jsonl_path is None else os.fspath(jsonl_path),
+           None if prometheus_path is None else os.fspath(prometheus_path))
+    with _recorders_lock:
+        recorder = _recorders.get(key)
+        if recorder is None:
+            recorder = _recorders[key] = Recorder(jsonl_path, prometheus_path)
+        return recorder
@@ -0,0 +1,152 @@
+"""Parse the number and date columns that some screen layouts export as formatted text.
+
+Values like "12.5%", "$1,234.50" or "(3.2)" and dates like "Jan 05,2024" are converted in bulk:
+number columns are stacked and stripped of their formatting with one kernel call, date columns
+sharing a format detected from a sample are stacked likewise, and the cells that still do not
+parse are reported instead of failing the whole run.
+"""
+from __future__ import annotations
+
+import importlib.util
+import logging
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+_logger = logging.getLogger("USA Model")
+
+HAS_PYARROW = importlib.util.find_spec("pyarrow") is not None
+
+SAMPLE_SIZE = 1000
+# the formatting characters deleted from text numbers; "(" becomes a minus sign
+JUNK = "%$,)"
+# empty cells and placeholders that mean "no value" rather than a parse error
+MISSING_VALUES = frozenset({"", "NA", "N/A", "--", "-"})
+NUMBER_PATTERN = r"^[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?$"
+DATE_FORMATS = ["%b %d,%Y", "%b %d, %Y", "%m/%d/%Y", "%Y-%m-%d"]
+
+
+def _sample(series: pd.Series) -> pd.Series:
+    return series.iloc[:SAMPLE_SIZE].dropna().astype(str)
+
+
+def detect_date_format(series: pd.Series) -> Optional[str]:
+    """The first of ``DATE_FORMATS`` that parses the first values of a text column, or None."""
+    sample = _sample(series)
+    sample = sample[~sample.isin(MISSING_VALUES)]
+    for date_format in DATE_FORMATS:
+        if pd.to_datetime(sample, format=date_format, errors="coerce").notna().all():
+            return date_format
+    return None
+
+
+def _clean_numbers(values: np.ndarray) -> np.ndarray:
+    """Convert an object array of text numbers to float64, stripping their formatting, NaN where it fails."""
+    if HAS_PYARROW:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        text = pa.array(values, type=pa.string(), from_pandas=True)
+        # count the characters of every cell in one pass over the UTF-8 data, and only strip the ones used
+        data = text.buffers()[2]
+        counts = np.bincount(np.frombuffer(data, dtype=np.uint8), minlength=256) if data is not None else None
+        for char in JUNK:
+            if counts is not None and counts[ord(char)]:
+                text = pc.replace_substring(text, pattern=char, replacement="")
+        if counts is not None and counts[ord("(")]:
+            text = pc.replace_substring(text, pattern="(", replacement="-")
+        text = pc.utf8_trim_whitespace(text)
+        try:
+            numbers = pc.cast(text, pa.float64())
+        except pa.ArrowInvalid:
+            # only pay for validating every cell when some cell does not parse
+            valid = pc.match_substring_regex(text, pattern=NUMBER_PATTERN)
+            numbers = pc.cast(pc.if_else(valid, text, pa.scalar(None, pa.string())), pa.float64())
+        return numbers.to_numpy(zero_copy_only=False)
+    text = pd.Series(values, dtype=object)
+    try:
+        return text.astype(np.float64).to_numpy()
+    except (TypeError, ValueError):
+        pass
+    table = {ord(char): None for char in JUNK}
+    table[ord("(")] = "-"
+    text = text.str.translate(table)
+    try:
+        return text.astype(np.float64).to_numpy()
+    except ValueError:
+        return pd.to_numeric(text, errors="coerce").to_numpy(dtype=np.float64)
+
+
+def _unparsable(original: pd.Series, parsed: pd.Series) -> pd.Series:
+    failed = parsed.isna() & original.notna()
+    if failed.any():
+        failed &= ~original.astype(str).str.strip().isin(MISSING_VALUES)
+    return original[failed]
+
+
+def _report(df: pd.DataFrame, columns: Sequence[str], parsed: Dict[str, pd.Series]) -> Dict[str, pd.Series]:
+    report = {}
+    for col in columns:
+        cells = _unparsable(df[col], parsed[col])
+        if len(cells):
+            _logger.warning(f"{col}: {len(cells)} cells could not be parsed, e.g. {list(cells.iloc[:3])}")
+            report[col] = cells
+        df[col] = parsed[col]
+    return report
+
+
+def _text_columns(df: pd.DataFrame, columns: Sequence[str]) -> List[str]:
+    # columns already parsed, e.g. typed by the reader, are left as they are
+    return [col for col in columns if df[col].dtype == object]
+
+
+def parse_numbers(df: pd.DataFrame, columns: Sequence[str]) -> Dict[str, pd.Series]:
+    """Convert text number columns to float64 in place, in one batched pass over all of them.
+
+    Every cell is stripped of "%", "$", "," and ")" wherever it sits in the column, so no format has
+    to be detected. A "%" is dropped without scaling, like the export shows it, and "(3.2)" means -3.2.
+
+    Args:
+        df (pd.DataFrame): the frame holding the columns.
+        columns (Sequence[str]): the columns to parse. Columns that are not text are skipped.
+
+    Returns:
+        Dict[str, pd.Series]: the original text of the cells that could not be parsed and are now
+            missing, by column and row label. Empty when everything parsed.
+    """
+    columns = _text_columns(df, columns)
+    if not columns:
+        return {}
+    values = _clean_numbers(np.concatenate([df[col].to_numpy(dtype=object) for col in columns]))
+    parsed = {
+        col: pd.Series(column_values, index=df.index, name=col)
+        for col, column_values in zip(columns, np.split(values, len(columns)))
+    }
+    return _report(df, columns, parsed)
+
+
+def parse_dates(df: pd.DataFrame, columns: Sequence[str]) -> Dict[str, pd.Series]:
+    """Convert text date columns to datetime64 in place, in one batched pass per date format.
+
+    Args:
+        df (pd.DataFrame): the frame holding the columns.
+        columns (Sequence[str]): the columns to parse. Columns that are not text are skipped.
+
+    Returns:
+        Dict[str, pd.Series]: the original text of the cells that could not be parsed and are now
+            missing, by column and row label. Empty when everything parsed.
+    """
+    columns = _text_columns(df, columns)
+    groups: Dict[Optional[str], List[str]] = {}
+    for col in columns:
+        groups.setdefault(detect_date_format(df[col]), []).append(col)
+
+    parsed = {}
+    for date_format, group in groups.items():
+        _logger.debug(f"Parsing {group} as {date_format}")
+        stacked = pd.Series(np.concatenate([df[col].to_numpy(dtype=object) for col in group]))
+        values = pd.to_datetime(stacked, format=date_format, errors="coerce").to_numpy()
+        for col, column_values in zip(group, np.split(values, len(group))):
+            parsed[col] = pd.Series(column_values, index=df.index, name=col)
+    return _report(df, columns, parsed)
@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+from typing import Dict, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from mypackage import dtypes
+
+
+def to_rank_keys(df: pd.DataFrame, columns: Sequence[str]) -> np.ndarray:
+    """Stack columns into a 2-D float array whose order matches the columns' own order.
+
+    Numeric columns are used as-is and ordered categoricals (e.g. the A-F letter grades) by
+    their codes. Any other column is replaced by its sorted factorization codes, so ranking
+    the codes is the same as ranking the original values. Missing values become NaN.
+
+    Args:
+        df (pd.DataFrame): the frame holding the columns.
+        columns (Sequence[str]): the columns to stack.
+
+    Returns:
+        np.ndarray: a (rows, columns) float64 array, stored column by column.
+    """
+    # filled and ranked column by column, so each column is contiguous
+    block = np.empty((len(columns), len(df)), dtype=np.float64)
+    for j, col in enumerate(columns):
+        series = df[col]
+        if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+            block[j] = series.to_numpy(dtype=np.float64, na_value=np.nan)
+        elif isinstance(series.dtype, pd.CategoricalDtype) and series.cat.ordered:
+            codes = series.cat.codes.to_numpy()
+            block[j] = np.where(codes < 0, np.nan, codes)
+        else:
+            codes, _ = pd.factorize(series, sort=True)
+            block[j] = np.where(codes < 0, np.nan, codes)
+    return block.T
+
+
+def _rank_column(keys: np.ndarray) -> np.ndarray:
+    n = len(keys)
+    missing = np.isnan(keys)
+    valid = keys[~missing]
+    ranks = np.empty(n, dtype=np.float64)
+    if not len(valid):
+        ranks[:] = np.nan
+        return ranks
+    low, high = valid.min(), valid.max()
+    if high - low < n and np.array_equal(valid, np.floor(valid)):
+        # codes, grades and ranks: a value's rank is the count of smaller values, in O(n)
+        codes = np.where(missing, 0, keys - low).astype(np.intp)
+        counts = np.bincount(codes[~missing], minlength=int(high - low) + 1)
+        ranks[:] = (np.cumsum(counts) - counts + 1)[codes]
+    else:
+        # missing values sort last as +inf, after every group of valid values. Tied values share
+        # their group's rank, so the sort does not need to be stable.
+        keys = np.where(missing, np.inf, keys)
+        order = np.argsort(keys)
+        sorted_keys = keys[order]
+        group_start = np.ones(n, dtype=bool)
+        group_start[1:] = sorted_keys[1:] != sorted_keys[:-1]
+        first_in_group = np.maximum.accumulate(np.where(group_start, np.arange(n), 0))
+        ranks[order] = first_in_group + 1.0
+    ranks[missing] = np.nan
+    return ranks
+
+
+def rank_min(block: np.ndarray, ascending: Sequence[bool]) -> np.ndarray:
+    """Rank every column of a 2-D array, like ``Series.rank(method="min")`` on each column.
+
+    Ties share the lowest rank of their group, ranks start at 1 and missing values
+    are left as NaN (pandas' ``na_option="keep"``). Integer-valued columns spanning fewer
+    values than rows, e.g. ranks and letter grade codes, are ranked by counting instead of sorting.
+
+    Args:
+        block (np.ndarray): a (rows, columns) float array, fastest when stored column by column
+            as ``to_rank_keys`` returns it.
+        ascending (Sequence[bool]): the rank direction of each column.
+
+    Returns:
+        np.ndarray: a (rows, columns) float64 array of ranks.
+    """
+    block = np.asarray(block, dtype=np.float64)
+    n_rows, n_cols = block.shape
+    ranks = np.empty((n_cols, n_rows), dtype=np.float64)
+    for j, asc in enumerate(ascending):
+        ranks[j] = _rank_column(block[:, j] if asc else -block[:, j])
+    return ranks.T
+
+
+def rank_series(series: pd.Series, ascending: bool = True) -> pd.Series:
+    """``series.rank(ascending=ascending, method="min")`` of a numeric series, computed by ``rank_min``."""
+    keys = series.to_numpy(dtype=np.float64, na_value=np.nan)
+    return pd.Series(rank_min(keys[:, None], [ascending])[:, 0], index=series.index, name=series.name)
+
+
+class RankCache:
+    """Ranks of a frame's columns, each computed once per (column, direction, method).
+
+    Several models scoring the same frame ask for overlapping rankings; the ones not cached yet
+    are computed together in one batched pass. Their score columns and the frame's columns
+    narrowed for output are kept too, so every extra model only adds its own totals.
+
+    Args:
+        df (pd.DataFrame): the frame whose columns are ranked.
+    """
+
+    def __init__(self, df: pd.DataFrame) -> None:
+        self.df = df
+        self._ranks: Dict[Tuple[str, bool, str], np.ndarray] = {}
+        self._scores: Dict[Tuple[str, bool], pd.Series] = {}
+        self._blocks: Dict[Tuple[Tuple[str, bool], ...], pd.DataFrame] = {}
+        self._compacted: Dict[str, pd.Series] = {}
+
+    def __len__(self) -> int:
+        return len(self._ranks)
+
+    def get(self, columns: Sequence[str], ascending: Sequence[bool], method: str = "min") -> np.ndarray:
+        """Rank ``columns`` like ``Series.rank(ascending=..., method=method)``, reusing cached ranks.
+
+        Args:
+            columns (Sequence[str]): the columns to rank.
+            ascending (Sequence[bool]): the rank direction of each column.
+            method (str): a ``Series.rank`` method; "min" is computed in one batched pass.
+
+        Returns:
+            np.ndarray: a (rows, columns) float64 array of ranks.
+        """
+        keys = [(col, bool(asc), method) for col, asc in zip(columns, ascending)]
+        missing = list(dict.fromkeys(key for key in keys if key not in self._ranks))
+        if missing:
+            if method == "min":
+                missing_cols = [col for col, _, _ in missing]
+                ranks = rank_min(to_rank_keys(self.df, missing_cols), [asc for _, asc, _ in missing])
+                for j, key in enumerate(missing):
+                    self._ranks[key] = ranks[:, j]
+            else:
+                for col, asc, _ in missing:
+                    ranks = self.df[col].rank(ascending=asc, method=method)
+                    self._ranks[(col, asc, method)] = ranks.to_numpy(dtype=np.float64, na_value=np.nan)
+        if not keys:
+            return np.empty((len(self.df), 0), dtype=np.float64)
+        return np.column_stack([self._ranks[key] for key in keys])
+
+    def scores(self, columns: Sequence[str], ascending: Sequence[bool]) -> pd.DataFrame:
+        """The "score to ..." column of each of ``columns``: its min rank minus one, narrowed by ``compact_series``.
+
+        The columns are assembled into one frame, built once for each distinct list of ranked
+        columns, so models ranking the same columns share it.
+
+        Args:
+            columns (Sequence[str]): the ranked columns.
+            ascending (Sequence[bool]): the rank direction of each column.
+
+        Returns:
+            pd.DataFrame: the score columns, in the order of ``columns``
+        """
+        keys = tuple((col, bool(asc)) for col, asc in zip(columns, ascending))
+        if keys in self._blocks:
+            return self._blocks[keys]
+        missing = list(dict.fromkeys(key for key in keys if key not in self._scores))
+        if missing:
+            ranks = self.get([col for col, _ in missing], [asc for _, asc in missing])
+            for j, (col, asc) in enumerate(missing):
+                score = pd.Series(ranks[:, j] - 1, index=self.df.index, name="score to {}".format(col))
+                self._scores[(col, asc)] = dtypes.compact_series(score)
+        block = pd.concat([self._scores[key] for key in keys], axis=1) if keys else pd.DataFrame(index=self.df.index)
+        self._blocks[keys] = block
+        return block
+
+    def compacted(self, column: str) -> pd.Series:
+        """A column of the frame narrowed by ``compact_series``."""
+        if column not in self._compacted:
+            self._compacted[column] = dtypes.compact_series(self.df[column])
+        return self._compacted[column]
+
+
+def top_k(values: np.ndarray, k: int) -> np.ndarray:
+    """The positions of the ``k`` smallest values, smallest first, without sorting the whole array.
+
+    Matches ``np.argsort(values, kind="stable")[:k]``: ties keep their original order and
+    missing values come last.
+
+    Args:
+        values (np.ndarray): a 1-D float array.
+        k (int): the number of positions to select.
+
+    Returns:
+        np.ndarray: up to ``k`` positions.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if k >= len(values):
+        return np.argsort(values, kind="stable")
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    keys = np.where(np.isnan(values), np.inf, values)
+    threshold = keys[np.argpartition(keys, k - 1)[k - 1]]
+    below = np.flatnonzero(keys < threshold)
+    tied = np.flatnonzero(keys == threshold)
+    if threshold == np.inf:
+        # missing values sort after infinite ones, like in argsort
+        tied = np.concatenate([np.flatnonzero(values == np.inf), np.flatnonzero(np.isnan(values))])
+    # the first rows tied at the threshold fill the remaining places
+    tied = tied[:k - len(below)]
+    selected = np.concatenate([below, tied])
+    return selected[np.lexsort((selected, values[selected], np.isnan(values[selected])))]
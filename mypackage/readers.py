@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import importlib.util
+import os
+from typing import IO, Dict, Optional, Union
+
+import pandas as pd
+
+from mypackage.dtypes import GRADE, to_grades
+
+FilePathOrBuffer = Union[str, os.PathLike, IO]
+
+HAS_PYARROW = importlib.util.find_spec("pyarrow") is not None
+
+
+def read_csv(
+    filepath_or_buffer: FilePathOrBuffer,
+    dtypes: Dict[str, str],
+    engine: Optional[str] = None,
+) -> pd.DataFrame:
+    """Read only the declared columns of a CSV export, parsed straight into their declared dtypes.
+
+    Args:
+        filepath_or_buffer (FilePathOrBuffer): a path to the CSV data, or a file-like object.
+        dtypes (Dict[str, str]): the columns to read and their dtypes. Other columns are skipped by the parser.
+            Columns declared as ``GRADE`` are parsed as categories and returned as ordered A-F grades.
+        engine (Optional[str]): the pandas CSV engine. Defaults to "pyarrow" when it is installed, else "c".
+
+    Returns:
+        df (pd.DataFrame): the typed frame, with columns in file order
+    """
+    grade_cols = [col for col, dtype in dtypes.items() if dtype == GRADE]
+    kwargs = dict(usecols=list(dtypes), dtype={col: "category" if col in grade_cols else dtype
+                                               for col, dtype in dtypes.items()})
+    if engine is None:
+        engine = "pyarrow" if HAS_PYARROW else "c"
+    df = pd.read_csv(filepath_or_buffer, engine=engine, **kwargs)
+    for col in grade_cols:
+        df[col] = to_grades(df[col])
+    return df
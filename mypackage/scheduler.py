@@ -0,0 +1,247 @@
+"""Download many saved screens concurrently with a bounded pool of warm browsers, scoring each CSV as it arrives.
+
+Usage:
+    python -m mypackage.scheduler --user me --password secret --screens screens.json --workers 3 --output_dir scored
+
+``screens.json`` lists the saved screens and the model that scores each of them:
+
+    [{"screen_id": "99931", "screener_url": "https://www.zacks.com/screening/stock-screener", "model": "USA"},
+     {"screen_id": "99985", "screener_url": "https://www.zacks.com/screening/etf-screener", "model": "ETF"}]
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from jsonargparse import CLI
+
+from mypackage import browser, downloads, metrics
+from mypackage.batch import BatchResult, process_one
+from mypackage.main import MODELS, PipelineConfig
+
+_logger = logging.getLogger("USA Model")
+
+
+@dataclass
+class Screen:
+    screen_id: str
+    screener_url: str
+    model: str
+    name: Optional[str] = None
+
+    @property
+    def label(self) -> str:
+        return self.name or self.screen_id
+
+
+DEFAULT_SCREENS = [
+    Screen("99931", "https://www.zacks.com/screening/stock-screener", "USA", "AVI MODEL USA STOCK"),
+    Screen("99985", "https://www.zacks.com/screening/etf-screener", "ETF", "MODEL ZACKS ETF"),
+]
+
+
+@dataclass
+class ScreenResult:
+    screen: Screen
+    csv_path: Optional[Path] = None
+    output_path: Optional[Path] = None
+    n_rows: int = 0
+    download_seconds: float = 0.0
+    process_seconds: float = 0.0
+    error: Optional[str] = None
+
+
+def load_screens(path: Path) -> List[Screen]:
+    """Read a JSON list of screens, each with a screen_id, screener_url, model and optional name."""
+    screens = [Screen(**screen) for screen in json.loads(Path(path).read_text())]
+    for screen in screens:
+        if screen.model not in MODELS:
+            raise ValueError(f"Unknown model {screen.model!r} for screen {screen.screen_id}, "
+                             f"expected one of {list(MODELS)}")
+    return screens
+
+
+class BrowserPool:
+    """At most ``size`` warm browsers for one account, each lent to one download at a time.
+
+    Args:
+        size (int): the maximum number of browsers.
+        cfg (PipelineConfig): the account and browser settings.
+    """
+
+    def __init__(self, size: int, cfg: PipelineConfig) -> None:
+        self.size = size
+        self.cfg = cfg
+        self._idle: queue.Queue = queue.Queue()
+        self._browsers: List[browser.ZacksBrowser] = []
+        self._lock = threading.Lock()
+
+    def _new_browser(self) -> Optional[browser.ZacksBrowser]:
+        with self._lock:
+            if len(self._browsers) >= self.size:
+                return None
+            new = browser.ZacksBrowser(self.cfg.user, self.cfg.password, self.cfg.headless,
+                                       self.cfg.browser_cache_dir, self.cfg.chromedriver_version,
+                                       profile=f"worker-{len(self._browsers)}",
+                                       recorder=metrics.get_recorder(self.cfg.metrics_path, self.cfg.prometheus_path))
+            self._browsers.append(new)
+            return new
+
+    def warm(self) -> None:
+        """Log in with one browser, so the others start from its saved session instead of logging in too."""
+        with self.browser() as first:
+            first.ensure_logged_in()
+
+    @contextmanager
+    def browser(self) -> Iterator[browser.ZacksBrowser]:
+        """Borrow an idle browser, starting a new one while the pool is below its size."""
+        try:
+            borrowed = self._idle.get_nowait()
+        except queue.Empty:
+            borrowed = self._new_browser() or self._idle.get()
+        try:
+            yield borrowed
+        finally:
+            self._idle.put(borrowed)
+
+    def close(self) -> None:
+        for each in self._browsers:
+            each.close()
+        self._browsers.clear()
+
+
+def download_screen(pool: BrowserPool, screen: Screen, cfg: PipelineConfig) -> Tuple[Path, float]:
+    """Download a screen's CSV export with a pooled browser, named after the screen.
+
+    Returns:
+        Tuple[Path, float]: the CSV's path, and the seconds spent downloading it once a browser was free
+    """
+    recorder = metrics.get_recorder(cfg.metrics_path, cfg.prometheus_path)
+    with downloads.new_download_dir(cfg.download_dir) as download_dir:
+        with pool.browser() as borrowed, recorder.span("download", model=screen.model, screen_id=screen.screen_id):
+            started = time.perf_counter()
+            _logger.info(f"Running {screen.label}.")
+            path = borrowed.run_screen(screen.screener_url, screen.screen_id, download_dir,
+                                       cfg.download_timeout_in_sec)
+            seconds = time.perf_counter() - started
+        return downloads.keep_download(path, f"{screen.label}.csv"), seconds
+
+
+def run_screens(
+    screens: List[Screen],
+    cfg: PipelineConfig,
+    output_dir: Path = Path("."),
+    workers: int = 3,
+    process_workers: Optional[int] = None,
+) -> List[ScreenResult]:
+    """Download all screens concurrently and score each CSV with its model as soon as it arrives.
+
+    Downloads run on a bounded pool of browsers while finished CSVs are scored by a process pool,
+    so the total time approaches that of the slowest screen rather than the sum of all of them.
+
+    Args:
+        screens (List[Screen]): the saved screens to run.
+        cfg (PipelineConfig): the account, browser and output settings.
+        output_dir (Path): where to save the Excel files.
+        workers (int): the maximum number of browsers running at the same time.
+        process_workers (Optional[int]): the number of scoring processes. Defaults to the number of CPUs.
+
+    Returns:
+        List[ScreenResult]: a summary per screen, in the given order
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    results = [ScreenResult(screen) for screen in screens]
+    pool = BrowserPool(min(workers, len(screens)), cfg)
+    try:
+        pool.warm()
+        with ThreadPoolExecutor(max_workers=pool.size) as downloaders, \
+                ProcessPoolExecutor(max_workers=process_workers) as scorers:
+            downloading: Dict[Future, int] = {
+                downloaders.submit(download_screen, pool, screen, cfg): i for i, screen in enumerate(screens)
+            }
+            scoring: Dict[Future, int] = {}
+            for future in as_completed(downloading):
+                i = downloading[future]
+                result = results[i]
+                try:
+                    result.csv_path, result.download_seconds = future.result()
+                except Exception as e:
+                    result.error = f"{type(e).__name__}: {e}"
+                    _logger.error(f"{result.screen.label}: {result.error}")
+                    continue
+                _logger.info(f"{result.screen.label}: downloaded in {result.download_seconds:.2f}s, scoring.")
+                output_filename = output_dir / f"{result.csv_path.stem}-{result.screen.model}-Model.xlsx"
+                scoring[scorers.submit(process_one, result.screen.model, result.csv_path, output_filename, cfg)] = i
+            for future in as_completed(scoring):
+                result = results[scoring[future]]
+                scored: BatchResult = future.result()
+                result.output_path, result.n_rows, result.error = scored.output_path, scored.n_rows, scored.error
+                result.process_seconds = scored.seconds
+    finally:
+        pool.close()
+    print_summary(results)
+    return results
+
+
+def print_summary(results: List[ScreenResult]) -> None:
+    width = max(len(r.screen.label) for r in results)
+    for r in results:
+        if r.error is None:
+            status = (f"{r.n_rows:>8} rows  {r.download_seconds:>7.2f}s download  {r.process_seconds:>7.2f}s score  "
+                      f"{r.output_path}")
+        else:
+            status = f"FAILED  {r.error}"
+        print(f"{r.screen.label:<{width}}  {status}")
+    n_failed = sum(r.error is not None for r in results)
+    print(f"{len(results) - n_failed} succeeded, {n_failed} failed.")
+
+
+def schedule(
+    user: str,
+    password: str,
+    screens: Optional[Path] = None,
+    output_dir: Path = Path("."),
+    workers: int = 3,
+    process_workers: Optional[int] = None,
+    headless: bool = True,
+    excel_backend: str = "styleframe",
+    store_dir: Optional[str] = None,
+    browser_cache_dir: Optional[str] = None,
+) -> List[ScreenResult]:
+    """Run saved screens concurrently and score them.
+
+    Args:
+        user (str): the account user name.
+        password (str): the account password.
+        screens (Optional[Path]): a JSON file listing the screens. Defaults to the USA and ETF model screens.
+        output_dir (Path): where to save the Excel files.
+        workers (int): the maximum number of browsers running at the same time.
+        process_workers (Optional[int]): the number of scoring processes. Defaults to the number of CPUs.
+        headless (bool): run Chrome without a window.
+        excel_backend (str): "styleframe" or "xlsxwriter".
+        store_dir (Optional[str]): also persist every snapshot to this snapshot store.
+        browser_cache_dir (Optional[str]): where the chromedriver, Chrome profiles and session cookies are kept.
+
+    Returns:
+        List[ScreenResult]: a summary per screen
+    """
+    cfg = PipelineConfig(user, password, headless=headless, download_dir=os.fspath(output_dir),
+                         excel_backend=excel_backend, store_dir=store_dir, browser_cache_dir=browser_cache_dir)
+    return run_screens(DEFAULT_SCREENS if screens is None else load_screens(screens), cfg, output_dir, workers,
+                       process_workers)
+
+
+if __name__ == "__main__":
+    summary = CLI(schedule, as_positional=False)
+    if any(r.error is not None for r in summary):
+        raise SystemExit(1)
@@ -0,0 +1,261 @@
+"""A local HTTP service that scores CSV exports with warm models, for tools that cannot run the GUI.
+
+Usage:
+    python -m mypackage.service --port 8765 --workers 4 --data_dir exports
+
+Score an upload, or a file inside ``data_dir``, and get JSON, CSV or the styled workbook back, optionally
+only its ``top`` best rows::
+
+    curl --data-binary @export.csv "http://127.0.0.1:8765/score/USA?format=csv&top=50"
+    curl -o scored.xlsx "http://127.0.0.1:8765/score/ETF?format=xlsx&path=etf.csv" -X POST
+
+The interpreter, pandas and the models are loaded once, so a request only pays for the scoring itself.
+JSON and CSV are streamed in chunks as they are rendered.
+"""
+from __future__ import annotations
+
+import io
+import json
+import logging
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterator, Optional, Tuple, Union
+from urllib.parse import parse_qs, urlparse
+
+from jsonargparse import CLI
+
+from mypackage.main import MODELS, AbstractModelPipeline, PipelineConfig
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+_logger = logging.getLogger("USA Model")
+
+CHUNK_ROWS = 10_000
+CHUNK_BYTES = 2**16
+MAX_UPLOAD_BYTES = 2**30
+CONTENT_TYPES = {
+    "json": "application/json",
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+class RequestError(Exception):
+    def __init__(self, status: HTTPStatus, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+class ScoringService:
+    """The warm models behind the HTTP handler.
+
+    Args:
+        cfg (PipelineConfig): the scoring settings, e.g. the Excel backend and the snapshot store.
+        data_dir (Optional[Path]): requests may score files by path inside this folder. Scoring by path
+            is refused when omitted.
+    """
+
+    def __init__(self, cfg: PipelineConfig, data_dir: Optional[Path] = None) -> None:
+        self.cfg = cfg
+        self.data_dir = None if data_dir is None else Path(data_dir).resolve()
+        self.pipelines: Dict[str, AbstractModelPipeline] = {name: cls(cfg) for name, cls in MODELS.items()}
+        self.warm()
+
+    def warm(self) -> None:
+        """Import everything a request needs, so the first request is as fast as the next ones."""
+        import pandas  # noqa: F401
+
+        from mypackage import dtypes, excel, parsing, ranking, readers  # noqa: F401
+
+        if self.cfg.excel_backend == "styleframe":
+            import styleframe  # noqa: F401
+
+    def resolve(self, path: str) -> Path:
+        if self.data_dir is None:
+            raise RequestError(HTTPStatus.FORBIDDEN, "Scoring by path is disabled, start the service with a data_dir.")
+        resolved = (self.data_dir / path).resolve()
+        if not resolved.is_relative_to(self.data_dir):
+            raise RequestError(HTTPStatus.FORBIDDEN, f"{path} is outside the data directory.")
+        if not resolved.is_file():
+            raise RequestError(HTTPStatus.NOT_FOUND, f"{path} does not exist.")
+        return resolved
+
+    def score(self, model: str, source: Union[Path, io.BytesIO]) -> Tuple[AbstractModelPipeline, pd.DataFrame]:
+        pipeline = self.pipelines.get(model)
+        if pipeline is None:
+            raise RequestError(HTTPStatus.NOT_FOUND, f"Unknown model {model!r}, expected one of {list(MODELS)}")
+        try:
+            with pipeline.span("request"):
+                return pipeline, pipeline.process(source)
+        except (ValueError, KeyError) as e:
+            raise RequestError(HTTPStatus.UNPROCESSABLE_ENTITY, f"Cannot score this export: {e}") from e
+
+
+def render_chunks(df: pd.DataFrame, output_format: str) -> Iterator[bytes]:
+    """Render a processed frame as JSON records or CSV, ``CHUNK_ROWS`` rows at a time."""
+    for start in range(0, max(len(df), 1), CHUNK_ROWS):
+        chunk = df.iloc[start:start + CHUNK_ROWS]
+        if output_format == "csv":
+            yield chunk.to_csv(index=False, header=start == 0).encode()
+            continue
+        records = chunk.to_json(orient="records", date_format="iso")[1:-1]
+        yield (("[" if start == 0 else ",") + records).encode() if records else b"["
+    if output_format == "json":
+        yield b"]"
+
+
+class ScoringHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 for chunked responses; every connection still serves a single request
+    protocol_version = "HTTP/1.1"
+    server: PooledHTTPServer
+
+    def log_message(self, format: str, *args) -> None:
+        _logger.info(f"{self.address_string()} {format % args}")
+
+    def do_GET(self) -> None:
+        if urlparse(self.path).path != "/health":
+            return self.send_json(HTTPStatus.NOT_FOUND, {"error": "Not found."})
+        self.send_json(HTTPStatus.OK, {"status": "ok", "models": list(MODELS)})
+
+    def do_POST(self) -> None:
+        url = urlparse(self.path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        parts = url.path.strip("/").split("/")
+        try:
+            if len(parts) != 2 or parts[0] != "score":
+                raise RequestError(HTTPStatus.NOT_FOUND, "Not found, POST to /score/<model>.")
+            output_format = query.get("format", "json")
+            if output_format not in CONTENT_TYPES:
+                raise RequestError(HTTPStatus.BAD_REQUEST, f"Unknown format {output_format!r}, "
+                                                           f"expected one of {list(CONTENT_TYPES)}")
+            top = query.get("top")
+            if top is not None and not (top.isdigit() and int(top) > 0):
+                raise RequestError(HTTPStatus.BAD_REQUEST, f"top must be a positive number of rows, got {top!r}")
+            service = self.server.service
+            source = service.resolve(query["path"]) if "path" in query else self.read_upload()
+            pipeline, processed = service.score(parts[1], source)
+            if top is not None:
+                processed = pipeline.top(processed, int(top))
+        except RequestError as e:
+            return self.send_json(e.status, {"error": str(e)})
+        except Exception as e:
+            _logger.exception("Scoring failed.")
+            return self.send_json(HTTPStatus.INTERNAL_SERVER_ERROR, {"error": f"{type(e).__name__}: {e}"})
+        if output_format == "xlsx":
+            self.send_workbook(pipeline, processed)
+        else:
+            self.send_chunked(CONTENT_TYPES[output_format], render_chunks(processed, output_format))
+
+    def read_upload(self) -> io.BytesIO:
+        length = int(self.headers.get("Content-Length") or 0)
+        if length == 0:
+            raise RequestError(HTTPStatus.BAD_REQUEST, "Upload a CSV export as the request body, or pass a path.")
+        if length > MAX_UPLOAD_BYTES:
+            raise RequestError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "The upload is too large.")
+        return io.BytesIO(self.rfile.read(length))
+
+    def send_json(self, status: HTTPStatus, body: dict) -> None:
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", CONTENT_TYPES["json"])
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def send_chunked(self, content_type: str, chunks: Iterator[bytes]) -> None:
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        for chunk in chunks:
+            if chunk:
+                self.wfile.write(f"{len(chunk):X}\r\n".encode() + chunk + b"\r\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def send_workbook(self, pipeline: AbstractModelPipeline, processed: pd.DataFrame) -> None:
+        with tempfile.TemporaryDirectory(prefix="zacks-service-") as tmp:
+            path = pipeline.style_as_excel_and_save(processed, Path(tmp) / pipeline.output_filename)
+            self.send_response(HTTPStatus.OK)
+            self.send_header("Content-Type", CONTENT_TYPES["xlsx"])
+            self.send_header("Content-Length", str(os.path.getsize(path)))
+            self.send_header("Content-Disposition", f'attachment; filename="{path.name}"')
+            self.send_header("Connection", "close")
+            self.end_headers()
+            with open(path, "rb") as f:
+                shutil.copyfileobj(f, self.wfile, CHUNK_BYTES)
+
+
+class PooledHTTPServer(HTTPServer):
+    """Handles requests on a fixed pool of threads, queueing the rest, instead of a thread per request.
+
+    Args:
+        address (Tuple[str, int]): the host and port to listen on.
+        service (ScoringService): the warm models.
+        workers (int): the number of requests scored at the same time.
+    """
+
+    def __init__(self, address: Tuple[str, int], service: ScoringService, workers: int = 4) -> None:
+        super().__init__(address, ScoringHandler)
+        self.service = service
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="service")
+
+    def process_request(self, request, client_address) -> None:
+        self.pool.submit(self._process_request, request, client_address)
+
+    def _process_request(self, request, client_address) -> None:
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self) -> None:
+        super().server_close()
+        self.pool.shutdown(wait=True)
+
+
+def serve(
+    host: str = "127.0.0.1",
+    port: int = 8765,
+    workers: int = 4,
+    data_dir: Optional[Path] = None,
+    excel_backend: str = "xlsxwriter",
+    store_dir: Optional[str] = None,
+    metrics_path: Optional[str] = None,
+    prometheus_path: Optional[str] = None,
+) -> None:
+    """Serve scoring requests until interrupted.
+
+    Args:
+        host (str): the address to listen on. Keep the default to only accept local requests.
+        port (int): the port to listen on.
+        workers (int): the number of requests scored at the same time.
+        data_dir (Optional[Path]): allow scoring files by path inside this folder.
+        excel_backend (str): "styleframe" or "xlsxwriter", for xlsx responses.
+        store_dir (Optional[str]): also persist every scored snapshot to this snapshot store.
+        metrics_path (Optional[str]): append a JSON line per stage span to this file.
+        prometheus_path (Optional[str]): keep a Prometheus textfile with the latest requests.
+    """
+    cfg = PipelineConfig(user="", password="", excel_backend=excel_backend, store_dir=store_dir,
+                         metrics_path=metrics_path, prometheus_path=prometheus_path)
+    server = PooledHTTPServer((host, port), ScoringService(cfg, data_dir), workers)
+    _logger.info(f"Serving on http://{host}:{server.server_port} with {workers} workers.")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        _logger.info("Stopped serving.")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    CLI(serve, as_positional=False)
@@ -0,0 +1,90 @@
+"""Machine-readable outputs of a processed frame: Parquet, Arrow IPC (Feather) and CSV.
+
+The frame is converted to one Arrow table and every format is written from that table on its own
+thread, so no format copies the frame again. Arrow files are written uncompressed so that readers
+can memory-map them::
+
+    table = pyarrow.ipc.open_file(pyarrow.memory_map("USA-Model.arrow")).read_all()
+
+More formats can be added with ``register_sink``.
+"""
+from __future__ import annotations
+
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Sequence
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+
+
+@dataclass(frozen=True)
+class Sink:
+    suffix: str
+    write: Callable[[pa.Table, Path], None]
+
+
+SINKS: Dict[str, Sink] = {
+    "parquet": Sink(".parquet", lambda table, path: pq.write_table(table, path, compression="zstd")),
+    "arrow": Sink(".arrow", lambda table, path: feather.write_feather(table, path, compression="uncompressed")),
+    "csv": Sink(".csv", lambda table, path: pa_csv.write_csv(table, path)),
+}
+
+
+def register_sink(name: str, suffix: str, write: Callable[[pa.Table, Path], None]) -> None:
+    """Add an output format, written by ``write(table, path)`` to a file ending with ``suffix``."""
+    SINKS[name] = Sink(suffix, write)
+
+
+def check_formats(formats: Sequence[str]) -> None:
+    """Raise a ValueError if a format is not one of ``SINKS``."""
+    unknown = [name for name in formats if name not in SINKS]
+    if unknown:
+        raise ValueError(f"Unknown output formats {unknown}, expected some of {list(SINKS)}")
+
+
+def _write_atomically(sink: Sink, table: pa.Table, path: Path) -> Path:
+    # readers never see a half-written file, and concurrent saves of one path each write their own
+    with tempfile.NamedTemporaryFile(dir=path.parent, prefix=f".{path.name}-", delete=False) as tmp:
+        tmp_path = Path(tmp.name)
+    try:
+        sink.write(table, tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    return path
+
+
+def write_outputs(df: pd.DataFrame, base_path: Path, formats: Sequence[str]) -> Dict[str, Path]:
+    """Write a processed frame in several formats at the same time.
+
+    Args:
+        df (pd.DataFrame): a processed dataframe.
+        base_path (Path): the output path without its suffix, e.g. the Excel file's path.
+        formats (Sequence[str]): the formats, keys of ``SINKS``.
+
+    Raises:
+        ValueError: if a format is unknown.
+
+    Returns:
+        Dict[str, Path]: the written file of each format
+    """
+    check_formats(formats)
+    if not formats:
+        return {}
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    base_path = Path(base_path)
+    # pyarrow's writers release the GIL, so threads write the formats in parallel
+    with ThreadPoolExecutor(max_workers=len(formats), thread_name_prefix="sink") as pool:
+        futures = {
+            name: pool.submit(_write_atomically, SINKS[name], table, base_path.with_suffix(SINKS[name].suffix))
+            for name in formats
+        }
+        return {name: future.result() for name, future in futures.items()}
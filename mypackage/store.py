@@ -0,0 +1,121 @@
+"""A local Parquet store of processed snapshots, partitioned by model and snapshot date.
+
+Layout:
+    <root>/model=USA/date=2025-01-08/part-0.parquet
+"""
+from __future__ import annotations
+
+from datetime import date
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from mypackage import dtypes
+
+DATE_FIELD = pa.field("date", pa.date32())
+PARTITIONING = ds.partitioning(pa.schema([DATE_FIELD]), flavor="hive")
+
+# small row groups keep the per-group Ticker min/max statistics selective
+ROW_GROUP_SIZE = 1024
+
+
+class SnapshotStore:
+    def __init__(self, root: Path) -> None:
+        self.root = Path(root)
+
+    def partition_path(self, model: str, snapshot_date: date) -> Path:
+        return self.root / f"model={model}" / f"date={snapshot_date.isoformat()}"
+
+    def write(self, model: str, snapshot_date: date, df: pd.DataFrame) -> Path:
+        """Save a processed frame as the snapshot of ``model`` on ``snapshot_date``, replacing any previous one.
+
+        Args:
+            model (str): the model name (USA/ETF).
+            snapshot_date (date): the snapshot date.
+            df (pd.DataFrame): a processed dataframe.
+
+        Returns:
+            Path: path to the written Parquet file
+        """
+        table = pa.Table.from_pandas(dtypes.compact(df.sort_values("Ticker")), preserve_index=False)
+        path = self.partition_path(model, snapshot_date) / "part-0.parquet"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # files starting with "_" are ignored by dataset discovery
+        tmp_path = path.with_name("_" + path.name)
+        pq.write_table(table, tmp_path, row_group_size=ROW_GROUP_SIZE, compression="zstd")
+        tmp_path.replace(path)
+        return path
+
+    def dates(self, model: str) -> List[date]:
+        """List the snapshot dates stored for ``model``."""
+        return sorted(date.fromisoformat(p.name[len("date="):]) for p in (self.root / f"model={model}").glob("date=*"))
+
+    def load(
+        self,
+        model: str,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        columns: Optional[Sequence[str]] = None,
+        tickers: Optional[Sequence[str]] = None,
+    ) -> pd.DataFrame:
+        """Load the snapshots of ``model`` between ``start`` and ``end``, inclusive.
+
+        Partitions outside the date range are never opened, and the Ticker filter is pushed down to
+        the Parquet row groups.
+
+        Args:
+            model (str): the model name (USA/ETF).
+            start (Optional[date]): the first snapshot date. Defaults to the earliest.
+            end (Optional[date]): the last snapshot date. Defaults to the latest.
+            columns (Optional[Sequence[str]]): the columns to read. Defaults to all of them.
+            tickers (Optional[Sequence[str]]): only read these tickers. Defaults to all of them.
+
+        Returns:
+            pd.DataFrame: the matching rows, with a "date" column, ordered by date and Ticker
+        """
+        files = [self.partition_path(model, d) / "part-0.parquet" for d in self.dates(model)
+                 if (start is None or d >= start) and (end is None or d <= end)]
+        if not files:
+            raise FileNotFoundError(f"No {model} snapshots between {start} and {end} in {self.root}")
+        # compact dtypes can differ between snapshots, so read them all with the widest dtype of each column
+        schema = _unify_schemas([pq.read_schema(f) for f in files])
+        dataset = ds.dataset([str(f) for f in files], schema=schema.append(DATE_FIELD), format="parquet",
+                             partitioning=PARTITIONING, partition_base_dir=str(self.root / f"model={model}"))
+        condition = ds.field("Ticker").isin(list(tickers)) if tickers is not None else None
+        if columns is not None:
+            columns = ["date"] + [col for col in columns if col != "date"]
+        df = dataset.to_table(columns=columns, filter=condition).to_pandas()
+        sort_by = ["date", "Ticker"] if "Ticker" in df.columns else ["date"]
+        return df.sort_values(sort_by, ignore_index=True)
+
+
+def _promote(types: List[pa.DataType]) -> pa.DataType:
+    types = [t for t in types if not pa.types.is_null(t)] or types
+    if all(t == types[0] for t in types):
+        return types[0]
+    if any(pa.types.is_dictionary(t) for t in types):
+        # snapshots written before the grades were categorical hold them as plain strings
+        return _promote([t.value_type if pa.types.is_dictionary(t) else t for t in types])
+    if all(pa.types.is_integer(t) for t in types):
+        return max(types, key=lambda t: t.bit_width)
+    if all(pa.types.is_integer(t) or pa.types.is_floating(t) for t in types):
+        # float32 holds int8 and int16 exactly, but not every int32
+        exact_in_float32 = (pa.int8(), pa.int16(), pa.float32())
+        return pa.float32() if all(t in exact_in_float32 for t in types) else pa.float64()
+    if all(pa.types.is_string(t) or pa.types.is_large_string(t) for t in types):
+        return pa.large_string()
+    raise TypeError(f"Cannot unify column types {types}")
+
+
+def _unify_schemas(schemas: List[pa.Schema]) -> pa.Schema:
+    names: List[str] = []
+    for schema in schemas:
+        names.extend(name for name in schema.names if name not in names)
+    return pa.schema([
+        (name, _promote([schema.field(name).type for schema in schemas if name in schema.names]))
+        for name in names
+    ])
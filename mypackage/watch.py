@@ -0,0 +1,285 @@
+"""Watch folders for new Zacks CSV exports and score each one as soon as it is completely written.
+
+Usage:
+    python -m mypackage.watch --directories "[exports, ~/Downloads]" --output_dir scored --workers 2
+
+The model of each file is inferred from its header. Every scored (or failed) file is appended to a
+JSON lines ledger, so a restarted watcher skips the files it has already handled unless they change.
+"""
+from __future__ import annotations
+
+import csv
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from jsonargparse import CLI
+
+from mypackage import downloads
+from mypackage.batch import BatchResult, process_one, unique_stems
+from mypackage.main import MODELS, PipelineConfig
+
+_logger = logging.getLogger("USA Model")
+
+POLL_INTERVAL_IN_SEC = 1.0
+
+# a file's size and modification time, which change whenever it is written
+Signature = Tuple[int, int]
+
+
+def infer_model(path: Path) -> str:
+    """The model whose input columns all appear in the header of a CSV export.
+
+    Raises:
+        ValueError: if no model, or more than one, matches the header.
+    """
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        header = set(next(csv.reader(f), []))
+    cfg = PipelineConfig(user="", password="")
+    matches = [name for name, pipeline_class in MODELS.items() if set(pipeline_class(cfg).input_dtypes) <= header]
+    if len(matches) != 1:
+        raise ValueError(f"Cannot tell the model of {path.name} from its header, matching models: {matches}")
+    return matches[0]
+
+
+@dataclass
+class LedgerEntry:
+    path: str
+    size: int
+    mtime_ns: int
+    model: Optional[str] = None
+    output_path: Optional[str] = None
+    n_rows: int = 0
+    seconds: float = 0.0
+    error: Optional[str] = None
+    finished_at: float = 0.0
+
+
+class Ledger:
+    """The files already handled, kept as one JSON object per line so a crash loses at most the last line.
+
+    Args:
+        path (Path): the ledger file. Created on the first entry.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self._handled: Dict[str, Signature] = {}
+        if self.path.exists():
+            for line in self.path.read_text().splitlines():
+                try:
+                    entry = LedgerEntry(**json.loads(line))
+                except (ValueError, TypeError):
+                    _logger.warning(f"Skipping a malformed line of {self.path}")
+                    continue
+                self._handled[entry.path] = (entry.size, entry.mtime_ns)
+
+    def __len__(self) -> int:
+        return len(self._handled)
+
+    def handled(self, path: Path, signature: Signature) -> bool:
+        return self._handled.get(os.fspath(path)) == signature
+
+    def record(self, entry: LedgerEntry) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a") as f:
+            f.write(json.dumps(asdict(entry)) + "\n")
+        self._handled[entry.path] = (entry.size, entry.mtime_ns)
+
+
+class FolderWatcher:
+    """Scores the CSV exports that appear in ``directories``, at most ``workers`` at a time.
+
+    A file is picked up once its size and modification time have not changed for ``debounce_in_sec``,
+    so exports that are still being written or copied are left alone. Browsers' partial downloads
+    (``.crdownload`` and the like) are ignored until they are renamed.
+
+    Args:
+        directories (List[Path]): the folders to watch.
+        output_dir (Path): where to save the Excel files.
+        cfg (PipelineConfig): the scoring settings, e.g. the Excel backend and the snapshot store.
+        workers (int): the maximum number of files scored at the same time.
+        debounce_in_sec (float): how long a file must stay unchanged before it is scored.
+        ledger_path (Optional[Path]): the ledger file. Defaults to ``ledger.jsonl`` in ``output_dir``.
+    """
+
+    def __init__(
+        self,
+        directories: List[Path],
+        output_dir: Path,
+        cfg: PipelineConfig,
+        workers: int = 2,
+        debounce_in_sec: float = 2.0,
+        ledger_path: Optional[Path] = None,
+    ) -> None:
+        self.directories = [Path(d).expanduser().resolve() for d in directories]
+        # results from several folders are prefixed with their folder, so equal file names do not collide
+        self._prefixes = {directory: "" for directory in self.directories}
+        if len(self.directories) > 1:
+            self._prefixes = {directory: f"{name}-" for directory, name in unique_stems(self.directories).items()}
+        self.output_dir = Path(output_dir)
+        self.cfg = cfg
+        self.workers = workers
+        self.debounce_in_sec = debounce_in_sec
+        self.ledger = Ledger(ledger_path or self.output_dir / "ledger.jsonl")
+        # when each file was first seen with its current signature, on the monotonic clock
+        self._stable_since: Dict[Path, Tuple[Signature, float]] = {}
+        self._running: Dict[Future, Tuple[Path, Signature, str]] = {}
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # set by filesystem events and finished files to wake up the watch loop
+        self._changed = threading.Event()
+
+    def _candidates(self) -> Dict[Path, os.stat_result]:
+        found = {}
+        for directory in self.directories:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.name.lower().endswith(".csv") and entry.is_file():
+                        found[Path(entry.path)] = entry.stat()
+        return found
+
+    def scan(self) -> Tuple[List[Path], Optional[float]]:
+        """Submit every new file that has stopped changing.
+
+        Returns:
+            Tuple[List[Path], Optional[float]]: the submitted files, and the seconds until the next
+                file still settling is due, if any
+        """
+        now, wall_now = time.monotonic(), time.time()
+        running = {path for path, _, _ in self._running.values()}
+        submitted, next_due = [], None
+        candidates = self._candidates()
+        for path in list(self._stable_since):
+            if path not in candidates:
+                del self._stable_since[path]
+        for path, stat in candidates.items():
+            signature = (stat.st_size, stat.st_mtime_ns)
+            if path in running or self.ledger.handled(path, signature):
+                continue
+            seen = self._stable_since.get(path)
+            if seen is None or seen[0] != signature:
+                # a file untouched for a while, e.g. one that landed while the watcher was down, is already settled
+                seen = self._stable_since[path] = (signature, now - max(0.0, wall_now - stat.st_mtime))
+            remaining = self.debounce_in_sec - (now - seen[1])
+            if remaining > 0:
+                next_due = remaining if next_due is None else min(next_due, remaining)
+                continue
+            del self._stable_since[path]
+            self._submit(path, signature)
+            submitted.append(path)
+        return submitted, next_due
+
+    def _submit(self, path: Path, signature: Signature) -> None:
+        try:
+            model = infer_model(path)
+        except (ValueError, OSError, UnicodeDecodeError) as e:
+            _logger.error(f"{path.name}: {e}")
+            self.ledger.record(LedgerEntry(os.fspath(path), *signature, error=f"{type(e).__name__}: {e}",
+                                           finished_at=time.time()))
+            return
+        _logger.info(f"{path.name}: scoring with the {model} model.")
+        output_filename = self.output_dir / f"{self._prefixes[path.parent]}{path.stem}-{model}-Model.xlsx"
+        future = self._executor.submit(process_one, model, path, output_filename, self.cfg)
+        self._running[future] = (path, signature, model)
+        future.add_done_callback(lambda _: self._changed.set())
+
+    def harvest(self) -> List[LedgerEntry]:
+        """Record the files whose scoring has finished since the last call."""
+        entries = []
+        for future in [future for future in self._running if future.done()]:
+            path, signature, model = self._running.pop(future)
+            result: BatchResult = future.result()
+            entry = LedgerEntry(os.fspath(path), *signature, model=model, n_rows=result.n_rows,
+                                seconds=result.seconds, error=result.error, finished_at=time.time(),
+                                output_path=None if result.output_path is None else os.fspath(result.output_path))
+            if entry.error is None:
+                _logger.info(f"{path.name}: {entry.n_rows} rows -> {entry.output_path} ({entry.seconds:.2f}s)")
+            else:
+                _logger.error(f"{path.name}: {entry.error}")
+            self.ledger.record(entry)
+            entries.append(entry)
+        return entries
+
+    def run(self, stop: Optional[threading.Event] = None, use_events: Optional[bool] = None) -> None:
+        """Watch until ``stop`` is set, then wait for the files being scored.
+
+        Args:
+            stop (Optional[threading.Event]): set it to stop watching. Defaults to running until interrupted.
+            use_events (Optional[bool]): wake up on filesystem events with watchdog instead of polling every
+                second. Defaults to True when watchdog is installed.
+        """
+        stop = stop or threading.Event()
+        if use_events is None:
+            use_events = downloads.HAS_WATCHDOG
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        changed = self._changed
+        observer = None
+        if use_events:
+            from watchdog.events import FileSystemEventHandler
+            from watchdog.observers import Observer
+
+            class Handler(FileSystemEventHandler):
+                def on_any_event(self, event):
+                    changed.set()
+
+            observer = Observer()
+            for directory in self.directories:
+                observer.schedule(Handler(), str(directory), recursive=False)
+            observer.start()
+        _logger.info(f"Watching {', '.join(map(str, self.directories))} ({len(self.ledger)} files already handled).")
+        try:
+            with ProcessPoolExecutor(max_workers=self.workers) as self._executor:
+                while not stop.is_set():
+                    changed.clear()
+                    self.harvest()
+                    _, next_due = self.scan()
+                    # wake up on a filesystem event, a finished file or when the next settling file is due
+                    changed.wait(POLL_INTERVAL_IN_SEC if next_due is None else min(next_due, POLL_INTERVAL_IN_SEC))
+                for future in list(self._running):
+                    future.result()
+                self.harvest()
+        finally:
+            self._executor = None
+            if observer is not None:
+                observer.stop()
+                observer.join()
+
+
+def watch(
+    directories: List[Path],
+    output_dir: Path = Path("."),
+    workers: int = 2,
+    debounce_in_sec: float = 2.0,
+    ledger: Optional[Path] = None,
+    excel_backend: str = "styleframe",
+    store_dir: Optional[str] = None,
+    cache_dir: Optional[str] = None,
+) -> None:
+    """Score new CSV exports in ``directories`` as they land, until interrupted.
+
+    Args:
+        directories (List[Path]): the folders to watch.
+        output_dir (Path): where to save the Excel files.
+        workers (int): the maximum number of files scored at the same time.
+        debounce_in_sec (float): how long a file must stay unchanged before it is scored.
+        ledger (Optional[Path]): the ledger of handled files. Defaults to ``ledger.jsonl`` in ``output_dir``.
+        excel_backend (str): "styleframe" or "xlsxwriter".
+        store_dir (Optional[str]): also persist every snapshot to this snapshot store.
+        cache_dir (Optional[str]): reuse results cached in this directory for identical inputs.
+    """
+    cfg = PipelineConfig(user="", password="", excel_backend=excel_backend, store_dir=store_dir,
+                         cache_dir=cache_dir)
+    try:
+        FolderWatcher(directories, output_dir, cfg, workers, debounce_in_sec, ledger).run()
+    except KeyboardInterrupt:
+        _logger.info("Stopped watching.")
+
+
+if __name__ == "__main__":
+    CLI(watch, as_positional=False)
@@ -0,0 +1,301 @@
+"""Splice worksheets into an existing xlsx package without regenerating its other sheets.
+
+An xlsx file is a zip of XML parts. Appending a sheet only needs a new worksheet part plus small
+edits to the workbook manifest, its relationships, the content types and the shared style table;
+every existing worksheet part is copied over byte for byte. ``build_workbook`` uses this to render
+the sheets of a new workbook in parallel.
+"""
+from __future__ import annotations
+
+import io
+import os
+import re
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import IO, Callable, Dict, List, Optional, Sequence, Tuple, Union
+from xml.sax.saxutils import quoteattr
+
+XlsxSource = Union[Path, str, bytes, IO[bytes]]
+# renders a single-sheet workbook with the given sheet name
+SheetRenderer = Callable[[str], bytes]
+
+WORKSHEET_TYPE = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet"
+WORKSHEET_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"
+
+WORKBOOK = "xl/workbook.xml"
+WORKBOOK_RELS = "xl/_rels/workbook.xml.rels"
+CONTENT_TYPES = "[Content_Types].xml"
+STYLES = "xl/styles.xml"
+
+# the first custom number format id, lower ids are Excel built-ins
+FIRST_CUSTOM_NUM_FMT_ID = 164
+
+
+@dataclass
+class SheetPart:
+    """A rendered worksheet together with the style table its cells refer to."""
+
+    xml: str
+    styles: str
+    defined_names: List[str] = field(default_factory=list)
+
+
+def _open_zip(source: XlsxSource) -> zipfile.ZipFile:
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    return zipfile.ZipFile(source)
+
+
+def sheet_names(source: XlsxSource) -> List[str]:
+    """List the sheet names of a workbook, reading only its manifest."""
+    with _open_zip(source) as z:
+        return _sheet_names(z.read(WORKBOOK).decode("utf-8"))
+
+
+def _sheet_names(workbook: str) -> List[str]:
+    return [_unescape(name) for name in re.findall(r'<sheet\b[^>]*?\bname="([^"]*)"', workbook)]
+
+
+def read_sheet_part(source: XlsxSource) -> SheetPart:
+    """Extract the only worksheet of a single-sheet workbook written with inline strings.
+
+    Args:
+        source (XlsxSource): a workbook as a path, bytes or a binary file-like object.
+
+    Returns:
+        SheetPart: the worksheet XML, the workbook's styles and its sheet-local defined names
+    """
+    with _open_zip(source) as z:
+        names = [n for n in z.namelist() if n.startswith("xl/worksheets/") and n.endswith(".xml")]
+        if len(names) != 1:
+            raise ValueError(f"Expected a single worksheet, found {len(names)}")
+        if "xl/sharedStrings.xml" in z.namelist():
+            raise ValueError("Worksheets with a shared string table cannot be moved between workbooks")
+        workbook = z.read(WORKBOOK).decode("utf-8")
+        return SheetPart(
+            xml=z.read(names[0]).decode("utf-8"),
+            styles=z.read(STYLES).decode("utf-8"),
+            defined_names=re.findall(r'<definedName\b[^>]*\blocalSheetId="0"[^>]*>.*?</definedName>', workbook, re.S),
+        )
+
+
+def append_sheets(base: XlsxSource, sheets: Sequence[Tuple[str, SheetPart]], output: Union[Path, IO[bytes]]) -> None:
+    """Write a copy of ``base`` with ``sheets`` appended after its existing sheets.
+
+    Args:
+        base (XlsxSource): the existing workbook.
+        sheets (Sequence[Tuple[str, SheetPart]]): the sheet names and parts to append.
+        output (Union[Path, IO[bytes]]): where to write the new workbook.
+    """
+    with _open_zip(base) as zin:
+        parts: Dict[str, str] = {name: zin.read(name).decode("utf-8")
+                                 for name in (WORKBOOK, WORKBOOK_RELS, CONTENT_TYPES, STYLES)}
+        existing_names = _sheet_names(parts[WORKBOOK])
+        taken = set(zin.namelist())
+        new_parts: Dict[str, str] = {}
+        for name, sheet in sheets:
+            if name in existing_names:
+                raise ValueError(f"The workbook already has a sheet named {name!r}")
+            part_name = _next_free(taken, "xl/worksheets/sheet{}.xml")
+            taken.add(part_name)
+            sheet_index = len(existing_names)
+            existing_names.append(name)
+
+            parts[STYLES], xf_indices = _merge_styles(parts[STYLES], sheet.styles)
+            if xf_indices == list(range(len(xf_indices))):
+                # the sheet's styles are already the base's, e.g. sheets rendered by the same model
+                new_parts[part_name] = _unselect_tab(sheet.xml)
+            else:
+                new_parts[part_name] = _remap_sheet_styles(sheet.xml, xf_indices)
+
+            rel_id = _next_free(set(re.findall(r'\bId="([^"]+)"', parts[WORKBOOK_RELS])), "rId{}")
+            parts[WORKBOOK_RELS] = parts[WORKBOOK_RELS].replace(
+                "</Relationships>",
+                f'<Relationship Id="{rel_id}" Type="{WORKSHEET_TYPE}" '
+                f'Target="{part_name[len("xl/"):]}"/></Relationships>')
+            parts[CONTENT_TYPES] = parts[CONTENT_TYPES].replace(
+                "</Types>", f'<Override PartName="/{part_name}" ContentType="{WORKSHEET_CONTENT_TYPE}"/></Types>')
+            parts[WORKBOOK] = _add_to_manifest(parts[WORKBOOK], name, rel_id, sheet_index, sheet.defined_names)
+
+        with zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED) as zout:
+            for info in zin.infolist():
+                if info.filename in parts:
+                    zout.writestr(info, parts[info.filename].encode("utf-8"))
+                else:
+                    zout.writestr(info, zin.read(info))
+            for part_name, xml in new_parts.items():
+                zout.writestr(part_name, xml.encode("utf-8"))
+
+
+def _render(render: SheetRenderer, name: str) -> bytes:
+    return render(name)
+
+
+def build_workbook(sheets: Sequence[Tuple[str, SheetRenderer]], output: Union[Path, IO[bytes]],
+                   workers: Optional[int] = None) -> None:
+    """Render the sheets of a new workbook in worker processes, then assemble them in order.
+
+    Rendering is the slow part, so the save time follows the largest sheet rather than their sum;
+    only the style tables and the manifest are merged here.
+
+    Args:
+        sheets (Sequence[Tuple[str, SheetRenderer]]): the sheet names and their renderers. A renderer
+            returns a single-sheet workbook written with inline strings, e.g. by xlsxwriter in
+            ``constant_memory`` mode, and must be picklable to run in a worker process.
+        output (Union[Path, IO[bytes]]): where to write the workbook.
+        workers (Optional[int]): the number of worker processes. Defaults to one per sheet, up to the
+            number of CPUs. With 1 the sheets are rendered in this process.
+    """
+    if not sheets:
+        raise ValueError("A workbook needs at least one sheet")
+    names = [name for name, _ in sheets]
+    if len(set(names)) != len(names):
+        raise ValueError(f"The sheet names are not unique: {names}")
+    workers = workers or min(len(sheets), os.cpu_count() or 1)
+    if workers == 1 or len(sheets) == 1:
+        rendered = [render(name) for name, render in sheets]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            rendered = list(pool.map(_render, [render for _, render in sheets], names))
+    if len(rendered) == 1:
+        if isinstance(output, (str, Path)):
+            Path(output).write_bytes(rendered[0])
+        else:
+            output.write(rendered[0])
+        return
+    append_sheets(rendered[0], [(name, read_sheet_part(data)) for name, data in zip(names[1:], rendered[1:])],
+                  output)
+
+
+def _next_free(taken: set, pattern: str) -> str:
+    i = 1
+    while pattern.format(i) in taken:
+        i += 1
+    return pattern.format(i)
+
+
+def _unescape(value: str) -> str:
+    return (value.replace("&lt;", "<").replace("&gt;", ">").replace("&quot;", '"')
+            .replace("&apos;", "'").replace("&amp;", "&"))
+
+
+def _add_to_manifest(workbook: str, name: str, rel_id: str, sheet_index: int, defined_names: List[str]) -> str:
+    prefix_match = re.search(r'<sheet\b[^>]*?\b(\w+):id="', workbook)
+    prefix = prefix_match.group(1) if prefix_match else "r"
+    sheet_ids = [int(i) for i in re.findall(r'<sheet\b[^>]*?\bsheetId="(\d+)"', workbook)]
+    sheet = f'<sheet name={quoteattr(name)} sheetId="{max(sheet_ids, default=0) + 1}" {prefix}:id="{rel_id}"/>'
+    workbook = workbook.replace("</sheets>", sheet + "</sheets>", 1)
+
+    quoted_name = "'{}'!".format(name.replace("'", "''"))
+    local_names = [
+        re.sub(r">(?:'[^']*(?:''[^']*)*'|[^>!]*)!", lambda _: ">" + _escape_text(quoted_name),
+               defined_name.replace('localSheetId="0"', f'localSheetId="{sheet_index}"'), count=1)
+        for defined_name in defined_names
+    ]
+    if not local_names:
+        return workbook
+    if "</definedNames>" in workbook:
+        return workbook.replace("</definedNames>", "".join(local_names) + "</definedNames>", 1)
+    return workbook.replace("</sheets>", "</sheets><definedNames>" + "".join(local_names) + "</definedNames>", 1)
+
+
+def _escape_text(value: str) -> str:
+    return value.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def _remap_sheet_styles(xml: str, xf_indices: List[int]) -> str:
+    """Remap the cell, row and column style indices of a worksheet, and leave its tab unselected."""
+    def shift(match: re.Match) -> str:
+        return f'{match.group(1)}"{xf_indices[int(match.group(2))]}"'
+
+    xml = re.sub(r'(<c\b[^>]*?\bs=)"(\d+)"', shift, xml)
+    xml = re.sub(r'(<row\b[^>]*?\bs=)"(\d+)"', shift, xml)
+    xml = re.sub(r'(<col\b[^>]*?\bstyle=)"(\d+)"', shift, xml)
+    return _unselect_tab(xml)
+
+
+def _unselect_tab(xml: str) -> str:
+    return re.sub(r'\s+tabSelected="1"', "", xml, count=1)
+
+
+def _section(styles: str, name: str) -> Optional[re.Match]:
+    return re.search(rf"<{name}\b([^>]*?)\s*(?:/>|>(.*?)</{name}>)", styles, re.S)
+
+
+def _children(content: Optional[str], tag: str) -> List[str]:
+    if not content:
+        return []
+    return re.findall(rf"<{tag}(?:\s[^>]*?)?/>|<{tag}(?:\s[^>]*)?>.*?</{tag}>", content, re.S)
+
+
+def _append_to_section(styles: str, name: str, tag: str, items: List[str]) -> Tuple[str, List[int]]:
+    """Append items to a section of styles.xml, reusing identical existing items.
+
+    Returns:
+        Tuple[str, List[int]]: the new styles text, and the index of every item in the section
+    """
+    match = _section(styles, name)
+    if match is None:
+        if not items:
+            return styles, []
+        # numFmts is the only optional section we append to, and it comes first
+        opening = re.search(r"<styleSheet\b[^>]*>", styles)
+        assert opening is not None, "styles.xml has no styleSheet element"
+        section = f'<{name} count="{len(items)}">{"".join(items)}</{name}>'
+        return styles[:opening.end()] + section + styles[opening.end():], list(range(len(items)))
+    content = match.group(2) or ""
+    existing = {item: i for i, item in reversed(list(enumerate(_children(content, tag))))}
+    count = len(_children(content, tag))
+    indices, appended = [], []
+    for item in items:
+        if item not in existing:
+            existing[item] = count
+            appended.append(item)
+            count += 1
+        indices.append(existing[item])
+    attrs = re.sub(r'\s*\bcount="\d+"', "", match.group(1))
+    section = f'<{name}{attrs} count="{count}">{content}{"".join(appended)}</{name}>'
+    return styles[:match.start()] + section + styles[match.end():], indices
+
+
+def _merge_styles(base: str, other: str) -> Tuple[str, List[int]]:
+    """Add the fonts, fills, borders, number formats and cell formats of ``other`` to ``base``.
+
+    Returns:
+        Tuple[str, List[int]]: the merged styles, and the new index of each of ``other``'s cell formats
+    """
+    indices: Dict[str, List[int]] = {}
+    sections = (("fonts", "font", "fontId"), ("fills", "fill", "fillId"), ("borders", "border", "borderId"))
+    for name, tag, attr in sections:
+        section = _section(other, name)
+        base, indices[attr] = _append_to_section(base, name, tag, _children(section and section.group(2), tag))
+
+    base_num_fmts = _section(base, "numFmts")
+    used_ids = [int(i) for i in re.findall(r'numFmtId="(\d+)"', base_num_fmts.group(0))] if base_num_fmts else []
+    next_id = max(used_ids + [FIRST_CUSTOM_NUM_FMT_ID - 1]) + 1
+    num_fmt_ids: Dict[int, int] = {}
+    new_num_fmts = []
+    other_num_fmts = _section(other, "numFmts")
+    for num_fmt in _children(other_num_fmts and other_num_fmts.group(2), "numFmt"):
+        old_id = int(re.search(r'numFmtId="(\d+)"', num_fmt).group(1))  # type: ignore[union-attr]
+        num_fmt_ids[old_id] = next_id
+        new_num_fmts.append(num_fmt.replace(f'numFmtId="{old_id}"', f'numFmtId="{next_id}"'))
+        next_id += 1
+    base, _ = _append_to_section(base, "numFmts", "numFmt", new_num_fmts)
+
+    def remap(match: re.Match) -> str:
+        attr, value = match.group(1), int(match.group(2))
+        if attr == "numFmtId":
+            value = num_fmt_ids.get(value, value)
+        elif attr == "xfId":
+            value = 0  # the base workbook's "Normal" cell style
+        else:
+            value = indices[attr][value]
+        return f'{attr}="{value}"'
+
+    cell_xfs = _section(other, "cellXfs")
+    xfs = [re.sub(r'\b(numFmtId|fontId|fillId|borderId|xfId)="(\d+)"', remap, xf)
+           for xf in _children(cell_xfs and cell_xfs.group(2), "xf")]
+    return _append_to_section(base, "cellXfs", "xf", xfs)
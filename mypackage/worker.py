@@ -0,0 +1,115 @@
+"""Run pipelines on a background thread, so a window stays responsive while they read, score and save.
+
+The worker reports through a queue that the window drains from its own event loop::
+
+    worker = PipelineWorker(metrics.get_recorder())
+    worker.submit(lambda: pipeline.select_and_process(path))
+    ...
+    for event in worker.poll():
+        ...  # Event("stage", span), Event("log", line), then Event("done", path), "failed" or "cancelled"
+"""
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional
+
+from mypackage.metrics import Recorder, Span
+
+_logger = logging.getLogger("USA Model")
+
+
+class Cancelled(Exception):
+    """Raised inside a run at the first top-level stage boundary after ``PipelineWorker.cancel``."""
+
+
+@dataclass
+class Event:
+    kind: str
+    value: Any = None
+
+
+class _QueueLogHandler(logging.Handler):
+    def __init__(self, events: queue.Queue) -> None:
+        super().__init__()
+        self.events = events
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.events.put(Event("log", self.format(record)))
+
+
+class PipelineWorker:
+    """Runs one job at a time on a background thread and reports its stages, log lines and outcome.
+
+    Args:
+        recorder (Recorder): the recorder whose spans mark the stages of the jobs.
+        log_format (str): the format of the reported log lines.
+    """
+
+    def __init__(self, recorder: Recorder, log_format: str = "[%(asctime)s] %(levelname)s - %(message)s") -> None:
+        self.events: queue.Queue = queue.Queue()
+        self._cancel = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._log_handler = _QueueLogHandler(self.events)
+        self._log_handler.setFormatter(logging.Formatter(log_format, "%H:%M:%S"))
+        _logger.addHandler(self._log_handler)
+        self._recorder = recorder
+        recorder.add_listener(self._on_span)
+
+    @property
+    def busy(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def submit(self, job: Callable[[], Any]) -> None:
+        """Start ``job`` on the worker thread.
+
+        Raises:
+            RuntimeError: if the previous job is still running.
+        """
+        if self.busy:
+            raise RuntimeError("A run is already in progress.")
+        self._cancel.clear()
+        self._thread = threading.Thread(target=self._run, args=(job,), name="pipeline-worker", daemon=True)
+        self._thread.start()
+
+    def cancel(self) -> None:
+        """Stop the running job when its current top-level stage ends."""
+        if self.busy:
+            _logger.info("Cancelling after the current stage.")
+            self._cancel.set()
+
+    def poll(self) -> List[Event]:
+        """Take every event reported since the last poll, without blocking."""
+        events = []
+        while True:
+            try:
+                events.append(self.events.get_nowait())
+            except queue.Empty:
+                return events
+
+    def close(self) -> None:
+        _logger.removeHandler(self._log_handler)
+        self._recorder.remove_listener(self._on_span)
+
+    def _on_span(self, span: Span) -> None:
+        # spans of other threads, e.g. the scheduler's, are none of this worker's business
+        if threading.current_thread() is not self._thread:
+            return
+        self.events.put(Event("stage", span))
+        # only between the run's top-level stages, so no stage is left half done, e.g. a login or a sheet
+        if self._cancel.is_set() and span.error is None and span.depth <= 1:
+            raise Cancelled(f"Cancelled after {span.name}.")
+
+    def _run(self, job: Callable[[], Any]) -> None:
+        try:
+            result = job()
+        except Cancelled as e:
+            _logger.info(str(e))
+            self.events.put(Event("cancelled"))
+        except Exception as e:
+            _logger.exception("Run failed.")
+            self.events.put(Event("failed", e))
+        else:
+            self.events.put(Event("done", result))
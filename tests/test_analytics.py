@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+import rootutils
+
+from mypackage import analytics
+from mypackage.analytics import SnapshotCube
+from mypackage.main import PipelineConfig, USAModelPipeline
+
+root_path = rootutils.find_root(search_from=__file__, indicator=".project-root")
+
+
+def history(seed: int, n_dates: int = 12, n_tickers: int = 30) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    dates = [date(2025, 1, 1) + timedelta(weeks=i) for i in range(n_dates)]
+    tickers = [f"T{i:02d}" for i in range(n_tickers)]
+    # every ticker is listed for a stretch of weeks, some from the start or until the end
+    listed_from = rng.integers(0, n_dates // 2, n_tickers)
+    listed_until = rng.integers(n_dates // 2, n_dates + 1, n_tickers)
+    rows = [(d, t) for i, d in enumerate(dates)
+            for j, t in enumerate(tickers) if listed_from[j] <= i < listed_until[j]]
+    df = pd.DataFrame(rows, columns=["date", "Ticker"])
+    df["USA rankings"] = rng.integers(1, 6, len(df)).astype(float)
+    df["Total score"] = rng.normal(size=len(df)).round(1)
+    return df.sample(frac=1, random_state=seed)
+
+
+def reference_streaks(changes: pd.DataFrame) -> pd.DataFrame:
+    out = np.zeros(changes.shape, dtype=int)
+    direction = np.sign(changes.fillna(0).to_numpy())
+    for i in range(1, len(direction)):
+        run = out[i - 1] * direction[i] > 0
+        out[i] = np.where(run, out[i - 1] + direction[i], direction[i])
+    return pd.DataFrame(out, index=changes.index, columns=changes.columns)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_cube_statistics_match_pandas(seed: int):
+    df = history(seed)
+    columns = ["USA rankings", "Total score"]
+    cube = SnapshotCube.from_frame(df, columns)
+    changes, means, streaks = (analytics.deltas(cube.values), analytics.rolling_mean(cube.values, 3),
+                               analytics.streaks(cube.values))
+
+    for j, col in enumerate(columns):
+        wide = df.pivot(index="date", columns="Ticker", values=col).astype(np.float32)
+        np.testing.assert_array_equal(cube.values[:, :, j], wide.to_numpy())
+        np.testing.assert_allclose(changes[:, :, j], wide.diff().to_numpy(), rtol=1e-6)
+        np.testing.assert_allclose(means[:, :, j], wide.rolling(3, min_periods=1).mean().to_numpy(), rtol=1e-6)
+        np.testing.assert_array_equal(streaks[:, :, j], reference_streaks(wide.diff()).to_numpy())
+
+    summary = analytics.summary(cube, window=3)
+    latest = df[df["date"] == df["date"].max()].set_index("Ticker").sort_index()
+    assert list(summary.index) == list(latest.index)
+    np.testing.assert_array_equal(summary["USA rankings"], latest["USA rankings"])
+
+
+def test_movers():
+    df = pd.DataFrame({
+        "date": [date(2025, 1, 1)] * 4 + [date(2025, 1, 8)] * 4,
+        "Ticker": ["A", "B", "C", "D"] * 2,
+        "Potential ranking": [5, 1, 3, 2, 1, 4, 3, np.nan],
+    })
+    moved = analytics.movers(SnapshotCube.from_frame(df, ["Potential ranking"]), "Potential ranking", n=2)
+    assert list(moved["Ticker"]) == ["A", "B"]
+    assert list(moved["change"]) == [-4, 3]
+
+
+def test_analyze_stored_snapshots(tmp_path):
+    pytest.importorskip("pyarrow")
+    input_path = root_path / "tests" / "assets" / "usa" / "input.csv"
+    pipeline = USAModelPipeline(PipelineConfig("mock_user", "mock_password", store_dir=str(tmp_path / "store")))
+    for week in range(3):
+        pipeline.process(input_path, date(2025, 1, 1) + timedelta(weeks=week))
+
+    summary = analytics.analyze(tmp_path / "store", "USA", window=2, output=tmp_path / "analytics.csv")
+    processed = pipeline.read_csv_and_process(input_path).set_index("Ticker").sort_index()
+    assert list(summary.index) == list(processed.index)
+    assert (summary["Potential ranking change"] == 0).all()
+    assert (summary["Potential ranking streak"] == 0).all()
+    np.testing.assert_array_equal(summary["USA rankings 2 snapshots mean"], processed["USA rankings"])
+    assert (tmp_path / "analytics.csv").exists()
@@ -1,15 +1,25 @@
 from __future__ import annotations
 
+import subprocess
+import sys
+
+import numpy as np
 import pandas as pd
 import pytest
 import rootutils
 
+from mypackage import dtypes, ranking
 from mypackage.main import (AbstractModelPipeline, ETFModelPipeline,
-                            PipelineConfig, USAModelPipeline)
+                            PipelineConfig, USAModelPipeline, score_models)
 
 root_path = rootutils.find_root(search_from=__file__, indicator=".project-root")
 
 
+def as_read_back(processed: pd.DataFrame) -> pd.DataFrame:
+    """The letter grades as the plain strings ``pd.read_excel`` returns for the regression outputs."""
+    return processed.astype({col: object for col in processed.select_dtypes("category").columns})
+
+
 @pytest.mark.parametrize("pipeline_class,assets_folder", [(USAModelPipeline, "usa"), (ETFModelPipeline, "etf")])
 def test_read_csv_and_process(pipeline_class: type[AbstractModelPipeline], assets_folder: str):
     input_path = root_path / "tests" / "assets" / assets_folder / "input.csv"
@@ -18,4 +28,100 @@ def test_read_csv_and_process(pipeline_class: type[AbstractModelPipeline], asset
     pipeline = pipeline_class(config)
     processed = pipeline.read_csv_and_process(input_path).set_index("Index")
     regression_output = pd.read_excel(processed_path, index_col=0)
-    pd.testing.assert_frame_equal(processed, regression_output, check_dtype=False)
+    pd.testing.assert_frame_equal(as_read_back(processed), regression_output, check_dtype=False)
+
+
+@pytest.mark.parametrize("excel_backend", ["styleframe", "xlsxwriter"])
+@pytest.mark.parametrize("pipeline_class,assets_folder", [(USAModelPipeline, "usa"), (ETFModelPipeline, "etf")])
+def test_style_as_excel_and_save(pipeline_class: type[AbstractModelPipeline], assets_folder: str, excel_backend: str,
+                                 tmp_path):
+    if excel_backend == "xlsxwriter":
+        pytest.importorskip("xlsxwriter")
+    input_path = root_path / "tests" / "assets" / assets_folder / "input.csv"
+    processed_path = root_path / "tests" / "assets" / assets_folder / "output.xlsx"
+    config = PipelineConfig("mock_user", "mock_password", False, excel_backend=excel_backend)
+    pipeline = pipeline_class(config)
+    processed = pipeline.read_csv_and_process(input_path)
+    output_path = pipeline.style_as_excel_and_save(processed, tmp_path / "output.xlsx")
+    saved = pd.read_excel(output_path, index_col=0)
+    regression_output = pd.read_excel(processed_path, index_col=0)
+    pd.testing.assert_frame_equal(saved, regression_output, check_dtype=False)
+
+
+@pytest.mark.parametrize("excel_backend", ["styleframe", "xlsxwriter"])
+@pytest.mark.parametrize("keep_full_sheet", [False, True])
+def test_top_k_sheet(excel_backend: str, keep_full_sheet: bool, tmp_path):
+    if excel_backend == "xlsxwriter":
+        pytest.importorskip("xlsxwriter")
+    input_path = root_path / "tests" / "assets" / "usa" / "input.csv"
+    config = PipelineConfig("mock_user", "mock_password", False, excel_backend=excel_backend, top_k=4,
+                            keep_full_sheet=keep_full_sheet)
+    pipeline = USAModelPipeline(config)
+    processed = pipeline.read_csv_and_process(input_path)
+    if excel_backend == "styleframe" and keep_full_sheet:
+        with pytest.raises(ValueError, match="single sheet"):
+            pipeline.style_as_excel_and_save(processed, tmp_path / "output.xlsx")
+        return
+    output_path = pipeline.style_as_excel_and_save(processed, tmp_path / "output.xlsx")
+    saved = pd.read_excel(output_path, sheet_name=None, index_col=0)
+    assert list(saved) == (["Top 4", "Sheet1"] if keep_full_sheet else ["Top 4"])
+    expected = processed.sort_values("Potential ranking", kind="stable").head(4).set_index("Index")
+    pd.testing.assert_frame_equal(saved["Top 4"], as_read_back(expected), check_dtype=False)
+
+
+def test_processed_frame_is_compact():
+    input_path = root_path / "tests" / "assets" / "usa" / "input.csv"
+    pipeline = USAModelPipeline(PipelineConfig("mock_user", "mock_password", False))
+    processed = pipeline.read_csv_and_process(input_path)
+    grade_cols = ["VGM Score", "Momentum Score", "Value Score", "Growth Score"]
+    for col in grade_cols:
+        assert processed[col].dtype == dtypes.GRADE_DTYPE
+        assert processed[col].cat.ordered
+        assert list(processed[col].cat.categories) == ["A", "B", "C", "D", "F"]
+    # ranks fit their narrowest integers, and prices and volumes that float32 cannot hold exactly stay float64
+    expected = {"Zacks Rank": np.int8, "Zacks Industry Rank": np.int16}
+    expected.update({col: np.float64 for col in pipeline.data_columns if col not in grade_cols + list(expected)})
+    expected.update({col: np.int8 for col in pipeline.score_columns + pipeline.calculated_columns})
+    assert {col: processed[col].dtype for col in expected} == expected
+    assert processed.memory_usage(deep=True).sum() < 5 * 1024
+    with pytest.raises(ValueError, match="not grades"):
+        dtypes.to_grades(pd.Series(["A", "E", None], name="VGM Score"))
+
+
+def test_score_models_shares_ranks(monkeypatch):
+    input_path = root_path / "tests" / "assets" / "usa" / "input.csv"
+    usa = USAModelPipeline(PipelineConfig("mock_user", "mock_password", False))
+    momentum = usa.variant("USA Momentum", data_columns=["Zacks Rank", "Momentum Score", "% Price Change (4 Weeks)"])
+    value = usa.variant("USA Value", data_columns=["Zacks Rank", "Value Score", "Market Cap (mil)"],
+                        fundamentals_scores_columns=["score to Value Score"])
+    caches = []
+    monkeypatch.setattr(ranking, "RankCache", lambda df, cls=ranking.RankCache: caches.append(cls(df)) or caches[-1])
+
+    processed = score_models([usa, momentum, value], input_path)
+
+    assert len(caches) == 1 and len(caches[0]) == len(usa.data_columns)
+    regression_output = pd.read_excel(root_path / "tests" / "assets" / "usa" / "output.xlsx", index_col=0)
+    pd.testing.assert_frame_equal(as_read_back(processed["USA"].set_index("Index")), regression_output,
+                                  check_dtype=False)
+    for variant in (momentum, value):
+        alone = variant.read_csv_and_process(input_path)
+        pd.testing.assert_frame_equal(processed[variant.name], alone)
+        assert list(alone.columns) == variant.header_cols + [
+            col for pair in variant.pair_columns for col in pair] + variant.calculated_columns
+    assert value.fundamentals_scores_columns == ["score to Value Score"]
+    assert momentum.fundamentals_scores_columns == ["score to % Price Change (4 Weeks)"]
+
+
+def test_variant_rejects_unranked_column():
+    etf = ETFModelPipeline(PipelineConfig("mock_user", "mock_password", False))
+    with pytest.raises(ValueError, match="rank_ascend or rank_descend"):
+        etf.variant("ETF Plus", data_columns=etf.data_columns + ["Ticker"])
+    with pytest.raises(AttributeError):
+        etf.variant("ETF Typo", data_colums=[])
+
+
+def test_entry_point_imports_lazily():
+    # the CLI and the GUI shell must start without the heavy scientific stack
+    code = "import sys, mypackage.main; print(sorted({'pandas', 'styleframe', 'numpy'} & set(sys.modules)))"
+    result = subprocess.run([sys.executable, "-c", code], cwd=root_path, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "[]"
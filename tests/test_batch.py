@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import shutil
+from pathlib import Path
+
+import pytest
+import rootutils
+
+from mypackage.batch import BatchResult, batch, collect_inputs, print_summary, process_one, unique_stems
+from mypackage.main import PipelineConfig
+
+root_path = rootutils.find_root(search_from=__file__, indicator=".project-root")
+input_path = root_path / "tests" / "assets" / "usa" / "input.csv"
+
+
+def test_collect_inputs(tmp_path):
+    for name in ("b.csv", "a.csv", "notes.txt"):
+        (tmp_path / name).write_text("Ticker\n")
+    (tmp_path / "folder.csv").mkdir()
+
+    assert collect_inputs(str(tmp_path)) == [tmp_path / "a.csv", tmp_path / "b.csv"]
+    assert collect_inputs(str(tmp_path / "b*")) == [tmp_path / "b.csv"]
+    assert collect_inputs(str(tmp_path / "missing")) == []
+
+
+def test_unique_stems():
+    paths = [Path("exports/a/data.csv"), Path("exports/b/data.csv"), Path("exports/other.csv")]
+    assert unique_stems(paths) == {paths[0]: "a-data", paths[1]: "b-data", paths[2]: "other"}
+    with pytest.raises(ValueError, match="Cannot name"):
+        unique_stems([Path("x/a-b/data.csv"), Path("x/a/b/data.csv"), Path("x/a-b-data.csv")])
+
+
+def test_process_one_reports_errors(tmp_path):
+    (tmp_path / "broken.csv").write_text("not,an,export\n1,2,3\n")
+    result = process_one("USA", tmp_path / "broken.csv", tmp_path / "broken.xlsx", PipelineConfig("", ""))
+
+    assert result.output_path is None and result.n_rows == 0
+    assert "Company Name" in result.error
+
+
+def test_batch_keeps_files_with_the_same_name_apart(tmp_path, capsys):
+    pytest.importorskip("xlsxwriter")
+    for folder in ("monday", "tuesday"):
+        (tmp_path / "exports" / folder).mkdir(parents=True)
+        shutil.copy(input_path, tmp_path / "exports" / folder / "usa.csv")
+    (tmp_path / "exports" / "tuesday" / "broken.csv").write_text("not,an,export\n1,2,3\n")
+
+    results = batch(str(tmp_path / "exports" / "*" / "*.csv"), "USA", output_dir=tmp_path / "scored", workers=1,
+                    excel_backend="xlsxwriter")
+
+    assert [r.input_path.parent.name + "/" + r.input_path.name for r in results] == [
+        "monday/usa.csv", "tuesday/broken.csv", "tuesday/usa.csv"]
+    assert sorted(p.name for p in (tmp_path / "scored").iterdir()) == [
+        "monday-usa-USA-Model.xlsx", "tuesday-usa-USA-Model.xlsx"]
+    assert [r.error is None for r in results] == [True, False, True]
+    summary = capsys.readouterr().out.splitlines()
+    assert summary[-1] == "2 succeeded, 1 failed."
+    assert summary[1].startswith("broken.csv  FAILED") and "Company Name" in summary[1]
+
+
+def test_print_summary(capsys):
+    print_summary([BatchResult(Path("a.csv"), Path("a.xlsx"), n_rows=10, seconds=1.5),
+                   BatchResult(Path("longer.csv"), error="KeyError: 'Ticker'")])
+    assert capsys.readouterr().out.splitlines() == [
+        "a.csv             10 rows     1.50s  a.xlsx",
+        "longer.csv  FAILED  KeyError: 'Ticker'",
+        "1 succeeded, 1 failed.",
+    ]
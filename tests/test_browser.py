@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import stat
+
+from mypackage import browser
+
+
+def test_resolve_chromedriver_installs_once(tmp_path, monkeypatch):
+    installs = []
+
+    def install(version, cache_dir):
+        installs.append(version)
+        driver = cache_dir / version / "chromedriver"
+        driver.parent.mkdir(parents=True)
+        driver.write_text("#!/bin/sh\n")
+        driver.chmod(0o755)
+        return str(driver)
+
+    monkeypatch.setattr(browser, "_install_chromedriver", install)
+    first = browser.resolve_chromedriver(tmp_path, "114.0.5735.16")
+    second = browser.resolve_chromedriver(tmp_path, "114.0.5735.16")
+    assert first == second
+    assert installs == ["114.0.5735.16"]
+
+    # a driver removed from the cache is installed again
+    (tmp_path / "114.0.5735.16" / "chromedriver").unlink()
+    (tmp_path / "114.0.5735.16").rmdir()
+    browser.resolve_chromedriver(tmp_path, "114.0.5735.16")
+    assert len(installs) == 2
+
+
+def test_saved_cookies_expire(tmp_path):
+    path = tmp_path / "cookies.json"
+    assert browser.load_cookies(path) is None
+    cookies = [{"name": "sid", "value": "1", "expiry": 2000}, {"name": "session", "value": "2"}]
+    browser.save_cookies(path, cookies)
+    assert stat.S_IMODE(path.stat().st_mode) == 0o600
+    assert browser.load_cookies(path, now=1000) == cookies
+    assert browser.load_cookies(path, now=2000) is None
+
+
+def test_get_browser_restarts_when_settings_change(tmp_path, monkeypatch):
+    monkeypatch.setattr(browser, "_browsers", {})
+    first = browser.get_browser("user", "password", headless=True, cache_dir=tmp_path)
+    assert browser.get_browser("user", "password", headless=True, cache_dir=tmp_path) is first
+
+    windowed = browser.get_browser("user", "password", headless=False, cache_dir=tmp_path)
+    assert windowed is not first and not windowed.headless
+    attached = browser.get_browser("user", "password", headless=False, cache_dir=tmp_path,
+                                   debugger_address="127.0.0.1:9222")
+    assert attached is not windowed and attached.debugger_address == "127.0.0.1:9222"
+    assert list(browser._browsers.values()) == [attached]  # they would share a Chrome profile
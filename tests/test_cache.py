@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from pathlib import Path
+
+import pandas as pd
+import pytest
+import rootutils
+
+from mypackage.cache import ResultCache
+from mypackage.main import ETFModelPipeline, PipelineConfig, USAModelPipeline
+
+root_path = rootutils.find_root(search_from=__file__, indicator=".project-root")
+input_path = root_path / "tests" / "assets" / "usa" / "input.csv"
+
+
+def test_cache_hit_skips_processing(tmp_path, monkeypatch):
+    config = PipelineConfig("mock_user", "mock_password", cache_dir=str(tmp_path / "cache"))
+    pipeline = USAModelPipeline(config)
+    processed, first = pipeline.process_and_save(input_path, tmp_path / "first.xlsx")
+
+    def fail(*args, **kwargs):
+        raise AssertionError("expected a cache hit")
+
+    monkeypatch.setattr(pipeline, "read_csv_and_process", fail)
+    cached, second = pipeline.process_and_save(input_path, tmp_path / "second.xlsx")
+    pd.testing.assert_frame_equal(cached, processed)
+    assert second.read_bytes() == first.read_bytes()
+
+
+def test_cache_hit_still_stores_the_snapshot(tmp_path):
+    pytest.importorskip("pyarrow")
+    from mypackage.store import SnapshotStore
+
+    config = PipelineConfig("mock_user", "mock_password", cache_dir=str(tmp_path / "cache"),
+                            store_dir=str(tmp_path / "store"))
+    pipeline = USAModelPipeline(config)
+    dates = [date(2025, 1, 1), date(2025, 1, 8)]
+    for snapshot_date in dates:
+        # the same export again the next week
+        export = shutil.copyfile(input_path, tmp_path / f"{snapshot_date}.csv")
+        timestamp = datetime(snapshot_date.year, snapshot_date.month, snapshot_date.day, 12).timestamp()
+        os.utime(export, (timestamp, timestamp))
+        processed, _ = pipeline.process_and_save(export, tmp_path / f"{snapshot_date}.xlsx")
+
+    store = SnapshotStore(tmp_path / "store")
+    assert store.dates("USA") == dates
+    stored = store.load("USA", start=dates[1]).drop(columns="date")
+    pd.testing.assert_frame_equal(stored, processed.sort_values("Ticker", ignore_index=True), check_dtype=False)
+
+
+def test_cache_key_depends_on_model_definition():
+    config = PipelineConfig("mock_user", "mock_password")
+    usa, etf = USAModelPipeline(config), ETFModelPipeline(config)
+    data = input_path.read_bytes()
+    assert ResultCache.key(data, usa.model_definition()) == ResultCache.key(data, usa.model_definition())
+    assert ResultCache.key(data, usa.model_definition()) != ResultCache.key(data, etf.model_definition())
+    original_key = ResultCache.key(data, usa.model_definition())
+    usa.rank_descend = usa.rank_descend[:-1]
+    assert ResultCache.key(data, usa.model_definition()) != original_key
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    workbook = tmp_path / "workbook.xlsx"
+    workbook.write_bytes(b"x" * 1000)
+    frame = pd.DataFrame({"a": [1, 2, 3]})
+    cache = ResultCache(tmp_path / "cache", max_bytes=2**20)
+    cache.put("a", frame, workbook)
+    entry_size = sum(f.stat().st_size for f in (tmp_path / "cache" / "a").iterdir())
+    cache.max_bytes = 3 * entry_size
+    for key in ("b", "c"):
+        cache.put(key, frame, workbook)
+    copy = tmp_path / "copy.xlsx"
+    assert cache.get("a", copy) is not None  # "b" is now the least recently used
+    cache.put("d", frame, workbook)
+    assert cache.get("b", copy) is None
+    assert all(cache.get(key, copy) is not None for key in ("a", "c", "d"))
+
+
+def test_concurrent_puts_of_one_key(tmp_path):
+    workbook = tmp_path / "workbook.xlsx"
+    workbook.write_bytes(b"x" * 1000)
+    frame = pd.DataFrame({"a": [1, 2, 3]})
+    cache = ResultCache(tmp_path / "cache", max_bytes=2**20)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda _: cache.put("a", frame, workbook), range(16)))
+
+    pd.testing.assert_frame_equal(cache.get("a", tmp_path / "copy.xlsx").frame, frame)
+    assert [p.name for p in (tmp_path / "cache").iterdir()] == ["a"]
+
+
+@pytest.mark.parametrize("evict_after_load", [False, True])
+def test_eviction_during_get_is_a_miss(tmp_path, monkeypatch, evict_after_load):
+    workbook = tmp_path / "workbook.xlsx"
+    workbook.write_bytes(b"x" * 1000)
+    frame = pd.DataFrame({"a": [1, 2, 3]})
+    cache = ResultCache(tmp_path / "cache", max_bytes=2**20)
+    cache.put("a", frame, workbook)
+    read_pickle = pd.read_pickle
+
+    def read_pickle_while_evicting(path):
+        if evict_after_load:
+            loaded = read_pickle(path)
+        shutil.rmtree(tmp_path / "cache" / "a")  # another process evicts the entry
+        return loaded if evict_after_load else read_pickle(path)
+
+    monkeypatch.setattr(pd, "read_pickle", read_pickle_while_evicting)
+    copy = tmp_path / "copy.xlsx"
+    assert cache.get("a", copy) is None
+    assert not copy.exists()
+
+
+def test_evict_skips_vanished_entries(tmp_path, monkeypatch):
+    workbook = tmp_path / "workbook.xlsx"
+    workbook.write_bytes(b"x" * 1000)
+    frame = pd.DataFrame({"a": [1, 2, 3]})
+    cache = ResultCache(tmp_path / "cache", max_bytes=2**20)
+    for key in ("a", "b"):
+        cache.put(key, frame, workbook)
+    iterdir = Path.iterdir
+
+    def vanishing_iterdir(self):
+        if self.name == "a":
+            raise FileNotFoundError(self)
+        return iterdir(self)
+
+    monkeypatch.setattr(Path, "iterdir", vanishing_iterdir)
+    cache.max_bytes = 0
+    cache.evict()
+    assert not (tmp_path / "cache" / "b").exists()
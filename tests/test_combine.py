@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+import pandas as pd
+import pytest
+import rootutils
+
+from mypackage import workbook
+from mypackage.combine import combine
+
+pytest.importorskip("xlsxwriter")
+
+root_path = rootutils.find_root(search_from=__file__, indicator=".project-root")
+input_path = root_path / "tests" / "assets" / "usa" / "input.csv"
+etf_input_path = root_path / "tests" / "assets" / "etf" / "input.csv"
+regression_output = pd.read_excel(root_path / "tests" / "assets" / "usa" / "output.xlsx", index_col=0)
+
+
+def test_combine(tmp_path):
+    saved_path = combine({"ETF": etf_input_path, "USA": input_path}, tmp_path / "Models.xlsx", workers=1)
+
+    assert workbook.sheet_names(saved_path) == ["ETF", "USA"]
+    saved = pd.read_excel(saved_path, sheet_name="USA", index_col=0)
+    pd.testing.assert_frame_equal(saved, regression_output, check_dtype=False)
+    with pytest.raises(ValueError):
+        combine({"EU": input_path}, tmp_path / "x.xlsx")
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import zipfile
+
+import openpyxl
+import pandas as pd
+import pytest
+import rootutils
+
+from mypackage import workbook
+from mypackage.dashboard import update_dashboard
+from mypackage.main import PipelineConfig, USAModelPipeline
+
+pytest.importorskip("xlsxwriter")
+
+root_path = rootutils.find_root(search_from=__file__, indicator=".project-root")
+input_path = root_path / "tests" / "assets" / "usa" / "input.csv"
+regression_output = pd.read_excel(root_path / "tests" / "assets" / "usa" / "output.xlsx", index_col=0)
+
+
+def test_update_dashboard(tmp_path):
+    week1 = update_dashboard(input_path, "USA", output_dir=tmp_path, snapshot_date="01-01-2025")
+    week2 = update_dashboard(input_path, "USA", previous=week1, snapshot_date="08-01-2025")
+
+    assert week2 == tmp_path / "Dashboard 08-01-2025.xlsx"
+    assert workbook.sheet_names(week2) == ["01-01-2025", "08-01-2025"]
+    with zipfile.ZipFile(week1) as z1, zipfile.ZipFile(week2) as z2:
+        assert z1.read("xl/worksheets/sheet1.xml") == z2.read("xl/worksheets/sheet1.xml")
+    for sheet_name in ("01-01-2025", "08-01-2025"):
+        saved = pd.read_excel(week2, sheet_name=sheet_name, index_col=0)
+        pd.testing.assert_frame_equal(saved, regression_output, check_dtype=False)
+
+    with pytest.raises(ValueError):
+        update_dashboard(input_path, "USA", previous=week2, snapshot_date="08-01-2025", output_dir=tmp_path / "x")
+
+
+def test_update_styleframe_dashboard(tmp_path):
+    pipeline = USAModelPipeline(PipelineConfig("mock_user", "mock_password"))
+    week1 = pipeline.style_as_excel_and_save(pipeline.read_csv_and_process(input_path), tmp_path / "week1.xlsx")
+    week2 = update_dashboard(input_path, "USA", previous=week1, snapshot_date="08-01-2025")
+
+    wb = openpyxl.load_workbook(week2)
+    assert wb.sheetnames == ["Sheet1", "08-01-2025"]
+    old_sheet, new_sheet = wb["Sheet1"], wb["08-01-2025"]
+    assert new_sheet.freeze_panes == old_sheet.freeze_panes == "E2"
+    for old_row, new_row in zip(old_sheet.iter_rows(), new_sheet.iter_rows()):
+        for old_cell, new_cell in zip(old_row, new_row):
+            assert new_cell.value == old_cell.value
+            assert new_cell.fill.fgColor.rgb[-6:].lower() == old_cell.fill.fgColor.rgb[-6:].lower()
+            assert (new_cell.font.name, new_cell.font.sz) == (old_cell.font.name, old_cell.font.sz)
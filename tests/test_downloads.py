@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+
+import pytest
+
+from mypackage import downloads
+
+modes = [False, pytest.param(True, marks=pytest.mark.skipif(not downloads.HAS_WATCHDOG, reason="needs watchdog"))]
+
+
+def simulate_browser(directory, name="screen.csv", delay=0.2):
+    """Write a file in chunks under a .crdownload name, then rename it, like Chrome does."""
+    def run():
+        time.sleep(delay)
+        partial = directory / f"{name}.crdownload"
+        with open(partial, "w") as f:
+            for i in range(5):
+                f.write(f"Ticker,Value\nT{i},{i}\n")
+                f.flush()
+                time.sleep(0.05)
+        os.replace(partial, directory / name)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+@pytest.mark.parametrize("use_events", modes)
+def test_wait_for_download(tmp_path, use_events):
+    (tmp_path / "unrelated.csv").write_text("a,b\n")
+    with downloads.new_download_dir(tmp_path) as directory:
+        browser = simulate_browser(directory)
+        path = downloads.wait_for_download(directory, timeout_in_sec=5, use_events=use_events)
+        browser.join()
+        assert path == directory / "screen.csv"
+        kept = downloads.keep_download(path, "USA.csv")
+    assert kept == tmp_path / "USA.csv"
+    assert kept.read_text().count("Ticker") == 5
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["USA.csv", "unrelated.csv"]
+
+
+@pytest.mark.parametrize("use_events", modes)
+def test_wait_for_download_times_out(tmp_path, use_events):
+    start = time.monotonic()
+    with pytest.raises(RuntimeError, match="Timed out"), downloads.new_download_dir(tmp_path) as directory:
+        (directory / "screen.csv.crdownload").write_text("partial")
+        downloads.wait_for_download(directory, timeout_in_sec=0.3, use_events=use_events)
+    assert time.monotonic() - start < 2
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+import pytest
+import rootutils
+
+from mypackage.main import ETFModelPipeline, PipelineConfig
+
+pytest.importorskip("requests")
+
+root_path = rootutils.find_root(search_from=__file__, indicator=".project-root")
+assets_path = root_path / "tests" / "assets" / "etf"
+
+LOGIN_PAGE = b"<html><body><form>Please sign in</form></body></html>"
+
+
+class StandInZacks(BaseHTTPRequestHandler):
+    """Mimics the login form post and the screen export of the real site."""
+
+    logins = 0
+    exports = 0
+    valid_session = "session-1"
+
+    def do_POST(self):
+        form = parse_qs(self.rfile.read(int(self.headers["Content-Length"])).decode())
+        type(self).logins += 1
+        if form == {"username": ["mock_user"], "password": ["mock_password"]}:
+            self.send_response(200)
+            self.send_header("Set-Cookie", f"sid={self.valid_session}; Path=/")
+            self.end_headers()
+            self.wfile.write(b"<html>Welcome back</html>")
+        else:
+            self.send_response(200)
+            self.end_headers()
+            self.wfile.write(b"<html>Sign in failed</html>")
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        if f"sid={self.valid_session}" not in self.headers.get("Cookie", ""):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.end_headers()
+            self.wfile.write(LOGIN_PAGE)
+            return
+        assert query["screen_id"] == ["99985"]
+        type(self).exports += 1
+        body = (assets_path / "input.csv").read_bytes()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/csv")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stand_in_server():
+    StandInZacks.logins = StandInZacks.exports = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInZacks)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+def make_config(url: str, password: str = "mock_password") -> PipelineConfig:
+    return PipelineConfig("mock_user", password, fetch_mode="http", login_url=f"{url}/login",
+                          export_url=f"{url}/export?screen_id={{screen_id}}")
+
+
+def test_fetch_reuses_session(stand_in_server, tmp_path):
+    pipeline = ETFModelPipeline(make_config(stand_in_server))
+    first = pipeline.fetch_and_save(tmp_path / "first.xlsx")
+    second = pipeline.fetch_and_save(tmp_path / "second.xlsx")
+    assert (StandInZacks.logins, StandInZacks.exports) == (1, 2)
+
+    regression_output = pd.read_excel(assets_path / "output.xlsx", index_col=0)
+    for path in (first, second):
+        pd.testing.assert_frame_equal(pd.read_excel(path, index_col=0), regression_output, check_dtype=False)
+
+
+def test_fetch_logs_in_again_when_session_expires(stand_in_server):
+    pipeline = ETFModelPipeline(make_config(stand_in_server))
+    pipeline.fetch()
+    StandInZacks.valid_session = "session-2"
+    try:
+        pipeline.fetch()
+    finally:
+        StandInZacks.valid_session = "session-1"
+    assert (StandInZacks.logins, StandInZacks.exports) == (2, 2)
+
+
+def test_fetch_sign_in_failed(stand_in_server):
+    pipeline = ETFModelPipeline(make_config(stand_in_server, password="wrong"))
+    with pytest.raises(RuntimeError, match="Sign in failed"):
+        pipeline.fetch()
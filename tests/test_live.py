@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+import rootutils
+
+from mypackage.main import AbstractModelPipeline, ETFModelPipeline, PipelineConfig, USAModelPipeline
+
+pytest.importorskip("sortedcontainers")
+from mypackage.live import LiveScores, RankIndex  # noqa: E402
+
+root_path = rootutils.find_root(search_from=__file__, indicator=".project-root")
+
+
+@pytest.mark.parametrize("batch", [1, 3, 100])
+@pytest.mark.parametrize("seed", range(5))
+def test_rank_index_matches_pandas(seed: int, batch: int):
+    rng = np.random.default_rng(seed)
+    values = pd.Series(rng.integers(0, 8, 200).astype(float))
+    ascending = bool(seed % 2)
+    index = RankIndex(values.to_numpy(), ascending)
+    for _ in range(50):
+        rows = rng.choice(200, batch, replace=False)
+        keys = rng.integers(0, 8, batch).astype(float)
+        keys[rng.random(batch) < 0.1] = np.nan
+        before = index.ranks.copy()
+        changed = index.update(rows, keys)
+        values[rows] = keys
+        expected = values.rank(ascending=ascending, method="min").to_numpy()
+        np.testing.assert_array_equal(index.ranks, expected)
+        # every row whose rank moved is reported
+        moved = set(np.flatnonzero(~((before == expected) | (np.isnan(before) & np.isnan(expected)))).tolist())
+        assert moved <= changed
+
+
+@pytest.mark.parametrize("seed", range(3))
+@pytest.mark.parametrize("pipeline_class,assets_folder", [(USAModelPipeline, "usa"), (ETFModelPipeline, "etf")])
+def test_live_scores_match_a_full_run(pipeline_class: type[AbstractModelPipeline], assets_folder: str, seed: int):
+    rng = np.random.default_rng(seed)
+    pipeline = pipeline_class(PipelineConfig("mock_user", "mock_password"))
+    export = pipeline.read_csv(root_path / "tests" / "assets" / assets_folder / "input.csv")
+    live = LiveScores(pipeline, pipeline.score(pipeline.prepare(export.copy())))
+    ranked_inputs = [col for col in export.columns if col not in ("Company Name", "Ticker")]
+
+    for _ in range(10):
+        rows = rng.choice(len(export), int(rng.integers(1, 4)), replace=False)
+        for col in ranked_inputs:
+            for row in rows:
+                # another ticker's value makes ties, NaN drops out of the ranking
+                donor = export[col].iloc[int(rng.integers(len(export)))]
+                export.loc[row, col] = np.nan if rng.random() < 0.1 else donor
+        live.update(export.iloc[rows])
+
+        expected = pipeline.score(pipeline.prepare(export.copy()))
+        pd.testing.assert_frame_equal(live.frame, expected)
+
+
+def test_live_scores_reject_new_tickers():
+    pipeline = ETFModelPipeline(PipelineConfig("mock_user", "mock_password"))
+    export = pipeline.read_csv(root_path / "tests" / "assets" / "etf" / "input.csv")
+    live = LiveScores(pipeline, pipeline.score(pipeline.prepare(export.copy())))
+    export.loc[0, "Ticker"] = "NEW"
+    with pytest.raises(KeyError, match="NEW"):
+        live.update(export.iloc[[0]])
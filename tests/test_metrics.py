@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import rootutils
+
+from mypackage import metrics
+from mypackage.main import ETFModelPipeline, PipelineConfig
+
+root_path = rootutils.find_root(search_from=__file__, indicator=".project-root")
+input_path = root_path / "tests" / "assets" / "etf" / "input.csv"
+
+
+def test_pipeline_stages_are_recorded(tmp_path):
+    config = PipelineConfig("mock_user", "mock_password", excel_backend="xlsxwriter",
+                            metrics_path=str(tmp_path / "metrics.jsonl"), prometheus_path=str(tmp_path / "zacks.prom"))
+    pipeline = ETFModelPipeline(config)
+    seen = []
+    metrics.get_recorder(config.metrics_path, config.prometheus_path).add_listener(lambda span: seen.append(span.name))
+    with pipeline.span("run"):
+        pipeline.process_file(input_path, tmp_path / "output.xlsx")
+
+    spans = {span["name"]: span for span in map(json.loads, (tmp_path / "metrics.jsonl").read_text().splitlines())}
+    assert seen == ["read", "score", "process", "excel_write", "save_excel", "run"]
+    assert {span["run_id"] for span in spans.values()} == {spans["run"]["run_id"]}
+    assert {name: span["parent"] for name, span in spans.items()} == {
+        "read": "process", "score": "process", "process": "run", "excel_write": "save_excel", "save_excel": "run",
+        "run": None,
+    }
+    assert spans["read"]["rows"] == len(input_path.read_text().splitlines()) - 1
+    assert spans["process"]["columns"] == 22
+    assert all(span["model"] == "ETF" and span["error"] is None for span in spans.values())
+    assert spans["run"]["wall_seconds"] >= spans["process"]["wall_seconds"] + spans["save_excel"]["wall_seconds"]
+
+    prometheus = (tmp_path / "zacks.prom").read_text()
+    assert "# TYPE zacks_stage_wall_seconds gauge" in prometheus
+    assert 'zacks_stage_rows{model="ETF",stage="read"} 1136' in prometheus
+    assert 'zacks_stage_runs_total{model="ETF",stage="run"} 1' in prometheus
+
+
+def test_failed_span(tmp_path):
+    recorder = metrics.Recorder(prometheus_path=tmp_path / "zacks.prom")
+    with pytest.raises(RuntimeError):
+        with recorder.span("download", model="USA"):
+            raise RuntimeError("Sign in failed.")
+    assert 'zacks_stage_failures_total{model="USA",stage="download"} 1' in (tmp_path / "zacks.prom").read_text()
+
+
+def test_span_cpu_time_is_its_own_thread(tmp_path):
+    recorder = metrics.Recorder(prometheus_path=tmp_path / "zacks.prom")
+
+    def spin():
+        deadline = time.perf_counter() + 0.3
+        while time.perf_counter() < deadline:
+            pass
+
+    with recorder.span("wait") as span, ThreadPoolExecutor(max_workers=1) as pool:
+        pool.submit(spin).result()
+    assert span.wall_seconds >= 0.3
+    assert span.cpu_seconds < 0.1
+    assert "zacks_stage_process_peak_rss_bytes" in (tmp_path / "zacks.prom").read_text()
+
+
+def test_bound_spans_nest_across_threads():
+    recorder = metrics.Recorder()
+    finished = []
+    recorder.add_listener(finished.append)
+    with recorder.span("save", model="USA") as parent, ThreadPoolExecutor(max_workers=1) as pool:
+        def work():
+            with recorder.span("save_outputs"):
+                pass
+
+        pool.submit(recorder.bind(work)).result()
+        pool.submit(work).result()
+
+    bound, unbound, save = finished
+    assert (bound.parent, bound.run_id, bound.model) == ("save", parent.run_id, "USA")
+    assert unbound.parent is None and unbound.run_id != parent.run_id
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from mypackage import parsing
+
+
+@pytest.mark.parametrize("has_pyarrow", [True, False])
+def test_parse_numbers(monkeypatch, has_pyarrow: bool):
+    if has_pyarrow:
+        pytest.importorskip("pyarrow")
+    monkeypatch.setattr(parsing, "HAS_PYARROW", has_pyarrow)
+    df = pd.DataFrame({
+        "Yield": ["12.5%", "-0.25%", None, "3%"],
+        "Price": ["$1,234.50", "$ 1.5e3", "N/A", "$1.2.3"],
+        "Change": ["(3.2)", "4", ".5", "four"],
+        "Shares": ["1,000", "2,500,000", "", "7"],
+        "Typed": [1.0, 2.0, 3.0, 4.0],
+    })
+
+    report = parsing.parse_numbers(df, list(df.columns))
+
+    expected = pd.DataFrame({
+        "Yield": [12.5, -0.25, np.nan, 3.0],
+        "Price": [1234.5, 1500.0, np.nan, np.nan],
+        "Change": [-3.2, 4.0, 0.5, np.nan],
+        "Shares": [1000.0, 2500000.0, np.nan, 7.0],
+        "Typed": [1.0, 2.0, 3.0, 4.0],
+    })
+    pd.testing.assert_frame_equal(df, expected)
+    assert {col: cells.to_dict() for col, cells in report.items()} == {
+        "Price": {3: "$1.2.3"}, "Change": {3: "four"},
+    }
+
+
+@pytest.mark.parametrize("has_pyarrow", [True, False])
+def test_parse_numbers_formatted_after_the_first_rows(monkeypatch, has_pyarrow: bool):
+    if has_pyarrow:
+        pytest.importorskip("pyarrow")
+    monkeypatch.setattr(parsing, "HAS_PYARROW", has_pyarrow)
+    n = parsing.SAMPLE_SIZE + 500
+    plain = [str(i) for i in range(n)]
+    df = pd.DataFrame({
+        "Market Cap": plain[:-2] + ["$1,234.5", "(7)"],
+        "Yield": plain[:-1] + ["2.5%"],
+    })
+
+    report = parsing.parse_numbers(df, list(df.columns))
+
+    assert report == {}
+    assert list(df["Market Cap"].iloc[-3:]) == [n - 3, 1234.5, -7.0]
+    assert df["Yield"].iloc[-1] == 2.5
+
+
+def test_parse_dates():
+    df = pd.DataFrame({
+        "Report Date": ["Jan 05,2024", "Feb 29,2024", None],
+        "Next Report": ["2024-03-01", "2024-13-01", "--"],
+    })
+
+    report = parsing.parse_dates(df, ["Report Date", "Next Report"])
+
+    assert list(df["Report Date"]) == [pd.Timestamp("2024-01-05"), pd.Timestamp("2024-02-29"), pd.NaT]
+    assert df["Next Report"].iloc[0] == pd.Timestamp("2024-03-01") and df["Next Report"].iloc[1:].isna().all()
+    assert {col: cells.to_dict() for col, cells in report.items()} == {"Next Report": {1: "2024-13-01"}}
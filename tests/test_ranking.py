@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from mypackage import ranking
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_rank_min_matches_pandas(seed: int):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "ties": rng.integers(0, 5, 200).astype(float),
+        "floats": rng.normal(size=200),
+        "grades": rng.choice(list("ABCDF"), 200),
+    })
+    df.loc[rng.choice(200, 20, replace=False), "ties"] = np.nan
+    df.loc[rng.choice(200, 20, replace=False), "grades"] = np.nan
+    ascending = [True, False, True]
+
+    ranks = ranking.rank_min(ranking.to_rank_keys(df, list(df.columns)), ascending)
+
+    for j, (col, asc) in enumerate(zip(df.columns, ascending)):
+        expected = df[col].rank(ascending=asc, method="min").to_numpy()
+        np.testing.assert_array_equal(ranks[:, j], expected)
+
+
+@pytest.mark.parametrize("values", [
+    [np.inf, np.nan, 3.0, -np.inf, np.inf, 3.0],  # infinite values beside missing ones
+    [np.nan, np.nan, np.nan],
+    [1000.0, 1.0, np.nan, 1000.0, -5.0],  # integers too sparse to count
+    [2.5, 2.0, 2.5, np.nan],
+])
+@pytest.mark.parametrize("ascending", [True, False])
+def test_rank_min_edge_cases(values, ascending: bool):
+    # a C-ordered block, unlike the column-ordered one ``to_rank_keys`` returns
+    block = np.array([values, values[::-1]], dtype=np.float64).T
+
+    ranks = ranking.rank_min(block, [ascending, ascending])
+
+    for j in range(2):
+        expected = pd.Series(block[:, j]).rank(ascending=ascending, method="min").to_numpy()
+        np.testing.assert_array_equal(ranks[:, j], expected)
+
+
+def test_rank_cache_scores_are_one_shared_block():
+    df = pd.DataFrame({"a": [3.0, 1.0, np.nan, 1.0], "b": [10, 20, 30, 40]})
+    ranks = ranking.RankCache(df)
+
+    scores = ranks.scores(["a", "b"], [True, False])
+
+    assert list(scores.columns) == ["score to a", "score to b"]
+    np.testing.assert_array_equal(scores["score to a"], df["a"].rank(method="min") - 1)
+    np.testing.assert_array_equal(scores["score to b"], [3, 2, 1, 0])
+    assert ranks.scores(["a", "b"], [True, False]) is scores
+    assert len(ranks) == 2
+
+
+@pytest.mark.parametrize("k", [0, 1, 5, 50, 199, 200, 300])
+@pytest.mark.parametrize("seed", range(3))
+def test_top_k_matches_a_stable_sort(seed: int, k: int):
+    rng = np.random.default_rng(seed)
+    values = rng.integers(0, 10, 200).astype(float)
+    values[rng.choice(200, 30, replace=False)] = np.nan
+    values[rng.choice(200, 5, replace=False)] = np.inf
+
+    np.testing.assert_array_equal(ranking.top_k(values, k), np.argsort(values, kind="stable")[:k])
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import shutil
+import threading
+import time
+
+import pandas as pd
+import pytest
+import rootutils
+
+from mypackage import browser, scheduler
+from mypackage.main import PipelineConfig
+
+root_path = rootutils.find_root(search_from=__file__, indicator=".project-root")
+assets_path = root_path / "tests" / "assets"
+
+SCREEN_SECONDS = 0.5
+
+
+class StandInBrowser:
+    """Takes a while to "run" a screen, then saves the model's fixture CSV like Chrome would."""
+
+    started = 0
+    logins = 0
+    running = 0
+    max_running = 0
+    lock = threading.Lock()
+
+    def __init__(self, user, password, headless=True, cache_dir=None, chromedriver_version=None, profile="default",
+                 recorder=None):
+        self.profile = profile
+        type(self).started += 1
+
+    def ensure_logged_in(self):
+        type(self).logins += 1
+        return False
+
+    def run_screen(self, screener_url, screen_id, download_dir, timeout_in_sec):
+        cls = type(self)
+        with cls.lock:
+            cls.running += 1
+            cls.max_running = max(cls.max_running, cls.running)
+        time.sleep(SCREEN_SECONDS)
+        with cls.lock:
+            cls.running -= 1
+        model = "etf" if "etf" in screener_url else "usa"
+        return shutil.copy(assets_path / model / "input.csv", download_dir / "screen.csv")
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def stand_in_browser(monkeypatch):
+    StandInBrowser.started = StandInBrowser.logins = StandInBrowser.max_running = 0
+    monkeypatch.setattr(browser, "ZacksBrowser", StandInBrowser)
+
+
+def test_run_screens_concurrently(stand_in_browser, tmp_path):
+    screens = [
+        scheduler.Screen(str(i), f"https://www.zacks.com/screening/{model.lower()}-screener", model)
+        for i, model in enumerate(["USA", "ETF", "ETF", "USA"])
+    ]
+    cfg = PipelineConfig("mock_user", "mock_password", download_dir=str(tmp_path / "downloads"),
+                         excel_backend="xlsxwriter")
+    start = time.perf_counter()
+    results = scheduler.run_screens(screens, cfg, tmp_path / "scored", workers=2, process_workers=1)
+    assert time.perf_counter() - start < 10
+
+    assert (StandInBrowser.started, StandInBrowser.logins, StandInBrowser.max_running) == (2, 1, 2)
+    assert [r.error for r in results] == [None] * 4
+    for result in results:
+        # each screen's own download, not the time since the batch started
+        assert SCREEN_SECONDS <= result.download_seconds < 2 * SCREEN_SECONDS
+        assert result.csv_path.name == f"{result.screen.screen_id}.csv"
+        expected = pd.read_excel(assets_path / result.screen.model.lower() / "output.xlsx", index_col=0)
+        pd.testing.assert_frame_equal(pd.read_excel(result.output_path, index_col=0), expected, check_dtype=False)
+
+
+def test_load_screens_rejects_unknown_model(tmp_path):
+    path = tmp_path / "screens.json"
+    path.write_text('[{"screen_id": "1", "screener_url": "https://www.zacks.com/screening/stock-screener", '
+                    '"model": "EU"}]')
+    with pytest.raises(ValueError, match="Unknown model"):
+        scheduler.load_screens(path)
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import io
+import json
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+import rootutils
+
+from mypackage.main import PipelineConfig
+from mypackage.service import PooledHTTPServer, ScoringService
+
+root_path = rootutils.find_root(search_from=__file__, indicator=".project-root")
+assets_path = root_path / "tests" / "assets"
+
+
+@pytest.fixture(scope="module")
+def base_url():
+    pytest.importorskip("xlsxwriter")
+    cfg = PipelineConfig("", "", excel_backend="xlsxwriter")
+    server = PooledHTTPServer(("127.0.0.1", 0), ScoringService(cfg, data_dir=assets_path), workers=2)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+def post(url: str, data: bytes = b"") -> bytes:
+    with urllib.request.urlopen(urllib.request.Request(url, data=data, method="POST")) as response:
+        return response.read()
+
+
+def test_score_upload(base_url):
+    upload = (assets_path / "usa" / "input.csv").read_bytes()
+    expected = pd.read_excel(assets_path / "usa" / "output.xlsx", index_col=0)
+
+    as_json = pd.DataFrame(json.loads(post(f"{base_url}/score/USA", upload))).set_index("Index")
+    pd.testing.assert_frame_equal(as_json, expected, check_dtype=False)
+    as_csv = pd.read_csv(io.BytesIO(post(f"{base_url}/score/USA?format=csv", upload)), index_col="Index")
+    pd.testing.assert_frame_equal(as_csv, expected, check_dtype=False)
+    top = pd.DataFrame(json.loads(post(f"{base_url}/score/USA?top=3", upload))).set_index("Index")
+    pd.testing.assert_frame_equal(top, expected.sort_values("Potential ranking", kind="stable").head(3),
+                                  check_dtype=False)
+
+
+def test_score_path_concurrently(base_url):
+    expected = pd.read_excel(assets_path / "etf" / "output.xlsx", index_col=0)
+    with ThreadPoolExecutor(4) as pool:
+        workbooks = list(pool.map(lambda _: post(f"{base_url}/score/ETF?format=xlsx&path=etf/input.csv"), range(4)))
+    for workbook in workbooks:
+        pd.testing.assert_frame_equal(pd.read_excel(io.BytesIO(workbook), index_col=0), expected, check_dtype=False)
+
+
+@pytest.mark.parametrize("path,status", [
+    ("/score/EU", 404), ("/score/USA?path=../../pyproject.toml", 403), ("/score/USA?format=parquet", 400),
+    ("/score/USA", 400), ("/score/USA?top=-1", 400),
+])
+def test_bad_requests(base_url, path: str, status: int):
+    with pytest.raises(urllib.error.HTTPError) as info:
+        post(base_url + path, b"Ticker\nA\n" if "EU" in path else b"")
+    assert info.value.code == status and "error" in json.loads(info.value.read())
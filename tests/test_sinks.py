@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import json
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+import rootutils
+
+from mypackage.main import OUTPUT_FORMATS, PipelineConfig, USAModelPipeline
+
+pa = pytest.importorskip("pyarrow")
+import pyarrow.parquet as pq  # noqa: E402
+
+from mypackage import sinks  # noqa: E402
+
+root_path = rootutils.find_root(search_from=__file__, indicator=".project-root")
+input_path = root_path / "tests" / "assets" / "usa" / "input.csv"
+
+
+def test_outputs_alongside_the_workbook(tmp_path):
+    pytest.importorskip("xlsxwriter")
+    config = PipelineConfig("mock_user", "mock_password", excel_backend="xlsxwriter",
+                            output_formats=["parquet", "arrow", "csv"])
+    pipeline = USAModelPipeline(config)
+    processed, output_path = pipeline.process_and_save(input_path, tmp_path / "USA.xlsx")
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["USA.arrow", "USA.csv", "USA.parquet", "USA.xlsx"]
+    expected = processed.reset_index(drop=True)
+    pd.testing.assert_frame_equal(pd.read_parquet(tmp_path / "USA.parquet"), expected)
+    mapped = pa.ipc.open_file(pa.memory_map(str(tmp_path / "USA.arrow"))).read_all()
+    pd.testing.assert_frame_equal(mapped.to_pandas(), expected)
+    # CSV and Excel files hold the grades as plain strings
+    as_strings = expected.astype({col: object for col in expected.select_dtypes("category").columns})
+    pd.testing.assert_frame_equal(pd.read_csv(tmp_path / "USA.csv"), as_strings, check_dtype=False)
+    pd.testing.assert_frame_equal(pd.read_excel(output_path), as_strings, check_dtype=False)
+
+
+def test_unknown_output_format(tmp_path):
+    with pytest.raises(ValueError, match="Unknown output formats \\['orc'\\]"):
+        sinks.write_outputs(pd.DataFrame({"a": [1]}), tmp_path / "out.xlsx", ["csv", "orc"])
+    assert list(tmp_path.iterdir()) == []
+
+    with pytest.raises(ValueError, match="Unknown output formats \\['orc'\\]"):
+        PipelineConfig("mock_user", "mock_password", output_formats=["csv", "orc"])
+
+
+def test_config_knows_the_sinks_without_importing_them(monkeypatch):
+    assert set(OUTPUT_FORMATS) <= set(sinks.SINKS)
+    monkeypatch.setitem(sinks.SINKS, "orc", sinks.Sink(".orc", lambda table, path: None))
+    PipelineConfig("mock_user", "mock_password", output_formats=["orc"])
+
+    code = ("import sys; from mypackage.main import PipelineConfig; "
+            "PipelineConfig('u', 'p', output_formats=['parquet', 'arrow', 'csv']); "
+            "print(sorted({'pyarrow', 'pandas', 'mypackage.sinks'} & set(sys.modules)))")
+    result = subprocess.run([sys.executable, "-c", code], cwd=root_path, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "[]"
+
+
+def test_concurrent_saves_of_one_path(tmp_path):
+    table = pa.table({"a": list(range(1000))})
+    path = tmp_path / "out.parquet"
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda _: sinks._write_atomically(sinks.SINKS["parquet"], table, path), range(16)))
+    assert [p.name for p in tmp_path.iterdir()] == ["out.parquet"]
+    assert pq.read_table(path).equals(table)
+
+
+def test_outputs_span_nests_under_the_save(tmp_path):
+    pytest.importorskip("xlsxwriter")
+    config = PipelineConfig("mock_user", "mock_password", excel_backend="xlsxwriter", output_formats=["arrow"],
+                            metrics_path=str(tmp_path / "metrics.jsonl"))
+    pipeline = USAModelPipeline(config)
+    pipeline.process_and_save(input_path, tmp_path / "USA.xlsx")
+
+    spans = {span["name"]: span for span in map(json.loads, (tmp_path / "metrics.jsonl").read_text().splitlines())}
+    assert spans["save_outputs"]["parent"] == spans["save_excel"]["parent"] == "save"
+    assert spans["save_outputs"]["run_id"] == spans["save"]["run_id"]
+    assert spans["save_outputs"]["model"] == "USA"
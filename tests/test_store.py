@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+import rootutils
+
+from mypackage.combine import combine
+from mypackage.dashboard import update_dashboard
+from mypackage.main import PipelineConfig, USAModelPipeline, score_models
+
+pytest.importorskip("pyarrow")
+from mypackage.store import SnapshotStore  # noqa: E402
+
+root_path = rootutils.find_root(search_from=__file__, indicator=".project-root")
+input_path = root_path / "tests" / "assets" / "usa" / "input.csv"
+
+
+def test_snapshot_store(tmp_path):
+    config = PipelineConfig("mock_user", "mock_password", store_dir=str(tmp_path))
+    pipeline = USAModelPipeline(config)
+    dates = [date(2025, 1, 1), date(2025, 1, 8), date(2025, 1, 15)]
+    for snapshot_date in dates:
+        processed = pipeline.process(input_path, snapshot_date)
+
+    store = SnapshotStore(tmp_path)
+    assert store.dates("USA") == dates
+
+    loaded = store.load("USA", start=dates[1], columns=["Ticker", "USA rankings"], tickers=["AA", "A"])
+    assert list(loaded.columns) == ["date", "Ticker", "USA rankings"]
+    assert list(loaded["Ticker"]) == ["A", "AA", "A", "AA"]
+    assert sorted(set(loaded["date"])) == dates[1:]
+    expected = processed.set_index("Ticker").loc[["A", "AA"], "USA rankings"].to_numpy()
+    np.testing.assert_array_equal(loaded["USA rankings"].to_numpy()[:2], expected)
+
+    full = store.load("USA", start=dates[0], end=dates[0]).drop(columns="date")
+    expected = processed.sort_values("Ticker", ignore_index=True)
+    pd.testing.assert_frame_equal(full, expected, check_dtype=False)
+
+
+def test_load_snapshots_written_before_grades_were_categorical(tmp_path):
+    processed = USAModelPipeline(PipelineConfig("mock_user", "mock_password")).read_csv_and_process(input_path)
+    store = SnapshotStore(tmp_path)
+    store.write("USA", date(2025, 1, 1), processed.astype({"VGM Score": object}))
+    store.write("USA", date(2025, 1, 8), processed)
+
+    loaded = store.load("USA", columns=["Ticker", "VGM Score"])
+    expected = processed.sort_values("Ticker")["VGM Score"].astype(object).where(lambda s: s.notna(), None)
+    assert list(loaded["VGM Score"]) == list(expected) * 2
+
+
+def test_dashboard_combine_and_variants_persist_snapshots(tmp_path):
+    pytest.importorskip("xlsxwriter")
+    update_dashboard(input_path, "USA", output_dir=tmp_path, snapshot_date="01-01-2025",
+                     store_dir=str(tmp_path / "dashboard"))
+    assert SnapshotStore(tmp_path / "dashboard").dates("USA") == [date(2025, 1, 1)]
+
+    combine({"USA": input_path}, tmp_path / "Models.xlsx", workers=1, store_dir=str(tmp_path / "combine"))
+    assert len(SnapshotStore(tmp_path / "combine").dates("USA")) == 1
+
+    usa = USAModelPipeline(PipelineConfig("mock_user", "mock_password", store_dir=str(tmp_path / "variants")))
+    momentum = usa.variant("USA momentum", data_columns=usa.data_columns[:2])
+    processed = score_models([usa, momentum], input_path)
+    store = SnapshotStore(tmp_path / "variants")
+    for name, frame in processed.items():
+        stored = store.load(name).drop(columns="date")
+        pd.testing.assert_frame_equal(stored, frame.sort_values("Ticker", ignore_index=True), check_dtype=False)
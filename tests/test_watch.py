@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import shutil
+import threading
+import time
+
+import pytest
+import rootutils
+
+from mypackage.main import PipelineConfig
+from mypackage.watch import FolderWatcher, Ledger, infer_model
+
+root_path = rootutils.find_root(search_from=__file__, indicator=".project-root")
+assets_path = root_path / "tests" / "assets"
+
+
+def test_infer_model(tmp_path):
+    assert infer_model(assets_path / "usa" / "input.csv") == "USA"
+    assert infer_model(assets_path / "etf" / "input.csv") == "ETF"
+    (tmp_path / "other.csv").write_text("Ticker,Price\nA,1\n")
+    with pytest.raises(ValueError, match="matching models: \\[\\]"):
+        infer_model(tmp_path / "other.csv")
+
+
+@pytest.mark.parametrize("use_events", [False, True])
+def test_watcher_scores_new_exports_once(tmp_path, use_events: bool):
+    if use_events:
+        pytest.importorskip("watchdog")
+    inbox, output_dir = tmp_path / "inbox", tmp_path / "scored"
+    inbox.mkdir()
+    # landed while the watcher was down
+    shutil.copy(assets_path / "usa" / "input.csv", inbox / "usa.csv")
+    cfg = PipelineConfig("", "", excel_backend="xlsxwriter")
+    watcher = FolderWatcher([inbox], output_dir, cfg, workers=2, debounce_in_sec=0.3)
+    stop = threading.Event()
+    thread = threading.Thread(target=watcher.run, args=(stop, use_events))
+    thread.start()
+    try:
+        # a browser download: written under a partial name, then renamed
+        partial = inbox / "etf.csv.crdownload"
+        shutil.copy(assets_path / "etf" / "input.csv", partial)
+        partial.rename(inbox / "etf.csv")
+        (inbox / "notes.csv").write_text("Ticker,Price\nA,1\n")
+        deadline = time.monotonic() + 60
+        while len(watcher.ledger) < 3 and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        stop.set()
+        thread.join()
+
+    ledger = Ledger(output_dir / "ledger.jsonl")
+    assert len(ledger) == 3
+    assert sorted(p.name for p in output_dir.glob("*.xlsx")) == ["etf-ETF-Model.xlsx", "usa-USA-Model.xlsx"]
+
+    restarted = FolderWatcher([inbox], output_dir, cfg, debounce_in_sec=0)
+    assert restarted.scan() == ([], None)
+
+
+def test_watched_folders_keep_equal_file_names_apart(tmp_path):
+    inboxes = [tmp_path / "a" / "inbox", tmp_path / "b" / "inbox"]
+    for inbox in inboxes:
+        inbox.mkdir(parents=True)
+        shutil.copy(assets_path / "usa" / "input.csv", inbox / "usa.csv")
+    output_dir = tmp_path / "scored"
+    watcher = FolderWatcher(inboxes, output_dir, PipelineConfig("", "", excel_backend="xlsxwriter"),
+                            debounce_in_sec=0)
+    stop = threading.Event()
+    thread = threading.Thread(target=watcher.run, args=(stop, False))
+    thread.start()
+    try:
+        deadline = time.monotonic() + 60
+        while len(watcher.ledger) < 2 and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        stop.set()
+        thread.join()
+
+    outputs = sorted(p.name for p in output_dir.glob("*.xlsx"))
+    assert outputs == ["a-inbox-usa-USA-Model.xlsx", "b-inbox-usa-USA-Model.xlsx"]
@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import openpyxl
+import pandas as pd
+import pytest
+import rootutils
+
+from mypackage import workbook
+from mypackage.main import ETFModelPipeline, PipelineConfig, USAModelPipeline, save_workbook
+
+pytest.importorskip("xlsxwriter")
+
+root_path = rootutils.find_root(search_from=__file__, indicator=".project-root")
+input_path = root_path / "tests" / "assets" / "usa" / "input.csv"
+etf_input_path = root_path / "tests" / "assets" / "etf" / "input.csv"
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_save_workbook(tmp_path, workers: int):
+    cfg = PipelineConfig("mock_user", "mock_password", excel_backend="xlsxwriter")
+    usa, etf = USAModelPipeline(cfg), ETFModelPipeline(cfg)
+    momentum = usa.variant("USA Momentum", data_columns=["Zacks Rank", "Momentum Score", "% Price Change (4 Weeks)"])
+    sheets = {name: (model, model.read_csv_and_process(path))
+              for name, model, path in [("USA", usa, input_path), ("ETF", etf, etf_input_path),
+                                        ("USA Momentum", momentum, input_path)]}
+
+    saved_path = save_workbook(sheets, tmp_path / "Models.xlsx", workers=workers)
+
+    assert workbook.sheet_names(saved_path) == ["USA", "ETF", "USA Momentum"]
+    for sheet_name, (model, processed) in sheets.items():
+        alone = tmp_path / f"{sheet_name}.xlsx"
+        model.style_as_excel_and_save(processed.copy(), alone)
+        pd.testing.assert_frame_equal(pd.read_excel(saved_path, sheet_name=sheet_name, index_col=0),
+                                      pd.read_excel(alone, index_col=0))
+        assert processed.index[0] == 0
+    wb = openpyxl.load_workbook(saved_path)
+    assert [ws.freeze_panes for ws in wb.worksheets] == ["E2", etf.freeze_panes, "E2"]
+    assert wb["ETF"]["B2"].fill.fgColor.rgb[-6:].lower() == openpyxl.load_workbook(
+        tmp_path / "ETF.xlsx").active["B2"].fill.fgColor.rgb[-6:].lower()
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+
+import rootutils
+
+from mypackage import metrics
+from mypackage.main import ETFModelPipeline, PipelineConfig
+from mypackage.worker import PipelineWorker
+
+root_path = rootutils.find_root(search_from=__file__, indicator=".project-root")
+input_path = root_path / "tests" / "assets" / "etf" / "input.csv"
+
+
+def wait_for_outcome(worker: PipelineWorker, timeout: float = 30):
+    events = []
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        events += worker.poll()
+        if events and events[-1].kind in ("done", "failed", "cancelled"):
+            return events
+        time.sleep(0.01)
+    raise TimeoutError(events)
+
+
+def test_worker_runs_pipeline_off_the_calling_thread(caplog, tmp_path):
+    caplog.set_level(logging.INFO, logger="USA Model")
+    config = PipelineConfig("mock_user", "mock_password", excel_backend="xlsxwriter")
+    pipeline = ETFModelPipeline(config)
+    pipeline.output_filename = tmp_path / "output.xlsx"
+    worker = PipelineWorker(metrics.get_recorder(config.metrics_path, config.prometheus_path))
+    try:
+        worker.submit(lambda: pipeline.select_and_process(input_path))
+        events = wait_for_outcome(worker)
+    finally:
+        worker.close()
+
+    stages = [event.value.name for event in events if event.kind == "stage" and event.value.depth == 1]
+    assert stages == pipeline.stages[1:]
+    assert any(event.kind == "log" and "Reading CSV" in event.value for event in events)
+    assert events[-1].kind == "done" and events[-1].value == tmp_path / "output.xlsx"
+
+
+def test_worker_cancels_at_stage_boundary():
+    recorder = metrics.Recorder()
+    worker = PipelineWorker(recorder)
+    started, stages_run = threading.Event(), []
+
+    def job():
+        for i in range(100):
+            with recorder.span(f"stage {i}"):
+                started.set()
+                time.sleep(0.02)
+            stages_run.append(i)
+
+    try:
+        worker.submit(job)
+        started.wait(5)
+        worker.cancel()
+        events = wait_for_outcome(worker)
+    finally:
+        worker.close()
+    assert events[-1].kind == "cancelled"
+    assert len(stages_run) < 5
+
+
+def test_worker_cancels_between_top_level_stages_only():
+    recorder = metrics.Recorder()
+    worker = PipelineWorker(recorder)
+    started, inner_run = threading.Event(), []
+
+    def job():
+        with recorder.span("run"):
+            for i in range(100):
+                with recorder.span(f"stage {i}"):
+                    for j in range(3):
+                        with recorder.span("step"):
+                            started.set()
+                            time.sleep(0.02)
+                        inner_run.append((i, j))
+
+    try:
+        worker.submit(job)
+        started.wait(5)
+        worker.cancel()
+        events = wait_for_outcome(worker)
+    finally:
+        worker.close()
+    assert events[-1].kind == "cancelled"
+    # every started stage ran all of its steps
+    assert 0 < len(inner_run) < 15 and len(inner_run) % 3 == 0
+    assert recorder.listeners == []
+
+
+def test_worker_reports_failure():
+    worker = PipelineWorker(metrics.Recorder())
+    try:
+        worker.submit(lambda: 1 / 0)
+        events = wait_for_outcome(worker)
+    finally:
+        worker.close()
+    assert events[-1].kind == "failed" and isinstance(events[-1].value, ZeroDivisionError)